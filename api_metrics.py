@@ -0,0 +1,290 @@
+# api_metrics.py
+"""
+In-process metrics for Portal API traffic.
+
+SimioAPI records every HTTP request here (per endpoint: calls, status codes,
+latency, bytes sent/received), plus 401 re-authentications and retries; the
+shared_helper pagers record rows, pages and rows/s per paged endpoint; the schema
+and task-index caches record hits and misses; memory-budgeted fetches record their
+budget, peak size and spill. Everything goes to one registry:
+
+    from api_metrics import registry
+    registry.snapshot()                     # plain dict (p50/p95/p99 per endpoint, ...)
+    print_metrics_report()                  # readable summary
+    registry.to_prometheus()                # Prometheus text exposition format
+
+Set SIMIO_METRICS_DUMP to a file path (or '-' for stdout) to write the metrics
+when the process exits; the format follows the extension (.json, otherwise
+Prometheus text) or SIMIO_METRICS_FORMAT=json|prometheus. `cli.py --metrics PATH`
+does the same for one command.
+"""
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+# Upper bounds (seconds) of the Prometheus latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Latency samples kept per endpoint for percentiles (reservoir sampled beyond this)
+MAX_SAMPLES = 10_000
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of pre-sorted values, linearly interpolated; None when empty."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.statuses = {}
+        self.seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.samples = []
+
+    def add(self, status, seconds, bytes_sent, bytes_received):
+        self.calls += 1
+        if status is None or status >= 400:
+            self.errors += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.seconds += seconds
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(seconds)
+        else:
+            j = random.randrange(self.calls)
+            if j < MAX_SAMPLES:
+                self.samples[j] = seconds
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            'calls': self.calls, 'errors': self.errors,
+            'statuses': {str(k): v for k, v in self.statuses.items()},
+            'seconds': self.seconds, 'bytes_sent': self.bytes_sent, 'bytes_received': self.bytes_received,
+            'retries': self.retries,
+            'p50': percentile(ordered, 50), 'p95': percentile(ordered, 95), 'p99': percentile(ordered, 99),
+            'max': ordered[-1] if ordered else None,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe counters for API calls, paged fetches and caches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self._pages = {}
+            self._caches = {}
+            self._budgets = {}
+            self.reauths = 0
+            self.started = time.time()
+
+    # -- Recording ----------------------------------------------------------
+
+    def record_request(self, endpoint, status, seconds, bytes_sent=0, bytes_received=0):
+        """One HTTP request; status None means no response (connection error)."""
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.add(status, seconds, bytes_sent, bytes_received)
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.retries += 1
+
+    def record_reauth(self):
+        with self._lock:
+            self.reauths += 1
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            counts = self._caches.setdefault(cache, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def record_paged_fetch(self, endpoint, pages, rows, seconds):
+        """One completed (or abandoned) paged fetch: pages and rows received, wall time."""
+        with self._lock:
+            counts = self._pages.setdefault(endpoint, {'fetches': 0, 'pages': 0, 'rows': 0, 'seconds': 0.0})
+            counts['fetches'] += 1
+            counts['pages'] += pages
+            counts['rows'] += rows
+            counts['seconds'] += seconds
+
+    def record_memory_budget(self, name, budget_bytes, peak_bytes, rows, rows_spilled, bytes_spilled):
+        """One memory-budgeted fetch (see spill_buffer): its budget, peak in-memory estimate and spill."""
+        with self._lock:
+            counts = self._budgets.setdefault(name, {'fetches': 0, 'budget_bytes': None, 'peak_bytes': 0, 'rows': 0,
+                                                     'spills': 0, 'rows_spilled': 0, 'bytes_spilled': 0})
+            counts['fetches'] += 1
+            counts['budget_bytes'] = budget_bytes
+            counts['peak_bytes'] = max(counts['peak_bytes'], peak_bytes)
+            counts['rows'] += rows
+            counts['spills'] += 1 if rows_spilled else 0
+            counts['rows_spilled'] += rows_spilled
+            counts['bytes_spilled'] += bytes_spilled
+
+    # -- Reading ------------------------------------------------------------
+
+    def snapshot(self):
+        """All metrics as a JSON-serializable dict."""
+        with self._lock:
+            endpoints = {name: stats.summary() for name, stats in self._endpoints.items()}
+            pages = {name: dict(counts, rows_per_s=counts['rows'] / counts['seconds'] if counts['seconds'] else None)
+                     for name, counts in self._pages.items()}
+            caches = {name: dict(counts) for name, counts in self._caches.items()}
+            budgets = {name: dict(counts) for name, counts in self._budgets.items()}
+            return {'since': self.started, 'reauths': self.reauths, 'endpoints': endpoints,
+                    'paged_fetches': pages, 'caches': caches, 'memory_budgets': budgets}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            metric('simio_api_requests_total', 'counter', 'HTTP requests by endpoint and status.')
+            for name, stats in endpoints:
+                for status, n in sorted(stats.statuses.items(), key=lambda kv: str(kv[0])):
+                    lines.append(f'simio_api_requests_total{{endpoint="{name}",status="{status}"}} {n}')
+            metric('simio_api_request_seconds', 'histogram', 'HTTP request latency by endpoint.')
+            for name, stats in endpoints:
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS, stats.buckets):
+                    cumulative += n
+                    lines.append(f'simio_api_request_seconds_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'simio_api_request_seconds_bucket{{endpoint="{name}",le="+Inf"}} {stats.calls}')
+                lines.append(f'simio_api_request_seconds_sum{{endpoint="{name}"}} {stats.seconds}')
+                lines.append(f'simio_api_request_seconds_count{{endpoint="{name}"}} {stats.calls}')
+            for key, help_text in (('bytes_sent', 'Request body bytes sent.'),
+                                   ('bytes_received', 'Response body bytes received.'),
+                                   ('retries', 'Calls retried after a 401.')):
+                metric(f'simio_api_{key}_total', 'counter', help_text)
+                for name, stats in endpoints:
+                    lines.append(f'simio_api_{key}_total{{endpoint="{name}"}} {getattr(stats, key)}')
+            metric('simio_api_reauthentications_total', 'counter', 'Re-authentications after a 401.')
+            lines.append(f'simio_api_reauthentications_total {self.reauths}')
+            metric('simio_paged_rows_total', 'counter', 'Rows received by the pagers.')
+            for name, counts in sorted(self._pages.items()):
+                lines.append(f'simio_paged_rows_total{{endpoint="{name}"}} {counts["rows"]}')
+            metric('simio_paged_seconds_total', 'counter', 'Wall time spent in the pagers.')
+            for name, counts in sorted(self._pages.items()):
+                lines.append(f'simio_paged_seconds_total{{endpoint="{name}"}} {counts["seconds"]}')
+            metric('simio_cache_lookups_total', 'counter', 'Cache lookups by cache and result.')
+            for name, counts in sorted(self._caches.items()):
+                lines.append(f'simio_cache_lookups_total{{cache="{name}",result="hit"}} {counts["hits"]}')
+                lines.append(f'simio_cache_lookups_total{{cache="{name}",result="miss"}} {counts["misses"]}')
+            budgets = sorted(self._budgets.items())
+            metric('simio_memory_budget_bytes', 'gauge', 'Memory budget of the latest budgeted fetch.')
+            for name, counts in budgets:
+                if counts['budget_bytes'] is not None:
+                    lines.append(f'simio_memory_budget_bytes{{buffer="{name}"}} {counts["budget_bytes"]}')
+            metric('simio_memory_peak_bytes', 'gauge', 'Largest estimated in-memory size of a budgeted fetch.')
+            for name, counts in budgets:
+                lines.append(f'simio_memory_peak_bytes{{buffer="{name}"}} {counts["peak_bytes"]}')
+            for key, help_text in (('rows_spilled', 'Rows spilled to disk by budgeted fetches.'),
+                                   ('bytes_spilled', 'Bytes spilled to disk by budgeted fetches.')):
+                metric(f'simio_{key}_total', 'counter', help_text)
+                for name, counts in budgets:
+                    lines.append(f'simio_{key}_total{{buffer="{name}"}} {counts[key]}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _ms(value):
+    return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+
+def print_metrics_report(metrics_registry=None):
+    """Print per-endpoint calls, latency percentiles and bytes, pager throughput and cache hit rates."""
+    snap = (metrics_registry or registry).snapshot()
+    print("\n" + "=" * 80)
+    print(f"  API METRICS  |  Re-authentications: {snap['reauths']}")
+    print("=" * 80)
+    if snap['endpoints']:
+        print(f"  {'Endpoint':<34} {'Calls':>6} {'Err':>4} {'Retry':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'KB in':>9}")
+        print(f"  {'─' * 60}")
+        for name, s in sorted(snap['endpoints'].items(), key=lambda kv: -kv[1]['seconds']):
+            print(f"  {name:<34} {s['calls']:>6} {s['errors']:>4} {s['retries']:>5} "
+                  f"{_ms(s['p50'])} {_ms(s['p95'])} {_ms(s['p99'])} {s['bytes_received'] / 1024:>9.1f}")
+    if snap['paged_fetches']:
+        print(f"\n  Paged fetches:")
+        for name, p in sorted(snap['paged_fetches'].items()):
+            rate = f"{p['rows_per_s']:,.0f} rows/s" if p['rows_per_s'] else "-"
+            print(f"    - {name}: {p['rows']:,} rows in {p['pages']} pages, {p['seconds']:.2f} s ({rate})")
+    if snap['caches']:
+        print(f"\n  Caches:")
+        for name, c in sorted(snap['caches'].items()):
+            print(f"    - {name}: {c['hits']} hit(s), {c['misses']} miss(es)")
+    if snap['memory_budgets']:
+        print(f"\n  Memory budgets:")
+        for name, b in sorted(snap['memory_budgets'].items()):
+            budget = f"{b['budget_bytes'] / 1024 ** 2:,.1f} MB" if b['budget_bytes'] is not None else "none"
+            print(f"    - {name}: budget {budget}, peak {b['peak_bytes'] / 1024 ** 2:,.1f} MB, "
+                  f"{b['rows_spilled']:,} of {b['rows']:,} rows spilled ({b['bytes_spilled'] / 1024 ** 2:,.1f} MB)")
+
+
+def dump_metrics(path, fmt=None, metrics_registry=None):
+    """Write the metrics to path ('-' for stdout) as 'json' or 'prometheus' (default: by extension)."""
+    metrics_registry = metrics_registry or registry
+    fmt = fmt or ('json' if str(path).endswith('.json') else 'prometheus')
+    text = metrics_registry.to_json() if fmt == 'json' else metrics_registry.to_prometheus()
+    if path == '-':
+        sys.stdout.write(text)
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_exit_dump = {}
+
+
+def dump_at_exit(path, fmt=None):
+    """Write the metrics to path when the process exits (the latest call wins)."""
+    if not _exit_dump:
+        atexit.register(lambda: dump_metrics(_exit_dump['path'], _exit_dump['fmt']))
+    _exit_dump.update(path=path, fmt=fmt)
+
+
+if os.getenv("SIMIO_METRICS_DUMP"):
+    dump_at_exit(os.getenv("SIMIO_METRICS_DUMP"), os.getenv("SIMIO_METRICS_FORMAT") or None)
@@ -0,0 +1,83 @@
+# benchmarks/bench_startup.py
+"""
+Startup benchmark for the command-line entry point.
+
+Measures, in fresh interpreters:
+  - wall time of `python cli.py --help` (median of N runs)
+  - cumulative import time of `cli` reported by `python -X importtime`
+  - which heavy modules (requests, pysimio, dotenv, ...) `import cli` pulls in
+
+Exits with status 1 when the median startup time exceeds the budget or a heavy
+module is imported eagerly, so it can gate changes in CI.
+
+Usage:  python benchmarks/bench_startup.py [--budget-ms 150] [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("requests", "pysimio", "tenacity", "dotenv", "numpy", "yaml", "concurrent.futures")
+
+
+def measure_wall_ms(runs):
+    """Median wall time in ms of `python cli.py --help` over the given number of runs."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "cli.py", "--help"], cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), samples
+
+
+def measure_import_us():
+    """Cumulative microseconds for `import cli` as reported by -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import cli"], cwd=REPO_ROOT,
+                          check=True, capture_output=True, text=True)
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "cli":
+            return int(parts[1])
+    return None
+
+
+def eager_heavy_modules():
+    """Heavy modules present in sys.modules right after `import cli`."""
+    code = f"import cli, sys; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True, text=True)
+    return json.loads(proc.stdout.strip().replace("'", '"'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="maximum median wall time of `cli.py --help`")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", dest="json_path", help="also write results to this JSON file")
+    args = parser.parse_args()
+
+    median_ms, samples = measure_wall_ms(args.runs)
+    import_us = measure_import_us()
+    heavy = eager_heavy_modules()
+
+    print(f"  cli.py --help median:  {median_ms:.1f} ms  (budget {args.budget_ms:.0f} ms, {args.runs} runs)")
+    print(f"  import cli cumulative: {import_us / 1000:.2f} ms" if import_us is not None else "  import cli: n/a")
+    print(f"  heavy modules imported eagerly: {', '.join(heavy) or 'none'}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"median_ms": median_ms, "samples_ms": samples, "import_us": import_us,
+                       "eager_heavy_modules": heavy, "budget_ms": args.budget_ms}, f, indent=2)
+
+    ok = median_ms <= args.budget_ms and not heavy
+    print(f"  {'PASS' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# benchmarks/bench_suite.py
+"""
+Throughput, rendering, memory and polling benchmarks for the client helpers.
+
+Runs against a local mock portal (mock_portal.py, started in a child process so
+its allocations and CPU stay out of the measurements) and records:
+
+  - paging     rows/s of fetch_all_table_pages / iter_log_pages for each page size
+               and concurrency (table plus the state and task logs)
+  - flatten    rows/s of flatten_table_rows on pages in the properties/states format
+  - render     ms for print_table (top 10 rows) and stream_table over a full page set
+  - memory     tracemalloc peak while downloading the whole table into a list
+               versus streaming it through display_full_table
+  - polling    getRunProgress requests per run-minute for display_and_poll_run_progress
+               and wait_for_run_completion
+  - pipeline   rows/s of decode_pipeline.DecodePipeline (process-pool decode/flatten
+               into columns) for 1 and all CPU cores, on the table and the task log
+
+Results are written as JSON; `compare` reports the change of every metric between two
+result files and exits with status 1 when one got worse by more than the threshold:
+
+    python benchmarks/bench_suite.py run --json before.json
+    ... change shared_helper / SimioAPI ...
+    python benchmarks/bench_suite.py run --json after.json
+    python benchmarks/bench_suite.py compare before.json after.json --threshold 10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Metrics where a larger value is better; every other metric is better when smaller
+HIGHER_IS_BETTER = ("rows_per_s",)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def mock_portal(rows, log_rows, latency_ms, run_seconds):
+    """Start mock_portal.py in a child process; a context manager yielding its base URL."""
+    from mock_portal import serve_in_subprocess
+
+    return serve_in_subprocess(rows=rows, log_rows=log_rows, latency_ms=latency_ms, run_seconds=run_seconds)
+
+
+class CountingAPI:
+    """Pass-through API wrapper that counts calls per method."""
+
+    def __init__(self, api):
+        self._api = api
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+def _timed(fn, repeat):
+    """(median seconds, last result) over repeat calls."""
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks (each returns a list of {name, group, params, metrics})
+# ---------------------------------------------------------------------------
+
+def bench_paging(api, table, page_sizes, concurrencies, repeat):
+    from shared_helper import fetch_all_table_pages, iter_log_pages
+
+    results = []
+    sources = [('table', table), ('log', 'resource-state'), ('log', 'task')]
+    for kind, name in sources:
+        for page_size in page_sizes:
+            for concurrency in concurrencies:
+                counter = CountingAPI(api)
+                if kind == 'table':
+                    fetch = lambda: len(fetch_all_table_pages(counter, 1, "Plan", name, page_size,
+                                                              concurrency=concurrency))
+                else:
+                    fetch = lambda: sum(len(rows) for _, rows in iter_log_pages(counter, 1, name, page_size,
+                                                                                 concurrency=concurrency))
+                seconds, rows = _timed(fetch, repeat)
+                results.append({
+                    'name': f"paging[{name},page_size={page_size},concurrency={concurrency}]",
+                    'group': 'paging',
+                    'params': {'source': name, 'page_size': page_size, 'concurrency': concurrency},
+                    'metrics': {'rows_per_s': rows / seconds, 'seconds': seconds,
+                                'requests': sum(counter.calls.values()) / repeat},
+                })
+    return results
+
+
+def _synthetic_pages(rows, page_size):
+    """Table pages in the nested format, generated without HTTP."""
+    from mock_portal import MockPortal
+
+    portal = MockPortal()
+    try:
+        rows_list = [portal.table_row('Orders', i) for i in range(rows)]
+    finally:
+        portal._server.server_close()
+    return [rows_list[i:i + page_size] for i in range(0, rows, page_size)]
+
+
+def bench_flatten(rows, repeat):
+    from shared_helper import flatten_table_rows
+
+    pages = _synthetic_pages(rows, 500)
+    seconds, _ = _timed(lambda: [flatten_table_rows(page) for page in pages], repeat)
+    return [{'name': f"flatten[rows={rows}]", 'group': 'flatten', 'params': {'rows': rows},
+             'metrics': {'rows_per_s': rows / seconds, 'seconds': seconds}}]
+
+
+def bench_render(rows, repeat):
+    from shared_helper import flatten_table_rows, print_table, stream_table
+
+    flat = [row for page in _synthetic_pages(rows, 500) for row in flatten_table_rows(page)]
+
+    def quiet(fn):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+
+    results = []
+    seconds, _ = _timed(lambda: quiet(lambda: print_table(flat, max_rows=10)), repeat)
+    results.append({'name': f"render[print_table,rows={rows}]", 'group': 'render', 'params': {'rows': rows},
+                    'metrics': {'ms': seconds * 1000}})
+    seconds, _ = _timed(lambda: quiet(lambda: stream_table(iter(flat))), repeat)
+    results.append({'name': f"render[stream_table,rows={rows}]", 'group': 'render', 'params': {'rows': rows},
+                    'metrics': {'ms': seconds * 1000, 'rows_per_s': rows / seconds}})
+    return results
+
+
+def bench_memory(api, table, page_size):
+    from shared_helper import display_full_table, fetch_all_table_pages
+
+    def peak(fn):
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return [
+        {'name': f"memory[fetch_all_table_pages,{table}]", 'group': 'memory', 'params': {'page_size': page_size},
+         'metrics': {'peak_bytes': peak(lambda: fetch_all_table_pages(api, 1, "Plan", table, page_size))}},
+        {'name': f"memory[display_full_table,{table}]", 'group': 'memory', 'params': {'page_size': page_size},
+         'metrics': {'peak_bytes': peak(lambda: display_full_table(api, 1, "Plan", table, page_size))}},
+    ]
+
+
+def bench_polling(api, run_seconds, refresh_interval):
+    from shared_helper import display_and_poll_run_progress, wait_for_run_completion
+
+    results = []
+    pollers = [('display_and_poll_run_progress',
+                lambda a, run_id: display_and_poll_run_progress(a, run_id, "Bench", refresh_interval)),
+               ('wait_for_run_completion',
+                lambda a, run_id: wait_for_run_completion(a, run_id, refresh_interval))]
+    for name, poll in pollers:
+        run_id = api.createRun(1, f"Bench-{name}")
+        api.startRunFromExisting(run_id)
+        counter = CountingAPI(api)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            poll(counter, run_id)
+        elapsed = time.perf_counter() - start
+        api.deleteRun(run_id)
+        requests = counter.calls.get('getRunProgress', 0)
+        results.append({'name': f"polling[{name}]", 'group': 'polling',
+                        'params': {'run_seconds': run_seconds, 'refresh_interval': refresh_interval},
+                        'metrics': {'requests_per_run_minute': requests / (run_seconds / 60),
+                                    'completion_lag_s': max(0.0, elapsed - run_seconds)}})
+    return results
+
+
+def bench_pipeline(api, table, page_size, concurrency, repeat):
+    from decode_pipeline import DecodePipeline
+
+    results = []
+    for processes in sorted({1, os.cpu_count() or 1}):
+        with DecodePipeline(api, processes=processes, io_concurrency=concurrency) as pipeline:
+            pipeline.log(1, 'task', page_size)  # start the worker processes outside the timing
+            for name, fetch in ((table, lambda: len(pipeline.table(1, "Plan", table, page_size))),
+                                ('task', lambda: len(pipeline.log(1, 'task', page_size)))):
+                seconds, rows = _timed(fetch, repeat)
+                results.append({'name': f"pipeline[{name},processes={processes}]", 'group': 'pipeline',
+                                'params': {'source': name, 'processes': processes, 'page_size': page_size,
+                                           'concurrency': concurrency},
+                                'metrics': {'rows_per_s': rows / seconds, 'seconds': seconds}})
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(value):
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:.3f}"
+
+
+def _print_results(results):
+    group = None
+    for r in results:
+        if r['group'] != group:
+            group = r['group']
+            print(f"\n  {group.upper()}")
+            print(f"  {'─' * 60}")
+        metrics = "  ".join(f"{k}={_fmt(v)}" for k, v in r['metrics'].items())
+        print(f"    {r['name']:<58} {metrics}")
+
+
+def cmd_run(args):
+    from simio_api_helper import SimioAPI
+
+    groups = set(args.only or ('paging', 'flatten', 'render', 'memory', 'polling', 'pipeline'))
+    results = []
+    with mock_portal(args.rows, args.log_rows, args.latency_ms, args.run_seconds) as url:
+        api = SimioAPI(url)
+        api.authenticate(personalAccessToken="bench")
+        if 'paging' in groups:
+            results += bench_paging(api, args.table, args.page_sizes, args.concurrency, args.repeat)
+        if 'flatten' in groups:
+            results += bench_flatten(args.rows, args.repeat)
+        if 'render' in groups:
+            results += bench_render(args.rows, args.repeat)
+        if 'memory' in groups:
+            results += bench_memory(api, args.table, max(args.page_sizes))
+        if 'polling' in groups:
+            results += bench_polling(api, args.run_seconds, args.refresh_interval)
+        if 'pipeline' in groups:
+            results += bench_pipeline(api, args.table, max(args.page_sizes), max(args.concurrency), args.repeat)
+
+    _print_results(results)
+    if args.json_path:
+        meta = {'revision': _git_revision(), 'python': platform.python_version(), 'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'config': {k: v for k, v in vars(args).items() if k not in ('func', 'json_path')}}
+        with open(args.json_path, "w") as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"\n  Results written to {args.json_path}")
+    return 0
+
+
+def compare_results(base, new, threshold):
+    """[(name, metric, base value, new value, percent change, verdict)] for metrics present in both files."""
+    base_by_name = {r['name']: r for r in base['results']}
+    rows = []
+    for r in new['results']:
+        before = base_by_name.get(r['name'])
+        if before is None:
+            continue
+        for metric, value in r['metrics'].items():
+            old = before['metrics'].get(metric)
+            if old is None:
+                continue
+            change = (value - old) / old * 100 if old else 0.0
+            better = change > 0 if metric in HIGHER_IS_BETTER else change < 0
+            verdict = 'same' if abs(change) < threshold else ('better' if better else 'WORSE')
+            rows.append((r['name'], metric, old, value, change, verdict))
+    return rows
+
+
+def cmd_compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows = compare_results(base, new, args.threshold)
+    print(f"\n  {args.base} ({base['meta'].get('revision')}) -> {args.new} ({new['meta'].get('revision')})"
+          f"  |  threshold {args.threshold:g}%")
+    print(f"  {'─' * 60}")
+    for name, metric, old, value, change, verdict in rows:
+        print(f"    {name:<58} {metric:<24} {_fmt(old):>14} -> {_fmt(value):>14}  {change:+7.1f}%  {verdict}")
+    worse = [r for r in rows if r[5] == 'WORSE']
+    print(f"\n  {len(rows)} metric(s) compared, {len(worse)} worse by more than {args.threshold:g}%")
+    return 1 if worse else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client benchmark suite (runs against mock_portal.py)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="run the benchmarks")
+    p.add_argument("--rows", type=int, default=20000, help="rows in the benchmark table")
+    p.add_argument("--log-rows", type=int, default=20000, help="rows in each log")
+    p.add_argument("--table", default="Orders")
+    p.add_argument("--page-sizes", type=int, nargs="+", default=[100, 500, 1000])
+    p.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    p.add_argument("--latency-ms", type=float, default=5.0, help="mock portal latency per request")
+    p.add_argument("--run-seconds", type=float, default=6.0, help="mock run duration for the polling benchmark")
+    p.add_argument("--refresh-interval", type=float, default=1.0, help="poll interval for the polling benchmark")
+    p.add_argument("--repeat", type=int, default=3, help="timed repetitions per case (median is kept)")
+    p.add_argument("--only", nargs="+", choices=('paging', 'flatten', 'render', 'memory', 'polling', 'pipeline'))
+    p.add_argument("--json", dest="json_path", help="write results to this JSON file")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="compare two result files")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=10.0, help="percent change treated as noise")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# cassette.py
+"""
+HTTP record/replay for SimioAPI, for repeatable performance tests.
+
+A cassette is a gzip-compressed JSON-lines file: a header line, then one line per
+request with its method, path, query, a digest of the JSON body, the response
+status and body, the time the portal took to answer and the request/response sizes.
+
+Record a real session, then replay it with the original or zero latency:
+
+    SIMIO_CASSETTE_RECORD=session.jsonl.gz USE_PYSIMIO=False python main.py
+    SIMIO_CASSETTE_REPLAY=session.jsonl.gz SIMIO_CASSETTE_LATENCY=zero USE_PYSIMIO=False python main.py
+
+or in code:
+
+    api = SimioAPI(url, transport=RecordingTransport("session.jsonl.gz"))
+    api = SimioAPI(url, transport=ReplayTransport("session.jsonl.gz", latency="zero"))
+
+Requests are matched on method, path, query and body, never on the host or the
+auth header, so a cassette replays against any SIMIO_PORTAL_URL. Identical requests
+(e.g. repeated getRunProgress polls) are answered in recorded order, the last
+answer repeating once they run out. Personal access tokens and issued auth tokens
+are not written to the cassette.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlencode, urlsplit
+
+CASSETTE_VERSION = 1
+_REDACTED_TOKEN = "cassette-token"
+
+
+class CassetteMissError(LookupError):
+    """A replayed request has no recorded response."""
+
+
+def _api_path(url):
+    """The URL path from /api on, so cassettes don't depend on the portal host."""
+    path = urlsplit(url).path
+    index = path.find('/api/')
+    return path[index:] if index >= 0 else path
+
+
+def _query(params):
+    if not params:
+        return ''
+    items = params.items() if isinstance(params, dict) else params
+    return urlencode([(k, str(v)) for k, v in items])
+
+
+def _body_digest(path, body):
+    if body is None or path.endswith('/auth'):
+        return ''  # auth bodies carry the access token and must match whatever token is used on replay
+    return hashlib.blake2b(json.dumps(body, sort_keys=True, default=str).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def request_key(method, url, params=None, json_body=None):
+    """(method, path, query, body digest) identifying a request in a cassette."""
+    path = _api_path(url)
+    return method.upper(), path, _query(params), _body_digest(path, json_body)
+
+
+def _json_dumps(value):
+    return json.dumps(value, default=str)
+
+
+def _redact_token(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text
+    if isinstance(data, dict) and 'token' in data:
+        data['token'] = _REDACTED_TOKEN
+    return json.dumps(data)
+
+
+class CassetteResponse:
+    """The parts of a requests.Response that SimioAPI uses, built from a cassette entry."""
+
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class RecordingTransport:
+    """Transport that sends requests through inner (requests.request) and appends each exchange to a cassette."""
+
+    def __init__(self, path, inner=None):
+        if inner is None:
+            import requests
+            inner = requests.request
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._write({'version': CASSETTE_VERSION, 'recorded': time.strftime('%Y-%m-%dT%H:%M:%S')})
+        atexit.register(self.close)
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def __call__(self, method, url, params=None, json=None, headers=None, **kwargs):
+        offset = time.monotonic() - self._start
+        start = time.perf_counter()
+        resp = self.inner(method, url, params=params, json=json, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - start
+        text = resp.text
+        method_key, path, query, digest = request_key(method, url, params, json)
+        if path.endswith('/auth') and resp.status_code == 200:
+            text = _redact_token(text)
+        entry = {
+            'method': method_key, 'path': path, 'query': query, 'body': digest,
+            'status': resp.status_code, 'content_type': resp.headers.get('Content-Type'),
+            'response': text, 'elapsed': round(elapsed, 6), 'offset': round(offset, 6),
+            'request_bytes': len(path) + len(query) + (len(_json_dumps(json)) if json is not None else 0),
+            'response_bytes': len(resp.content),
+        }
+        with self._lock:
+            if not self._file.closed:
+                self._write(entry)
+        return resp
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_cassette(path):
+    """(header, [entries]) from a cassette file."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette.")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayTransport:
+    """
+    Transport that answers requests from a cassette without touching the network.
+    latency='original' sleeps for each response's recorded time; 'zero' answers at once.
+    With strict=False an unrecorded request gets a 404 instead of CassetteMissError.
+    """
+
+    def __init__(self, path, latency='original', strict=True):
+        if latency not in ('original', 'zero'):
+            raise ValueError("latency must be 'original' or 'zero'")
+        self.latency = latency
+        self.strict = strict
+        self._lock = threading.Lock()
+        self.header, entries = read_cassette(path)
+        self._responses = {}
+        for entry in entries:
+            key = (entry['method'], entry['path'], entry['query'], entry['body'])
+            self._responses.setdefault(key, deque()).append(entry)
+        self.misses = []
+
+    def __call__(self, method, url, params=None, json=None, headers=None, **kwargs):
+        key = request_key(method, url, params, json)
+        with self._lock:
+            queue = self._responses.get(key)
+            if not queue:
+                self.misses.append(key)
+                entry = None
+            else:
+                entry = queue.popleft() if len(queue) > 1 else queue[0]
+        if entry is None:
+            if self.strict:
+                raise CassetteMissError(f"No recorded response for {key[0]} {key[1]}"
+                                        + (f"?{key[2]}" if key[2] else ''))
+            return CassetteResponse(404, _json_dumps({'message': 'Not in cassette'}))
+        if self.latency == 'original' and entry['elapsed']:
+            time.sleep(entry['elapsed'])
+        content_type = entry.get('content_type')
+        return CassetteResponse(entry['status'], entry['response'],
+                                {'Content-Type': content_type} if content_type else {})
+
+
+_env_transports = {}         # (kind, absolute path, latency) -> transport shared by every SimioAPI
+_env_transports_lock = threading.Lock()
+
+
+def transport_from_env():
+    """
+    RecordingTransport / ReplayTransport selected by SIMIO_CASSETTE_RECORD or SIMIO_CASSETTE_REPLAY
+    (a cassette path), with SIMIO_CASSETTE_LATENCY=original|zero for replay; None when neither is set.
+    One transport is kept per cassette path for the process, so every SimioAPI records into the
+    same file (opening it again would truncate it) and replays from the same queues.
+    """
+    record = os.getenv("SIMIO_CASSETTE_RECORD")
+    replay = os.getenv("SIMIO_CASSETTE_REPLAY")
+    if record and replay:
+        raise ValueError("Set only one of SIMIO_CASSETTE_RECORD and SIMIO_CASSETTE_REPLAY.")
+    if record:
+        key = ('record', os.path.abspath(record), None)
+    elif replay:
+        key = ('replay', os.path.abspath(replay), os.getenv("SIMIO_CASSETTE_LATENCY", "original").strip().lower())
+    else:
+        return None
+    with _env_transports_lock:
+        transport = _env_transports.get(key)
+        if transport is None:
+            if record:
+                transport = RecordingTransport(record)
+            else:
+                transport = ReplayTransport(replay, latency=key[2])
+            _env_transports[key] = transport
+        return transport
+
+
+def print_cassette_summary(path):
+    """Print request counts, bytes and recorded latency per endpoint."""
+    header, entries = read_cassette(path)
+    by_endpoint = {}
+    for entry in entries:
+        parts = entry['path'].split('/')
+        endpoint = f"{entry['method']} " + '/'.join('{id}' if p.isdigit() else p for p in parts)
+        stats = by_endpoint.setdefault(endpoint, [0, 0, 0.0])
+        stats[0] += 1
+        stats[1] += entry['response_bytes']
+        stats[2] += entry['elapsed']
+    print("\n" + "=" * 80)
+    print(f"  CASSETTE: {os.path.basename(path)}  |  Recorded: {header.get('recorded', '?')}  |  {len(entries)} requests")
+    print("=" * 80)
+    for endpoint, (count, size, elapsed) in sorted(by_endpoint.items(), key=lambda kv: -kv[1][2]):
+        print(f"  {endpoint:<70} {count:>6}x  {size / 1024:>10.1f} KB  {elapsed:>8.2f} s")
+    if entries:
+        span = entries[-1]['offset'] + entries[-1]['elapsed']
+        print(f"  {'─' * 60}")
+        print(f"  Portal time: {sum(e['elapsed'] for e in entries):.2f} s of {span:.2f} s session")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 2:
+        sys.exit("usage: python cassette.py CASSETTE")
+    print_cassette_summary(sys.argv[1])
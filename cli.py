@@ -0,0 +1,230 @@
+# cli.py
+"""
+Command-line entry point for the Simio Portal Web API scripts.
+
+Subcommands:
+    run        Run the full main.py plan workflow
+    status     Show progress for a run
+    dump-table Page through and display every row of a table
+    dump-logs  Page through and display a log
+    diff-table Compare a table between two runs/scenarios by key columns
+    schema     Display table (and optionally log) schemas
+    spfx-schema Display tables and controls read from a local .spfx project file
+    archive    Archive a run's table/log pages verbatim (raw, compressed, page-indexed)
+
+Only argparse is imported at startup; dotenv, the API backend selected by
+USE_PYSIMIO (or --backend) and the helpers are imported when a subcommand runs,
+so quick commands like `status` don't pay for the full workflow.
+
+Usage:  python cli.py <subcommand> --help
+"""
+import argparse
+import os
+import sys
+
+# Same keys as shared_helper.LOG_ENDPOINTS, repeated so argument parsing doesn't import the helpers
+LOG_NAMES = ('resource-usage', 'resource-state', 'resource-capacity', 'task', 'constraint')
+
+
+def _make_api(args):
+    """Load .env, import the selected backend and return an authenticated API object."""
+    from dotenv import load_dotenv
+    from shared_helper import load_backend
+
+    load_dotenv(override=True)
+    personal_access_token = os.getenv("PERSONAL_ACCESS_TOKEN")
+    if not personal_access_token:
+        raise ValueError("Personal access token not found. Make sure it's set in the environment.")
+    use_pysimio = None if args.backend is None else args.backend == "pysimio"
+    api_class, time_options_class = load_backend(use_pysimio)
+    api = api_class(os.getenv("SIMIO_PORTAL_URL"))
+    if getattr(args, "concurrency", 1) > 1:
+        from threaded_api import ThreadedAPI
+        api = ThreadedAPI(api, max_workers=args.concurrency)
+    api.authenticate(personalAccessToken=personal_access_token)
+    return api, time_options_class
+
+
+def cmd_run(args):
+    import main
+    from shared_helper import load_backend
+
+    use_pysimio = None if args.backend is None else args.backend == "pysimio"
+    api_class, time_options_class = load_backend(use_pysimio)
+    if not main.personal_access_token:
+        raise ValueError("Personal access token not found. Make sure it's set in the environment.")
+    return main.run_workflow(api_class(main.simio_portal_url), time_options_class,
+                             project_name=args.project or main.project_name,
+                             plan_name=args.plan or main.plan_name,
+                             control_values_file=args.values_file or main.control_values_file)
+
+
+def cmd_status(args):
+    from shared_helper import print_run_progress
+
+    api, _ = _make_api(args)
+    print_run_progress(api.getRunProgress(args.run_id))
+    return 0
+
+
+def cmd_dump_table(args):
+    from shared_helper import display_full_table
+
+    api, _ = _make_api(args)
+    display_full_table(api, args.run_id, args.scenario, args.table, args.page_size, concurrency=args.concurrency,
+                       columns=args.column, filter=args.filter, browse=args.browse, memory_budget=args.memory_budget)
+    return 0
+
+
+def cmd_dump_logs(args):
+    from shared_helper import LOG_ENDPOINTS, iter_log_pages, stream_table
+
+    api, _ = _make_api(args)
+    for log_name in (args.log or list(LOG_ENDPOINTS)):
+        log_label = LOG_ENDPOINTS[log_name][0]
+        print("\n" + "=" * 80)
+        print(f"  {log_label.upper()}  |  Run ID: {args.run_id}")
+        print("=" * 80)
+        pages = iter_log_pages(api, args.run_id, log_name, args.page_size, concurrency=args.concurrency)
+        if not stream_table(row for _, page_rows in pages for row in page_rows):
+            print("  (no data returned)")
+    return 0
+
+
+def cmd_diff_table(args):
+    from table_diff import diff_tables, print_diff_report
+
+    api, _ = _make_api(args)
+    report = diff_tables(api, args.model_id, args.table, (args.run_a, args.scenario_a), (args.run_b, args.scenario_b),
+                         page_size=args.page_size, concurrency=args.concurrency, ignore_columns=args.ignore or (),
+                         max_examples=args.examples)
+    print_diff_report(report)
+    return 0
+
+
+def cmd_schema(args):
+    from shared_helper import display_log_schema, display_table_schema
+
+    api, _ = _make_api(args)
+    display_table_schema(api, args.model_id, args.run_id)
+    if args.logs:
+        if args.run_id is None:
+            print("  --logs needs --run-id (log schemas are per run).")
+            return 1
+        display_log_schema(api, args.run_id)
+    return 0
+
+
+def cmd_archive(args):
+    from run_archive import archive_run, print_archive_summary
+
+    api, _ = _make_api(args)
+    out = args.out or f"archive/run{args.run_id}"
+    archive_run(api, args.run_id, args.scenario, out, tables=args.table, logs=() if args.no_logs else args.log,
+                model_id=args.model_id, page_size=args.page_size, concurrency=args.concurrency, codec=args.codec)
+    print_archive_summary(out)
+    return 0
+
+
+def cmd_spfx_schema(args):
+    from spfx_schema import print_spfx_schema, read_spfx_schema
+
+    print_spfx_schema(read_spfx_schema(args.path, refresh=args.refresh))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Simio Portal Web API command-line tools")
+    parser.add_argument("--backend", choices=("pysimio", "rest"),
+                        help="API backend (default: USE_PYSIMIO from the environment)")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile each workflow phase (cProfile + tracemalloc) into DIR; summary printed at exit")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write API metrics to PATH on exit (.json, else Prometheus text; '-' for stdout)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="run the full plan workflow from main.py")
+    p.add_argument("--project", help="project name (default: main.py configuration)")
+    p.add_argument("--plan", help="plan name (default: main.py configuration)")
+    p.add_argument("--values-file", help="JSON/YAML file of control values to apply without prompting")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("status", help="show progress for a run")
+    p.add_argument("run_id", type=int)
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("dump-table", help="display every row of a table")
+    p.add_argument("run_id", type=int)
+    p.add_argument("scenario")
+    p.add_argument("table")
+    p.add_argument("--page-size", type=int, default=100)
+    p.add_argument("--concurrency", type=int, default=1, help="pages requested at once")
+    p.add_argument("--column", action="append", help="column to return (repeatable, default: all)")
+    p.add_argument("--filter", help="OData row filter, e.g. \"MaterialName eq 'Widget'\"")
+    p.add_argument("--browse", action="store_true", help="page through the rows interactively")
+    p.add_argument("--memory-budget", help="with --browse, keep loaded rows under this size (e.g. 256MB), spilling to disk")
+    p.set_defaults(func=cmd_dump_table)
+
+    p = sub.add_parser("dump-logs", help="display log data for a run")
+    p.add_argument("run_id", type=int)
+    p.add_argument("--log", action="append", choices=LOG_NAMES, help="log to dump (repeatable, default: all)")
+    p.add_argument("--page-size", type=int, default=100)
+    p.add_argument("--concurrency", type=int, default=1, help="pages requested at once")
+    p.set_defaults(func=cmd_dump_logs)
+
+    p = sub.add_parser("diff-table", help="compare a table between two runs or scenarios")
+    p.add_argument("model_id", type=int, help="model whose table schema supplies the key columns")
+    p.add_argument("table")
+    p.add_argument("run_a", type=int)
+    p.add_argument("scenario_a")
+    p.add_argument("run_b", type=int)
+    p.add_argument("scenario_b")
+    p.add_argument("--page-size", type=int, default=500)
+    p.add_argument("--concurrency", type=int, default=1, help="pages requested at once")
+    p.add_argument("--ignore", action="append", help="column to leave out of the comparison (repeatable)")
+    p.add_argument("--examples", type=int, default=20, help="rows to show per kind of change")
+    p.set_defaults(func=cmd_diff_table)
+
+    p = sub.add_parser("schema", help="display table schemas (and log schemas with --logs)")
+    p.add_argument("model_id", type=int)
+    p.add_argument("--run-id", type=int, help="run used for the scenario-binding fallback and log schemas")
+    p.add_argument("--logs", action="store_true")
+    p.set_defaults(func=cmd_schema)
+
+    p = sub.add_parser("archive", help="archive a run's table/log pages verbatim into a compressed, page-indexed directory")
+    p.add_argument("run_id", type=int)
+    p.add_argument("scenario")
+    p.add_argument("--model-id", type=int, help="model whose table schema lists the tables (default: scenario bindings)")
+    p.add_argument("--table", action="append", help="table to archive (repeatable, default: all)")
+    p.add_argument("--log", action="append", choices=LOG_NAMES, help="log to archive (repeatable, default: all)")
+    p.add_argument("--no-logs", action="store_true", help="archive tables only")
+    p.add_argument("--out", help="archive directory (default: archive/run<RUN_ID>)")
+    p.add_argument("--codec", choices=("gzip", "zstd"), default="gzip", help="zstd needs the zstandard package")
+    p.add_argument("--page-size", type=int, default=500)
+    p.add_argument("--concurrency", type=int, default=1, help="pages requested at once")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("spfx-schema", help="display tables and controls from a .spfx project file (offline)")
+    p.add_argument("path")
+    p.add_argument("--refresh", action="store_true", help="re-parse even if the file is in the schema cache")
+    p.set_defaults(func=cmd_spfx_schema)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        from api_metrics import dump_at_exit
+        dump_at_exit(args.metrics)
+    if args.profile:
+        import profiling
+        profiling.enable(args.profile)
+        if args.command != "run":
+            # run profiles each workflow phase itself; other commands are one phase
+            with profiling.profile_phase(args.command):
+                return args.func(args)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+# decode_pipeline.py
+"""
+Process-pool decode/flatten pipeline for very large tables and logs.
+
+With concurrent HTTP the Portal is no longer the bottleneck on multi-million-row
+task and resource logs: json.loads and flatten_table_rows on every page run in one
+process under the GIL. DecodePipeline splits the work:
+
+  - I/O threads fetch pages as raw body bytes (SimioAPI.getTableDataRaw /
+    getScenariosLogDataRaw, paged as in run_archive.iter_raw_pages)
+  - a process pool decodes each page, flattens table rows and converts the page
+    to columns: int64/float64/bool NumPy arrays, and strings as one UTF-8 buffer
+    plus int64 offsets (the Arrow string layout)
+  - the columns come back as one packed buffer per page, in shared memory on
+    POSIX (only its name and layout are pickled), else as a single bytes object
+
+    with DecodePipeline(api, processes=8, io_concurrency=8) as pipeline:
+        log = pipeline.log(run_id, 'task', page_size=1000)       # ColumnarTable
+        starts = log.column('StartDateTime')                     # StringColumn
+        for batch in pipeline.iter_table(run_id, "Plan", "Orders"):   # one ColumnarTable per page
+            ...
+
+Pages are returned in order, with at most a few pages per process in flight, so
+memory stays bounded while the pool is busy. Paging stops at the first empty
+page. Needs numpy (pip install numpy) and the REST backend (pysimio only
+returns parsed JSON).
+"""
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # only needed when the pipeline is used
+    np = None
+
+from api_metrics import registry as metrics
+from run_archive import iter_raw_pages
+
+# Pages queued per worker process; bounds memory while keeping every process busy
+PAGES_PER_PROCESS = 2
+_ALIGN = 8
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("decode_pipeline needs numpy. Install it with: pip install numpy")
+
+
+# ---------------------------------------------------------------------------
+# Columns
+# ---------------------------------------------------------------------------
+
+class Column:
+    """A numeric column: a NumPy array plus an optional validity mask (False where the value was null)."""
+
+    def __init__(self, kind, data, valid=None):
+        self.kind = kind            # 'int64', 'float64' or 'bool'
+        self.data = data
+        self.valid = valid
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        if self.valid is not None and not self.valid[i]:
+            return None
+        return self.data[i].item()
+
+    def to_list(self):
+        values = self.data.tolist()
+        if self.valid is not None:
+            values = [v if ok else None for v, ok in zip(values, self.valid.tolist())]
+        return values
+
+    def to_numpy(self):
+        return self.data
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.valid.nbytes if self.valid is not None else 0)
+
+
+class StringColumn:
+    """Strings stored as one UTF-8 buffer and int64 offsets (value i is blob[offsets[i]:offsets[i + 1]])."""
+
+    kind = 'str'
+
+    def __init__(self, offsets, blob, valid=None):
+        self.offsets = offsets
+        self.blob = blob
+        self.valid = valid
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if self.valid is not None and not self.valid[i]:
+            return None
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+    def to_list(self):
+        blob, bounds = self.blob, self.offsets.tolist()
+        values = [blob[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+        if self.valid is not None:
+            values = [v if ok else None for v, ok in zip(values, self.valid.tolist())]
+        return values
+
+    def to_numpy(self):
+        return np.array(self.to_list(), dtype=object)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + len(self.blob) + (self.valid.nbytes if self.valid is not None else 0)
+
+
+def _null_column(n):
+    return Column('float64', np.full(n, np.nan), np.zeros(n, dtype=bool))
+
+
+def _concat_columns(parts):
+    """One column from same-named page columns, promoting int/bool -> float64 and mixed kinds -> strings."""
+    kinds = {p.kind for p in parts}
+    valid = None
+    if any(p.valid is not None for p in parts):
+        valid = np.concatenate([p.valid if p.valid is not None else np.ones(len(p), dtype=bool) for p in parts])
+    if kinds == {'str'}:
+        shifts = np.cumsum([0] + [len(p.blob) for p in parts[:-1]])
+        offsets = np.concatenate([parts[0].offsets[:1]] + [p.offsets[1:] + s for p, s in zip(parts, shifts)])
+        return StringColumn(offsets, b''.join(p.blob for p in parts), valid)
+    if len(kinds) == 1:
+        return Column(parts[0].kind, np.concatenate([p.data for p in parts]), valid)
+    if 'str' not in kinds:
+        return Column('float64', np.concatenate([p.data.astype(np.float64) for p in parts]), valid)
+    values = [None if v is None else str(v) for p in parts for v in p.to_list()]
+    return _encode_column(values)[1]
+
+
+class ColumnarTable:
+    """Rows held as columns; iterable and indexable as flat row dicts."""
+
+    def __init__(self, columns, num_rows):
+        self.columns = columns      # {name: Column | StringColumn}
+        self.num_rows = num_rows
+
+    @classmethod
+    def concat(cls, tables):
+        """One table from page batches; columns missing from a batch are null there."""
+        tables = [t for t in tables if t.num_rows]
+        names = list(dict.fromkeys(name for t in tables for name in t.columns))
+        columns = {name: _concat_columns([t.columns[name] if name in t.columns else _null_column(t.num_rows)
+                                              for t in tables])
+                   for name in names}
+        return cls(columns, sum(t.num_rows for t in tables))
+
+    def __len__(self):
+        return self.num_rows
+
+    def column(self, name):
+        return self.columns[name]
+
+    def __getitem__(self, i):
+        if not -self.num_rows <= i < self.num_rows:
+            raise IndexError(f"row {i} out of range ({self.num_rows} rows)")
+        i %= self.num_rows
+        return {name: col[i] for name, col in self.columns.items()}
+
+    def __iter__(self):
+        names = list(self.columns)
+        for values in zip(*(self.columns[name].to_list() for name in names)):
+            yield dict(zip(names, values))
+
+    def to_rows(self):
+        return list(self)
+
+    @property
+    def nbytes(self):
+        return sum(col.nbytes for col in self.columns.values())
+
+
+# ---------------------------------------------------------------------------
+# Worker side: decode, flatten, columnarize, pack
+# ---------------------------------------------------------------------------
+
+def _encode_column(values):
+    """(kind, column) for a list of JSON scalars."""
+    present = [v for v in values if v is not None]
+    valid = None if len(present) == len(values) else np.array([v is not None for v in values], dtype=bool)
+    types = {type(v) for v in present}
+    if types and types <= {bool}:
+        return 'bool', Column('bool', np.array([bool(v) for v in values], dtype=bool), valid)
+    if types and types <= {int}:
+        try:
+            return 'int64', Column('int64', np.array([0 if v is None else v for v in values], dtype=np.int64), valid)
+        except OverflowError:
+            pass
+    if types and types <= {int, float}:
+        return 'float64', Column('float64', np.array([np.nan if v is None else v for v in values],
+                                                     dtype=np.float64), valid)
+    encoded = [b'' if v is None else (v if isinstance(v, str) else json.dumps(v)).encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return 'str', StringColumn(offsets, b''.join(encoded), valid)
+
+
+def _columnarize(rows):
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    return {name: _encode_column([row.get(name) for row in rows])[1] for name in names}
+
+
+def _pack(columns):
+    """(layout, parts): layout lists each column's kind and buffer (offset, nbytes, dtype) in the packed buffer."""
+    layout, parts, offset = [], [], 0
+
+    def add(buffer, dtype):
+        nonlocal offset
+        raw = buffer if isinstance(buffer, bytes) else buffer.tobytes()
+        entry = (offset, len(raw), dtype)
+        parts.append(raw)
+        padding = -len(raw) % _ALIGN
+        if padding:
+            parts.append(b'\0' * padding)
+        offset += len(raw) + padding
+        return entry
+
+    for name, col in columns.items():
+        buffers = {}
+        if col.kind == 'str':
+            buffers['offsets'] = add(col.offsets, 'int64')
+            buffers['blob'] = add(col.blob, None)
+        else:
+            buffers['data'] = add(col.data, col.kind)
+        if col.valid is not None:
+            buffers['valid'] = add(col.valid, 'bool')
+        layout.append((name, col.kind, buffers))
+    return layout, parts, offset
+
+
+def decode_page(body, flatten=False, shared_memory=False):
+    """
+    Worker task: decode one page body, flatten it (table pages) and pack its columns.
+
+    Returns (num_rows, layout, payload), where payload is the packed bytes or, with
+    shared_memory=True, the name of a SharedMemory block the caller must unlink.
+    """
+    rows = json.loads(body) if body else []
+    if not isinstance(rows, list):
+        rows = []
+    if flatten:
+        from shared_helper import flatten_table_rows
+        rows = flatten_table_rows(rows)
+    layout, parts, size = _pack(_columnarize(rows))
+    if not shared_memory:
+        return len(rows), layout, b''.join(parts)
+    from multiprocessing.shared_memory import SharedMemory
+    block = SharedMemory(create=True, size=max(size, 1))
+    offset = 0
+    for part in parts:
+        block.buf[offset:offset + len(part)] = part
+        offset += len(part)
+    name = block.name
+    block.close()
+    return len(rows), layout, name
+
+
+def unpack_page(num_rows, layout, payload):
+    """ColumnarTable from decode_page's result (copies out of and unlinks a shared memory block)."""
+    block = None
+    if isinstance(payload, str):
+        from multiprocessing.shared_memory import SharedMemory
+        block = SharedMemory(name=payload)
+        buf = block.buf
+    else:
+        buf = memoryview(payload)
+    try:
+        columns = {}
+        for name, kind, buffers in layout:
+            arrays = {}
+            for part, (offset, nbytes, dtype) in buffers.items():
+                if dtype is None:
+                    arrays[part] = bytes(buf[offset:offset + nbytes])
+                else:
+                    arrays[part] = np.frombuffer(buf, dtype=dtype, count=nbytes // np.dtype(dtype).itemsize,
+                                                 offset=offset).copy()
+            if kind == 'str':
+                columns[name] = StringColumn(arrays['offsets'], arrays['blob'], arrays.get('valid'))
+            else:
+                columns[name] = Column(kind, arrays['data'], arrays.get('valid'))
+        return ColumnarTable(columns, num_rows)
+    finally:
+        if block is not None:
+            del buf
+            block.close()
+            block.unlink()
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class DecodePipeline:
+    """Fetch raw pages on I/O threads and decode/flatten/columnarize them on a process pool."""
+
+    def __init__(self, api, processes=None, io_concurrency=4, shared_memory=None):
+        _require_numpy()
+        if not hasattr(api, 'getTableDataRaw'):
+            raise RuntimeError("The decode pipeline needs the REST backend (SimioAPI); pysimio only returns parsed JSON.")
+        self.api = api
+        self.processes = processes or os.cpu_count() or 1
+        self.io_concurrency = io_concurrency
+        # Windows frees a shared memory block when its last handle closes, before the parent could attach
+        self.shared_memory = (os.name == 'posix') if shared_memory is None else shared_memory
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            if self.shared_memory:
+                # Workers must share the parent's resource tracker, or their own would try to
+                # clean up the blocks the parent has already unlinked
+                from multiprocessing import resource_tracker
+                resource_tracker.ensure_running()
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        return self._pool
+
+    def iter_pages(self, method_name, page_size, flatten, **kwargs):
+        """Yield (page_number, ColumnarTable) in page order for a raw paged endpoint."""
+        pool = self._executor()
+        window = deque()
+        start = time.perf_counter()
+        pages = rows = 0
+        try:
+            for page, body in iter_raw_pages(self.api, method_name, page_size, self.io_concurrency, **kwargs):
+                window.append((page, pool.submit(decode_page, body, flatten, self.shared_memory)))
+                while len(window) >= self.processes * PAGES_PER_PROCESS:
+                    page_done, future = window.popleft()
+                    batch = unpack_page(*future.result())
+                    pages += 1
+                    rows += batch.num_rows
+                    yield page_done, batch
+            while window:
+                page_done, future = window.popleft()
+                batch = unpack_page(*future.result())
+                pages += 1
+                rows += batch.num_rows
+                yield page_done, batch
+        finally:
+            for _, future in window:
+                # Pages decoded but never collected still own a shared memory block
+                if not future.cancel() and self.shared_memory:
+                    try:
+                        unpack_page(*future.result())
+                    except Exception:
+                        pass
+            metrics.record_paged_fetch(f"{method_name}[pipeline]", pages, rows, time.perf_counter() - start)
+
+    def iter_table(self, run_id, scenario_name, table_name, page_size=500, **kwargs):
+        """One flattened ColumnarTable per getTableData page (kwargs: filter, columns)."""
+        for _, batch in self.iter_pages('getTableDataRaw', page_size, True, runId=run_id,
+                                        scenarioName=scenario_name, tableName=table_name, **kwargs):
+            yield batch
+
+    def iter_log(self, run_id, log_name, page_size=500):
+        """One ColumnarTable per page of a log (log_name as in shared_helper.LOG_ENDPOINTS, e.g. 'task')."""
+        for _, batch in self.iter_pages('getScenariosLogDataRaw', page_size, False, runId=run_id,
+                                        logType=f"{log_name}-log"):
+            yield batch
+
+    def table(self, run_id, scenario_name, table_name, page_size=500, **kwargs):
+        """The whole table as one flattened ColumnarTable."""
+        return ColumnarTable.concat(list(self.iter_table(run_id, scenario_name, table_name, page_size, **kwargs)))
+
+    def log(self, run_id, log_name, page_size=500):
+        """The whole log as one ColumnarTable."""
+        return ColumnarTable.concat(list(self.iter_log(run_id, log_name, page_size)))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
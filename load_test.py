@@ -0,0 +1,332 @@
+# load_test.py
+"""
+Load generator: many concurrent client sessions running the main.py flow.
+
+Each simulated session uses its own SimioAPI client (and token) and runs one of
+these scenarios, chosen at random by the configured mix:
+
+    full   authenticate, find the model, create a run, set a control value and the
+           time options, start it, poll until it finishes, dump a table, delete the run
+    dump   authenticate and page through a table of an existing run
+    poll   authenticate and read the progress of an existing run a few times
+
+with an exponentially distributed think time between steps. Concurrency ramps
+through the given levels; each stage keeps that many sessions running for the
+stage duration and reports sessions/s, requests/s, rows/s, latency percentiles per
+step, the error rate and the client's own CPU use (to tell a saturated client from
+a saturated portal):
+
+    python load_test.py --mock --concurrency 1 4 16 64 --stage-seconds 30 --mix full=1,dump=3,poll=2
+    python load_test.py --project PortalDemoModel --run-id 812 --scenario Plan --table Orders --concurrency 2 4 8
+
+Without --mock the portal from SIMIO_PORTAL_URL / PERSONAL_ACCESS_TOKEN is used, and
+"full" sessions create, run and delete real plans.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from api_metrics import percentile
+from shared_helper import TERMINAL_STATUSES
+
+SCENARIOS = ('full', 'dump', 'poll')
+
+
+class StageStats:
+    """Thread-safe step latencies, errors and row counts for one concurrency stage."""
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self.latencies = {}       # step -> [seconds]
+        self.errors = {}          # step -> count
+        self.sessions = {}        # scenario -> completed sessions
+        self.failed_sessions = 0
+        self.timed_out_sessions = 0   # 'full' sessions whose run outlasted --session-timeout
+        self.rows = 0
+
+    def record(self, step, seconds, ok=True):
+        with self._lock:
+            self.latencies.setdefault(step, []).append(seconds)
+            if not ok:
+                self.errors[step] = self.errors.get(step, 0) + 1
+
+    def add_rows(self, n):
+        with self._lock:
+            self.rows += n
+
+    def session_timed_out(self):
+        with self._lock:
+            self.timed_out_sessions += 1
+
+    def session_done(self, scenario, ok):
+        with self._lock:
+            if ok:
+                self.sessions[scenario] = self.sessions.get(scenario, 0) + 1
+            else:
+                self.failed_sessions += 1
+
+    def summary(self, wall_s, cpu_s):
+        requests = sum(len(v) for v in self.latencies.values())
+        errors = sum(self.errors.values())
+        completed = sum(self.sessions.values())
+        steps = {}
+        for step, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            steps[step] = {'calls': len(values), 'errors': self.errors.get(step, 0),
+                           'p50': percentile(ordered, 50), 'p95': percentile(ordered, 95),
+                           'p99': percentile(ordered, 99)}
+        return {
+            'concurrency': self.concurrency, 'wall_s': wall_s,
+            'sessions': dict(self.sessions), 'failed_sessions': self.failed_sessions,
+            'timed_out_sessions': self.timed_out_sessions,
+            'sessions_per_s': completed / wall_s if wall_s else 0.0,
+            'requests_per_s': requests / wall_s if wall_s else 0.0,
+            'rows_per_s': self.rows / wall_s if wall_s else 0.0,
+            'error_rate': errors / requests if requests else 0.0,
+            'client_cpu_pct': 100.0 * cpu_s / wall_s if wall_s else 0.0,
+            'steps': steps,
+        }
+
+
+class _StepFailed(Exception):
+    pass
+
+
+class Session:
+    """One simulated client session."""
+
+    def __init__(self, config, stats, rng):
+        from simio_api_helper import SimioAPI, TimeOptions
+
+        self.config = config
+        self.stats = stats
+        self.rng = rng
+        self.api = SimioAPI(config.url)
+        self.TimeOptions = TimeOptions
+
+    def think(self):
+        if self.config.think_ms > 0:
+            time.sleep(self.rng.expovariate(1000.0 / self.config.think_ms))
+
+    def step(self, name, fn, *args, **kwargs):
+        """Run one API call, timing it; raises _StepFailed on an exception or an empty result."""
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+            ok = result is not None and result is not False
+        except Exception:
+            result, ok = None, False
+        self.stats.record(name, time.perf_counter() - start, ok)
+        if not ok:
+            raise _StepFailed(name)
+        return result
+
+    def dump(self, run_id, scenario_name):
+        page = 1
+        while True:
+            rows = self.step('getTableData', self.api.getTableData, runId=run_id, scenarioName=scenario_name,
+                             tableName=self.config.table, page=page, pageSize=self.config.page_size)
+            if not isinstance(rows, list) or not rows:
+                return
+            self.stats.add_rows(len(rows))
+            if len(rows) < self.config.page_size:
+                return
+            page += 1
+
+    def run(self, scenario):
+        config = self.config
+        run_id = None
+        deadline = time.monotonic() + config.session_timeout
+        try:
+            self.step('authenticate', lambda: self.api.authenticate(personalAccessToken=config.token)
+                      or self.api.authToken)
+            self.think()
+            if scenario == 'dump':
+                self.dump(config.run_id, config.scenario)
+            elif scenario == 'poll':
+                for _ in range(config.polls):
+                    self.step('getRunProgress', self.api.getRunProgress, config.run_id)
+                    self.think()
+            else:
+                models = self.step('getModels', self.api.getModels)
+                model_id = next((m['id'] for m in models if m.get('projectName') == config.project), None)
+                if model_id is None:
+                    raise _StepFailed('getModels')
+                self.think()
+                plan_name = f"load-{uuid.uuid4().hex[:8]}"
+                run_id = self.step('createRun', self.api.createRun, model_id, plan_name)
+                self.think()
+                if config.control:
+                    self.step('setControlValues', self.api.setControlValues, run_id, plan_name, *config.control)
+                self.step('setRunTimeOptions', self.api.setRunTimeOptions,
+                          self.TimeOptions(runId=run_id, isSpecificStartTime=False, isSpecificEndTime=False))
+                self.think()
+                self.step('startRunFromExisting', self.api.startRunFromExisting, run_id, runReplications=False)
+                while True:
+                    progress = self.step('getRunProgress', self.api.getRunProgress, run_id)
+                    if progress.get('status') in TERMINAL_STATUSES:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats.session_timed_out()
+                        raise _StepFailed('run')
+                    time.sleep(min(config.poll_interval, remaining))
+                if progress.get('status') != 'Complete':
+                    raise _StepFailed('run')
+                self.think()
+                self.dump(run_id, plan_name)
+            ok = True
+        except _StepFailed:
+            ok = False
+        finally:
+            if run_id:
+                try:
+                    self.step('deleteRun', self.api.deleteRun, run_id)
+                except _StepFailed:
+                    pass
+        self.stats.session_done(scenario, ok)
+        return ok
+
+
+def parse_mix(text):
+    """'full=1,dump=3' -> [(scenario, weight)]."""
+    mix = []
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (expected one of {', '.join(SCENARIOS)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def run_stage(config, concurrency, mix, seed):
+    """Keep concurrency sessions running for stage_seconds; returns the stage summary."""
+    stats = StageStats(concurrency)
+    deadline = time.monotonic() + config.stage_seconds
+    names = [m[0] for m in mix]
+    weights = [m[1] for m in mix]
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        while time.monotonic() < deadline:
+            Session(config, stats, rng).run(rng.choices(names, weights)[0])
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    wall, cpu = time.perf_counter(), time.process_time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return stats.summary(time.perf_counter() - wall, time.process_time() - cpu)
+
+
+def _ms(value):
+    return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+
+def print_stage(summary):
+    print(f"\n  Concurrency {summary['concurrency']}  |  {summary['wall_s']:.1f} s  |  "
+          f"{summary['sessions_per_s']:.2f} sessions/s  {summary['requests_per_s']:.1f} req/s  "
+          f"{summary['rows_per_s']:,.0f} rows/s  |  errors {summary['error_rate'] * 100:.2f}%  |  "
+          f"client CPU {summary['client_cpu_pct']:.0f}%")
+    if summary['timed_out_sessions']:
+        print(f"  {summary['timed_out_sessions']} session(s) gave up waiting for their run (--session-timeout)")
+    print(f"  {'─' * 60}")
+    print(f"    {'Step':<24} {'Calls':>7} {'Err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for step, s in summary['steps'].items():
+        print(f"    {step:<24} {s['calls']:>7} {s['errors']:>5} {_ms(s['p50'])} {_ms(s['p95'])} {_ms(s['p99'])}")
+
+
+def print_ramp(summaries):
+    """One line per stage, to read off where throughput stops scaling."""
+    print("\n" + "=" * 80)
+    print("  LOAD TEST RAMP")
+    print("=" * 80)
+    print(f"  {'Sessions':>8} {'sess/s':>8} {'req/s':>8} {'rows/s':>10} {'p95 ms':>8} {'p99 ms':>8} {'err %':>6} {'CPU %':>6}")
+    print(f"  {'─' * 60}")
+    for s in summaries:
+        all_p = [v for v in s['steps'].values() if v['p95'] is not None]
+        p95 = max((v['p95'] for v in all_p), default=None)
+        p99 = max((v['p99'] for v in all_p), default=None)
+        print(f"  {s['concurrency']:>8} {s['sessions_per_s']:>8.2f} {s['requests_per_s']:>8.1f} "
+              f"{s['rows_per_s']:>10,.0f} {_ms(p95)} {_ms(p99)} {s['error_rate'] * 100:>6.2f} "
+              f"{s['client_cpu_pct']:>6.0f}")
+    print("  (p95/p99: slowest step)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent client session load test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="concurrent sessions for each ramp stage")
+    parser.add_argument("--stage-seconds", type=float, default=20.0, help="how long each stage starts new sessions")
+    parser.add_argument("--mix", default="full=1,dump=2,poll=2", help="scenario weights, e.g. full=1,dump=3,poll=2")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="mean think time between steps")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between progress polls")
+    parser.add_argument("--polls", type=int, default=5, help="progress reads per 'poll' session")
+    parser.add_argument("--session-timeout", type=float, default=600.0,
+                        help="seconds a 'full' session may wait for its run before it counts as failed")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--project", help="project whose model 'full' sessions run (default: the mock's)")
+    parser.add_argument("--run-id", type=int, help="existing run for 'dump'/'poll' sessions (default: mock run 1)")
+    parser.add_argument("--scenario", default="Plan", help="scenario of --run-id")
+    parser.add_argument("--table", default="Orders", help="table that sessions dump")
+    parser.add_argument("--control", nargs=2, metavar=("NAME", "VALUE"), help="control value 'full' sessions set")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="also write the stage summaries to this JSON file")
+    mock = parser.add_argument_group("local mock portal")
+    mock.add_argument("--mock", action="store_true", help="run against mock_portal.py in a child process")
+    mock.add_argument("--mock-rows", type=int, default=5000)
+    mock.add_argument("--mock-latency-ms", type=float, default=10.0)
+    mock.add_argument("--mock-run-seconds", type=float, default=5.0)
+    mock.add_argument("--mock-error-rate", type=float, default=0.0)
+    config = parser.parse_args()
+    mix = parse_mix(config.mix)
+
+    def run_all():
+        summaries = []
+        for i, concurrency in enumerate(config.concurrency):
+            summary = run_stage(config, concurrency, mix, config.seed + i)
+            print_stage(summary)
+            summaries.append(summary)
+        print_ramp(summaries)
+        if config.json_path:
+            with open(config.json_path, "w") as f:
+                json.dump({'config': {k: v for k, v in vars(config).items() if k != 'token'},
+                           'stages': summaries}, f, indent=2)
+        return 0
+
+    if config.mock:
+        from mock_portal import MockPortalConfig, serve_in_subprocess
+
+        config.token = "load-test"
+        config.project = config.project or MockPortalConfig.project_name
+        config.run_id = config.run_id or 1
+        config.control = config.control or ("EntitiesToCreate", "5")
+        with serve_in_subprocess(rows=config.mock_rows, latency_ms=config.mock_latency_ms,
+                                 run_seconds=config.mock_run_seconds, error_rate=config.mock_error_rate) as url:
+            config.url = url
+            return run_all()
+
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    config.url = os.getenv("SIMIO_PORTAL_URL")
+    config.token = os.getenv("PERSONAL_ACCESS_TOKEN")
+    if not config.url or not config.token:
+        raise ValueError("SIMIO_PORTAL_URL and PERSONAL_ACCESS_TOKEN must be set (or use --mock).")
+    needs = {'full': config.project, 'dump': config.run_id, 'poll': config.run_id}
+    missing = [name for name, _ in mix if not needs[name]]
+    if missing:
+        raise ValueError(f"Scenario(s) {', '.join(missing)} need --project (full) or --run-id (dump, poll).")
+    return run_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
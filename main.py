@@ -1,14 +1,15 @@
 # main.py
 """
-Main script to interact with the Simio Portal Web API using the pysimio package.
+Main script to interact with the Simio Portal Web API.
+Uses the pysimio package or the direct REST client (SimioAPI), selected by USE_PYSIMIO in .env.
 """
-from helper import *
-from pysimio import pySimio
+from shared_helper import *
 from dotenv import load_dotenv
 import os
 import threading
-from pysimio.classes import TimeOptions
 import logging
+from task_graph import TaskGraph
+from profiling import profile_phase, profiled
 
 # Load environment variables
 load_dotenv(override=True)
@@ -24,6 +25,7 @@ UseSpecificStartTime = True
 UseSpecificEndTime = True
 plan_start_datetime = '2025-12-13T03:14:00Z'
 plan_end_dateTime = '2025-12-20T03:14:00Z'
+control_values_file = None      # Optional JSON/YAML file of {control name: value} applied without prompting
 
 # Post-run output toggles
 show_table_schema = True        # Display table schema after run completes
@@ -32,86 +34,151 @@ show_log_schema = True          # Display log schema after run completes
 show_sample_log_data = True     # Display sample log data (first non-empty log, top 10 rows)
 show_table_summary = True       # Prompt user to pick a table for full paged dump
 summary_page_size = 100         # Rows per API page when fetching full table
-
-# Ensure token is loaded
-if not personal_access_token:
-    raise ValueError("Personal access token not found. Make sure it's set in the environment.")
-
-# API Initialization getting bearer token for authorization
-api = pySimio(simio_portal_url)
-api.authenticate(personalAccessToken=personal_access_token)
-
-# Start token refresh in a background thread
-threading.Thread(target=refresh_auth_token, args=(api, auth_refresh_time), daemon=True).start()
-
-# Get Model ID
-models_json = api.getModels()
-#print(json.dumps(models_json, indent=4))
-model_id = find_modelid_by_projectname(models_json, project_name)
-print(f"The model_id for project '{project_name}' is {model_id}")
-
-# Find existing run matching plan_name in scenarioNames for this model
-all_runs_json = api.getRuns(modelId=model_id)
-#print(json.dumps(all_runs_json, indent=4))
-
-existing_run_id = 0
-for run in all_runs_json:
-    if plan_name in run.get('scenarioNames', []):
-        existing_run_id = run.get('id', 0)
-        break
-
-print(f"The existing run_id for plan '{plan_name}' for project '{project_name}' is {existing_run_id}")
-
-# If a plan exists (existing_run_id > 0), delete the existing plan by run_id, otherwise proceed to run creation
-if existing_run_id > 0:
-    print(f"The existing parent run_id {existing_run_id} for plan '{plan_name}' for project '{project_name}' will be deleted.")
-    api.deleteRun(existing_run_id)  # Pass the run_id to delete the correct run
-    print(f"The existing parent run_id {existing_run_id} for plan '{plan_name}' for project '{project_name}' was deleted. All additional related child run_ids are deleted too.")
-else:
-    print(f"No existing plan '{plan_name}' found for project '{project_name}', proceeding to create a new run.")
-
-# Create a new Plan and return the run_id as new_run_id
-new_run_id = api.createRun(model_id, plan_name)
-if not new_run_id:
-    print(f"Failed to create plan '{plan_name}' for project '{project_name}'. Check that the authenticated user is the model owner or an experimenter.")
-    exit(1)
-print(f"The new parent run_id for '{plan_name}' is {new_run_id} was created successfully")
-
-# Display control values and let the user adjust any before running
-display_and_update_control_values(api, new_run_id, plan_name)
-
-# Adjust the start date/time
-run_time_options = TimeOptions(runId=new_run_id, isSpecificStartTime=UseSpecificStartTime, specificStartingTime=plan_start_datetime,
-                               isSpecificEndTime=UseSpecificEndTime, specificEndingTime=plan_end_dateTime)
-api.setRunTimeOptions(run_time_options)
-print(f"The control value for run_id {new_run_id} and plan name '{plan_name}' was updated to start at {plan_start_datetime} and end at {plan_end_dateTime}")
-
-# Start new_run_id plan, set runReplications to True for Risk Analysis
-new_run_id_start_response = api.startRunFromExisting(existingExperimentRunId=new_run_id,runPlan=True,runReplications=False)
-print(f"The plan '{plan_name}' for '{project_name}' was started.")
-
-# Display initial run progress, then poll until complete/failed/canceled
-status = display_and_poll_run_progress(api, new_run_id, plan_name, run_status_refresh_time)
-
-if status in ("Failed", "Canceled"):
-    print(f"\nSkipping table/log retrieval — run ended with status: {status}")
-    exit(1)
-
-# Suppress pysimio internal logger tracebacks for 204 responses
-logging.getLogger('pysimio.api').setLevel(logging.CRITICAL)
-
-# Post-run output based on toggles
-if show_table_schema:
-    table_names = display_table_schema(api, model_id, new_run_id)
-if show_sample_table_data:
-    if not show_table_schema:
-        table_names = display_table_schema(api, model_id, new_run_id)
-    display_sample_table_data(api, new_run_id, plan_name, table_names)
-if show_log_schema:
-    display_log_schema(api, new_run_id)
-if show_sample_log_data:
-    display_sample_log_data(api, new_run_id)
-if show_table_summary:
-    selected_table = prompt_table_selection(api, model_id, new_run_id)
-    if selected_table:
-        display_full_table(api, new_run_id, plan_name, selected_table, summary_page_size)
+show_timeline = True            # Print the task timeline (critical path) after the workflow
+max_parallel_tasks = 4          # Independent API calls that may run at the same time
+
+
+class WorkflowError(RuntimeError):
+    """A workflow step failed in a way that ends the run with exit code 1."""
+
+
+def run_workflow(api, TimeOptions, project_name=project_name, plan_name=plan_name, control_values_file=control_values_file):
+    """Run the full plan workflow (reset, configure, start, poll, post-run output). Returns the process exit code."""
+    catalog = PortalCatalog(api)
+    context = RunContext(api)  # scenarios/schemas fetched once and shared by the tasks and display helpers
+    need_table_schema = show_table_schema or show_sample_table_data or show_table_summary
+
+    # Workflow tasks. Each one starts as soon as the tasks it depends on have finished,
+    # so independent calls (e.g. table schema prefetch, time options) overlap with the critical path.
+    def authenticate():
+        api.authenticate(personalAccessToken=personal_access_token)
+        # Start token refresh in a background thread
+        threading.Thread(target=refresh_auth_token, args=(api, auth_refresh_time), daemon=True).start()
+
+    def get_model_id(_):
+        # Get Model ID (the catalog indexes getModels/getRuns once for O(1) lookups)
+        catalog.load_models()
+        model_id = find_modelid_by_projectname(catalog, project_name)
+        context.bind(model_id=model_id)
+        print(f"The model_id for project '{project_name}' is {model_id}")
+        return model_id
+
+    def find_existing_run(model_id):
+        # Find existing run matching plan_name in scenarioNames for this model
+        catalog.load_runs(model_id=model_id)
+        existing_run_ids = catalog.run_ids_for_scenario(plan_name, model_id)
+        existing_run_id = existing_run_ids[0] if existing_run_ids else 0
+        print(f"The existing run_id for plan '{plan_name}' for project '{project_name}' is {existing_run_id}")
+        return existing_run_id
+
+    def delete_existing_run(existing_run_id):
+        # If a plan exists (existing_run_id > 0), delete the existing plan by run_id, otherwise proceed to run creation
+        if existing_run_id > 0:
+            print(f"The existing parent run_id {existing_run_id} for plan '{plan_name}' for project '{project_name}' will be deleted.")
+            api.deleteRun(existing_run_id)  # Pass the run_id to delete the correct run
+            catalog.remove_run(existing_run_id)
+            print(f"The existing parent run_id {existing_run_id} for plan '{plan_name}' for project '{project_name}' was deleted. All additional related child run_ids are deleted too.")
+        else:
+            print(f"No existing plan '{plan_name}' found for project '{project_name}', proceeding to create a new run.")
+
+    def create_run(model_id, _):
+        # Create a new Plan and return the run_id as new_run_id
+        new_run_id = api.createRun(model_id, plan_name)
+        if not new_run_id:
+            raise WorkflowError(f"Failed to create plan '{plan_name}' for project '{project_name}'. Check that the authenticated user is the model owner or an experimenter.")
+        print(f"The new parent run_id for '{plan_name}' is {new_run_id} was created successfully")
+        catalog.add_run({'id': new_run_id, 'name': plan_name, 'scenarioNames': [plan_name]}, model_id=model_id)
+        context.bind(run_id=new_run_id)
+        return new_run_id
+
+    def edit_control_values(new_run_id):
+        # Display control values and let the user adjust any before running (or apply them from control_values_file)
+        display_and_update_control_values(api, new_run_id, plan_name, values_file=control_values_file, context=context)
+
+    def set_time_options(new_run_id):
+        # Adjust the start date/time
+        run_time_options = TimeOptions(runId=new_run_id, isSpecificStartTime=UseSpecificStartTime, specificStartingTime=plan_start_datetime,
+                                       isSpecificEndTime=UseSpecificEndTime, specificEndingTime=plan_end_dateTime)
+        api.setRunTimeOptions(run_time_options)
+
+    def start_run(new_run_id, _controls, _time_options):
+        # Reported here rather than in set_time_options, which runs while the control value prompt is open
+        print(f"The control value for run_id {new_run_id} and plan name '{plan_name}' was updated to start at {plan_start_datetime} and end at {plan_end_dateTime}")
+        # Start new_run_id plan, set runReplications to True for Risk Analysis
+        api.startRunFromExisting(existingExperimentRunId=new_run_id, runPlan=True, runReplications=False)
+        print(f"The plan '{plan_name}' for '{project_name}' was started.")
+
+    def poll_run(new_run_id, _):
+        # Display initial run progress, then poll until complete/failed/canceled
+        return display_and_poll_run_progress(api, new_run_id, plan_name, run_status_refresh_time)
+
+    workflow = TaskGraph(max_workers=max_parallel_tasks)
+    workflow.add("authenticate", profiled("auth", authenticate))
+    workflow.add("model_id", profiled("model_lookup", get_model_id), deps=["authenticate"])
+    workflow.add("find_existing_run", profiled("run_reset.find", find_existing_run), deps=["model_id"])
+    workflow.add("delete_existing_run", profiled("run_reset.delete", delete_existing_run), deps=["find_existing_run"])
+    workflow.add("create_run", profiled("run_create", create_run), deps=["model_id", "delete_existing_run"])
+    workflow.add("edit_control_values", profiled("control_edit", edit_control_values), deps=["create_run"])
+    workflow.add("set_time_options", profiled("time_options", set_time_options), deps=["create_run"])
+    workflow.add("start_run", profiled("run_start", start_run), deps=["create_run", "edit_control_values", "set_time_options"])
+    workflow.add("poll_run", profiled("polling", poll_run), deps=["create_run", "start_run"])
+    # Prefetch post-run schemas (optional: a failure only means they are fetched later). The table schema
+    # is fetched while the plan runs; log schemas only exist once the run has finished.
+    if need_table_schema:
+        workflow.add("prefetch_table_schema", profiled("table_schema_prefetch", lambda _: context.table_schema()), deps=["model_id"], optional=True)
+    if show_log_schema:
+        workflow.add("prefetch_log_schema",
+                     profiled("log_schema_prefetch",
+                              lambda status: context.log_schema() if status not in ("Failed", "Canceled") else None),
+                     deps=["poll_run"], optional=True)
+
+    try:
+        results = workflow.run()
+    except WorkflowError as e:
+        print(e)
+        return 1
+    if show_timeline:
+        workflow.print_timeline("Workflow Timeline")
+
+    model_id = results["model_id"]
+    new_run_id = results["create_run"]
+    status = results["poll_run"]
+
+    if status in ("Failed", "Canceled"):
+        print(f"\nSkipping table/log retrieval — run ended with status: {status}")
+        return 1
+
+    # Suppress pysimio internal logger tracebacks for 204 responses
+    logging.getLogger('pysimio.api').setLevel(logging.CRITICAL)
+
+    # Post-run output based on toggles
+    if show_table_schema:
+        with profile_phase("schema_display"):
+            table_names = display_table_schema(api, model_id, new_run_id, context=context)
+    if show_sample_table_data:
+        with profile_phase("table_sampling"):
+            if not show_table_schema:
+                table_names = display_table_schema(api, model_id, new_run_id, context=context)
+            display_sample_table_data(api, new_run_id, plan_name, table_names)
+    if show_log_schema:
+        with profile_phase("log_schema_display"):
+            display_log_schema(api, new_run_id, context=context)
+    if show_sample_log_data:
+        with profile_phase("log_sampling"):
+            display_sample_log_data(api, new_run_id)
+    if show_table_summary:
+        selected_table = prompt_table_selection(api, model_id, new_run_id, context=context)
+        if selected_table:
+            with profile_phase("table_dump"):
+                display_full_table(api, new_run_id, plan_name, selected_table, summary_page_size)
+    return 0
+
+
+if __name__ == "__main__":
+    # Ensure token is loaded
+    if not personal_access_token:
+        raise ValueError("Personal access token not found. Make sure it's set in the environment.")
+
+    # API Initialization for the backend selected by USE_PYSIMIO (authentication happens in the first workflow task)
+    api_class, time_options_class = load_backend()
+    exit(run_workflow(api_class(simio_portal_url), time_options_class))
@@ -0,0 +1,590 @@
+# mock_portal.py
+"""
+Local stand-in for the Simio Portal Web API, for offline development and benchmarking.
+
+Serves every endpoint SimioAPI uses (auth, models, runs, progress, scenarios,
+control values, time options, table data with paging/filter/columns, log schemas
+and the five log-data endpoints) from deterministic generated data:
+
+    python mock_portal.py --port 8765 --rows 100000 --latency-ms 20
+    SIMIO_PORTAL_URL=http://127.0.0.1:8765 USE_PYSIMIO=False python cli.py dump-table 1 Plan Orders
+
+or in-process:
+
+    with MockPortal(MockPortalConfig(table_rows=50_000)) as portal:
+        api = SimioAPI(portal.url)
+        api.authenticate(personalAccessToken="anything")
+
+Rows are generated from (seed, table, row number) on demand, so large tables cost
+no memory. Latency, error rate, token lifetime (expired tokens get 401, which
+exercises SimioAPI's re-authentication) and run duration are configurable. With
+spfx_path the table schemas and controls come from a Simio project file
+(see spfx_schema); otherwise a small Orders/Materials/Resources model is used.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from odata_filter import parse_datetime, parse_filter
+
+DEFAULT_TABLES = [
+    {'name': 'Resources',
+     'columnSchemas': [{'name': 'ResourceName', 'isKey': True, 'type': 'String'},
+                       {'name': 'Capacity', 'type': 'Integer'},
+                       {'name': 'CostPerHour', 'type': 'Real'}],
+     'stateSchemas': []},
+    {'name': 'Materials',
+     'columnSchemas': [{'name': 'MaterialName', 'isKey': True, 'type': 'String'},
+                       {'name': 'Cost', 'type': 'Real'},
+                       {'name': 'Resource', 'type': 'String',
+                        'foreignKeyInfo': {'toTableName': 'Resources', 'toColumnName': 'ResourceName'}}],
+     'stateSchemas': []},
+    {'name': 'Orders',
+     'columnSchemas': [{'name': 'OrderId', 'isKey': True, 'type': 'String'},
+                       {'name': 'MaterialName', 'type': 'String',
+                        'foreignKeyInfo': {'toTableName': 'Materials', 'toColumnName': 'MaterialName'}},
+                       {'name': 'Quantity', 'type': 'Integer'},
+                       {'name': 'DueDate', 'type': 'DateTime'},
+                       {'name': 'Status', 'type': 'String'}],
+     'stateSchemas': [{'name': 'CompletedQuantity', 'type': 'Real'},
+                      {'name': 'ShipDate', 'type': 'DateTime'}]},
+]
+DEFAULT_CONTROLS = [{'name': 'EntitiesToCreate', 'type': 'Integer', 'defaultValue': '10'},
+                    {'name': 'ShiftLength', 'type': 'Real', 'defaultValue': '8'}]
+
+# log type in the URL -> (schema logName, [(column, type)])
+LOGS = {
+    'resource-usage-log': ('ResourceUsageLog', [('ResourceName', 'String'), ('OwnerName', 'String'),
+                                                ('StartDateTime', 'DateTime'), ('EndDateTime', 'DateTime'),
+                                                ('Quantity', 'Real')]),
+    'resource-state-log': ('ResourceStateLog', [('ResourceName', 'String'), ('StartDateTime', 'DateTime'),
+                                                ('EndDateTime', 'DateTime'), ('State', 'String')]),
+    'resource-capacity-log': ('ResourceCapacityLog', [('ResourceName', 'String'), ('StartDateTime', 'DateTime'),
+                                                      ('EndDateTime', 'DateTime'), ('Capacity', 'Real')]),
+    'task-log': ('TaskLog', [('ResourceName', 'String'), ('TaskName', 'String'), ('StartDateTime', 'DateTime'),
+                             ('EndDateTime', 'DateTime')]),
+    'constraint-log': ('ConstraintLog', [('ResourceName', 'String'), ('ConstraintType', 'String'),
+                                         ('StartDateTime', 'DateTime'), ('EndDateTime', 'DateTime')]),
+}
+RESOURCE_STATES = ('Busy', 'Busy', 'Busy', 'Idle', 'Idle', 'OffShift')
+ORDER_STATUSES = ('Open', 'Late', 'Complete')
+
+
+@dataclass
+class MockPortalConfig:
+    """Data volume and behaviour of the mock portal."""
+    table_rows: int = 1000                # rows per table (tables named in table_row_counts override)
+    table_row_counts: dict = field(default_factory=dict)
+    log_rows: int = 1000                  # rows per log
+    resources: int = 10
+    latency_ms: float = 0.0               # added to every request
+    latency_jitter_ms: float = 0.0
+    latency_per_row_us: float = 0.0       # added per row returned by data endpoints
+    error_rate: float = 0.0               # fraction of API requests answered with 500
+    token_ttl: Optional[float] = None     # seconds until a token expires (then 401); None = never
+    run_seconds: float = 2.0              # wall time from start to Complete
+    seed: int = 1
+    spfx_path: Optional[str] = None
+    project_name: str = 'PortalDemoModel'
+    start_date: str = '2025-01-20T00:00:00'
+
+
+class MockPortal:
+    """The mock portal's state plus an HTTP server thread serving it."""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockPortalConfig()
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._next_run_id = 1000
+        self.request_counts = {}
+        self.tables = DEFAULT_TABLES
+        self.controls = DEFAULT_CONTROLS
+        start_date = self.config.start_date
+        if self.config.spfx_path:
+            from spfx_schema import read_spfx_schema
+
+            schema = read_spfx_schema(self.config.spfx_path)
+            self.tables = schema['tables'] or DEFAULT_TABLES
+            self.controls = schema['controls'] or DEFAULT_CONTROLS
+            start_date = (schema.get('run_setup') or {}).get('startDate') or start_date
+        self._tables_by_name = {t['name']: t for t in self.tables}
+        self._base_time = parse_datetime(start_date) or datetime.datetime(2025, 1, 1)
+        self.models = [{'id': 1, 'name': 'Model', 'projectName': self.config.project_name, 'projectId': 1,
+                        'experimentId': 1}]
+        self.runs = {}
+        self._add_run(1, 'Plan', started=time.time() - self.config.run_seconds)
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    # -- Server lifecycle ---------------------------------------------------
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-portal", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -- Runs ---------------------------------------------------------------
+
+    def _add_run(self, run_id, name, started=None):
+        self.runs[run_id] = {
+            'id': run_id, 'name': name, 'modelId': 1, 'experimentId': 1,
+            'projectName': self.config.project_name, 'scenarioNames': [name],
+            'controls': {c['name']: c.get('defaultValue') for c in self.controls},
+            'started': started, 'timeOptions': {},
+        }
+
+    def create_run(self, name):
+        with self._lock:
+            run_id = self._next_run_id
+            self._next_run_id += 1
+            self._add_run(run_id, name)
+        return run_id
+
+    def run_status(self, run):
+        if run['started'] is None:
+            return 'NotStarted', 0.0
+        if run.get('canceled'):
+            return 'Canceled', 1.0
+        fraction = (time.time() - run['started']) / max(self.config.run_seconds, 1e-9)
+        return ('Complete', 1.0) if fraction >= 1 else ('Running', fraction)
+
+    def run_json(self, run):
+        status, _ = self.run_status(run)
+        data = {k: v for k, v in run.items() if k not in ('controls', 'started', 'timeOptions', 'canceled')}
+        data.update(status=status, statusMessage='', additionalRunsStatus=[])
+        return data
+
+    def progress_json(self, run):
+        status, fraction = self.run_status(run)
+        total = 100
+        done = int(fraction * total)
+        finished = True if status == 'Complete' else None
+        return {
+            'id': run['id'], 'name': run['name'], 'status': status, 'runType': 'Plan',
+            'activeStage': 'Export' if status == 'Complete' else 'Run',
+            'submissionTime': self._base_time.isoformat(), 'creatorName': 'mock',
+            'loadModelSucceeded': run['started'] is not None or None,
+            'importProgress': {'completed': 1, 'total': 1, 'isSucceeded': True},
+            'runProgress': {'completed': done, 'total': total, 'isSucceeded': finished},
+            'exportProgress': {'completed': 1 if finished else 0, 'total': 1, 'isSucceeded': finished},
+            'usageSnapshot': {'privateMemorySize': 256 * 1024 * 1024, 'cpuTimeUsed': fraction * 10,
+                              'cpuTimeAvailable': 10},
+        }
+
+    def scenarios_json(self, run):
+        return [{'scenarioName': run['name'], 'experimentRunId': run['id'],
+                 'controlValues': [{'name': k, 'value': v} for k, v in run['controls'].items()],
+                 'activeTableBindings': [{'tableName': t['name'], 'activeBindingName': None,
+                                          'lastTableImport': None} for t in self.tables]}]
+
+    # -- Generated data -----------------------------------------------------
+
+    def row_count(self, table_name):
+        return self.config.table_row_counts.get(table_name, self.config.table_rows)
+
+    def _key_value(self, table_name, i):
+        return f"{table_name[:3].upper()}-{i:06d}"
+
+    def _value(self, table_name, column, i, rng):
+        if column.get('isKey'):
+            return self._key_value(table_name, i)
+        fk = column.get('foreignKeyInfo')
+        if fk and fk['toTableName'] in self._tables_by_name:
+            target = fk['toTableName']
+            return self._key_value(target, rng.randrange(max(1, self.row_count(target))))
+        kind = (column.get('type') or 'String').lower()
+        if 'int' in kind:
+            return rng.randint(1, 500)
+        if 'real' in kind or 'double' in kind or 'number' in kind:
+            return round(rng.uniform(0, 1000), 2)
+        if 'date' in kind or 'time' in kind:
+            return (self._base_time + datetime.timedelta(minutes=rng.randrange(14 * 24 * 60))).isoformat()
+        if 'bool' in kind:
+            return rng.random() < 0.5
+        if column['name'] == 'Status':
+            return rng.choice(ORDER_STATUSES)
+        return f"{column['name']}{rng.randrange(100)}"
+
+    def table_row(self, table_name, i):
+        """Row i of a table in the nested properties/states format getTableData returns."""
+        table = self._tables_by_name[table_name]
+        rng = random.Random(f"{self.config.seed}:{table_name}:{i}")
+        return {
+            'properties': [{'name': c['name'], 'value': self._value(table_name, c, i, rng)}
+                           for c in table.get('columnSchemas') or []],
+            'states': [{'name': s['name'], 'value': self._value(table_name, s, i, rng)}
+                       for s in table.get('stateSchemas') or []],
+        }
+
+    def log_row(self, log_type, i, scenario_name):
+        """Row i of a log; each resource's intervals follow one another in 10-minute slots."""
+        rng = random.Random(f"{self.config.seed}:{log_type}:{i}")
+        resource = f"Resource{i % self.config.resources + 1}"
+        slot = i // self.config.resources
+        start = self._base_time + datetime.timedelta(minutes=10 * slot)
+        end = start + datetime.timedelta(minutes=10 if log_type != 'task-log' else rng.randint(2, 10))
+        row = {'ScenarioName': scenario_name, 'ResourceName': resource,
+               'StartDateTime': start.isoformat(), 'EndDateTime': end.isoformat()}
+        if log_type == 'resource-state-log':
+            row['State'] = rng.choice(RESOURCE_STATES)
+        elif log_type == 'resource-usage-log':
+            row['OwnerName'] = f"DefaultEntity.{i}"
+            row['Quantity'] = 1.0
+        elif log_type == 'resource-capacity-log':
+            row['Capacity'] = float(rng.choice((1, 1, 2)))
+        elif log_type == 'task-log':
+            row['TaskName'] = rng.choice(('Setup', 'Process', 'Teardown'))
+        else:
+            row['ConstraintType'] = rng.choice(('Material', 'Resource'))
+        return row
+
+    def log_schemas_json(self, run, log_name=None):
+        logs = [{'logName': name, 'logProperties': [{'name': c, 'type': t} for c, t in
+                                                    [('ScenarioName', 'String')] + columns]}
+                for name, columns in LOGS.values() if log_name in (None, name)]
+        return [{'scenarioName': run['name'], 'experimentRunId': run['id'], 'logSchema': logs}]
+
+    def table_page(self, table_name, page, page_size, filter_text=None, columns=None):
+        if table_name not in self._tables_by_name:
+            return None
+        total = self.row_count(table_name)
+        start = (page - 1) * page_size
+        if filter_text:
+            expr = parse_filter(filter_text)
+            matched = []
+            for i in range(total):
+                row = self.table_row(table_name, i)
+                flat = {p['name']: p['value'] for p in row['properties'] + row['states']}
+                if expr.evaluate(flat):
+                    matched.append(row)
+                    if len(matched) >= start + page_size:
+                        break
+            rows = matched[start:start + page_size]
+        else:
+            rows = [self.table_row(table_name, i) for i in range(start, min(total, start + page_size))]
+        if columns:
+            wanted = set(columns)
+            rows = [{'properties': [p for p in r['properties'] if p['name'] in wanted],
+                     'states': [s for s in r['states'] if s['name'] in wanted]} for r in rows]
+        return rows
+
+    # -- Auth ---------------------------------------------------------------
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        ttl = self.config.token_ttl
+        with self._lock:
+            self._tokens[token] = None if ttl is None else time.time() + ttl
+        return token
+
+    def token_valid(self, header):
+        if not header or not header.startswith('Bearer '):
+            return False
+        expiry = self._tokens.get(header[len('Bearer '):], False)
+        return expiry is None or (expiry is not False and expiry > time.time())
+
+    def count(self, endpoint):
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+
+# ---------------------------------------------------------------------------
+# HTTP handler
+# ---------------------------------------------------------------------------
+
+_ROUTES = [
+    ('POST', r'/api/auth', 'auth'),
+    ('GET', r'/api/v1/models', 'models'),
+    ('GET', r'/api/v1/models/(?P<model_id>\d+)/table-schemas', 'table_schemas'),
+    ('GET', r'/api/v1/runs', 'runs'),
+    ('POST', r'/api/v1/runs/create', 'create_run'),
+    ('POST', r'/api/v1/runs/start-existing-plan-run', 'start_run'),
+    ('GET', r'/api/v1/runs/(?P<run_id>\d+)', 'run'),
+    ('DELETE', r'/api/v1/runs/(?P<run_id>\d+)', 'delete_run'),
+    ('PATCH', r'/api/v1/runs/(?P<run_id>\d+)', 'cancel_run'),
+    ('GET', r'/api/v1/runs/(?P<run_id>\d+)/progress', 'progress'),
+    ('PUT', r'/api/v1/runs/(?P<run_id>\d+)/time-options', 'time_options'),
+    ('GET', r'/api/v1/runs/(?P<run_id>\d+)/scenarios', 'scenarios'),
+    ('GET', r'/api/v1/runs/(?P<run_id>\d+)/scenarios/log-schemas', 'log_schemas'),
+    ('GET', r'/api/v1/runs/(?P<run_id>\d+)/scenarios/log-data/(?P<log_type>[\w-]+)', 'log_data'),
+    ('PUT', r'/api/v1/runs/(?P<run_id>\d+)/scenarios/(?P<scenario>[^/]+)/control-values/(?P<control>[^/]+)',
+     'control_value'),
+    ('GET', r'/api/v1/runs/(?P<run_id>\d+)/scenarios/(?P<scenario>[^/]+)/table-data/(?P<table>[^/]+)',
+     'table_data'),
+]
+_COMPILED_ROUTES = [(method, re.compile(pattern + '$'), name) for method, pattern, name in _ROUTES]
+
+
+def _make_handler(portal):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass  # keep benchmark output clean
+
+        def _send(self, status, payload=None):
+            body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            if payload is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'null') if length else None
+
+        def _dispatch(self, method):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            for route_method, pattern, name in _COMPILED_ROUTES:
+                m = pattern.match(parsed.path)
+                if route_method == method and m:
+                    break
+            else:
+                self._body()
+                return self._send(404, {'message': f"No route for {method} {parsed.path}"})
+
+            body = self._body()
+            portal.count(name)
+            config = portal.config
+            delay = config.latency_ms + (random.uniform(0, config.latency_jitter_ms) if config.latency_jitter_ms else 0)
+            if delay:
+                time.sleep(delay / 1000)
+            if name != 'auth':
+                if not portal.token_valid(self.headers.get('Authorization')):
+                    return self._send(401, {'message': 'Token missing or expired'})
+                if config.error_rate and random.random() < config.error_rate:
+                    return self._send(500, {'message': 'Injected failure'})
+            params = {k: unquote(v) for k, v in m.groupdict().items()}
+            status, payload = getattr(self, 'do_' + name)(params, query, body)
+            rows = len(payload) if isinstance(payload, list) else 0
+            if rows and config.latency_per_row_us:
+                time.sleep(rows * config.latency_per_row_us / 1e6)
+            self._send(status, payload)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def do_PUT(self):
+            self._dispatch('PUT')
+
+        def do_DELETE(self):
+            self._dispatch('DELETE')
+
+        def do_PATCH(self):
+            self._dispatch('PATCH')
+
+        # -- Endpoints (return (status, payload)) --------------------------
+
+        def _run(self, params):
+            return portal.runs.get(int(params['run_id']))
+
+        def do_auth(self, params, query, body):
+            if not body or not body.get('personalAccessToken'):
+                return 401, {'message': 'personalAccessToken required'}
+            return 200, {'token': portal.issue_token()}
+
+        def do_models(self, params, query, body):
+            return 200, portal.models
+
+        def do_table_schemas(self, params, query, body):
+            wanted = (query.get('table_name') or [None])[0]
+            tables = [t for t in portal.tables if wanted in (None, t['name'])]
+            return (200, tables) if tables else (204, None)
+
+        def do_runs(self, params, query, body):
+            runs = list(portal.runs.values())
+            if 'name' in query:
+                runs = [r for r in runs if r['name'] == query['name'][0]]
+            if 'model_id' in query:
+                runs = [r for r in runs if r['modelId'] == int(query['model_id'][0])]
+            if 'experiment_id' in query:
+                runs = [r for r in runs if r['experimentId'] == int(query['experiment_id'][0])]
+            return 200, [portal.run_json(r) for r in runs]
+
+        def do_run(self, params, query, body):
+            run = self._run(params)
+            return (200, portal.run_json(run)) if run else (404, {'message': 'Run not found'})
+
+        def do_create_run(self, params, query, body):
+            return 200, portal.create_run(body.get('experimentRunName') or 'Run')
+
+        def do_start_run(self, params, query, body):
+            run = portal.runs.get(int(body.get('existingExperimentRunId') or 0))
+            if not run:
+                return 404, {'message': 'Run not found'}
+            run['started'] = time.time()
+            run.pop('canceled', None)
+            return 204, None
+
+        def do_delete_run(self, params, query, body):
+            return (204, None) if portal.runs.pop(int(params['run_id']), None) else (404, {'message': 'Run not found'})
+
+        def do_cancel_run(self, params, query, body):
+            run = self._run(params)
+            if not run:
+                return 404, {'message': 'Run not found'}
+            run['canceled'] = True
+            return 204, None
+
+        def do_progress(self, params, query, body):
+            run = self._run(params)
+            return (200, portal.progress_json(run)) if run else (404, {'message': 'Run not found'})
+
+        def do_time_options(self, params, query, body):
+            run = self._run(params)
+            if not run:
+                return 404, {'message': 'Run not found'}
+            run['timeOptions'] = body or {}
+            return 204, None
+
+        def do_scenarios(self, params, query, body):
+            run = self._run(params)
+            return (200, portal.scenarios_json(run)) if run else (404, {'message': 'Run not found'})
+
+        def do_control_value(self, params, query, body):
+            run = self._run(params)
+            if not run or params['scenario'] not in run['scenarioNames']:
+                return 404, {'message': 'Run or scenario not found'}
+            if params['control'] not in run['controls']:
+                return 400, {'message': f"Unknown control '{params['control']}'"}
+            run['controls'][params['control']] = (body or {}).get('value')
+            return 204, None
+
+        def do_table_data(self, params, query, body):
+            if not self._run(params):
+                return 404, {'message': 'Run not found'}
+            page = int((query.get('page') or [1])[0])
+            page_size = int((query.get('page_size') or [100])[0])
+            try:
+                rows = portal.table_page(params['table'], page, page_size, (query.get('filter') or [None])[0],
+                                         query.get('columns'))
+            except ValueError as e:
+                return 400, {'message': str(e)}
+            if rows is None:
+                return 404, {'message': f"Table '{params['table']}' not found"}
+            return (200, rows) if rows else (204, None)
+
+        def do_log_schemas(self, params, query, body):
+            run = self._run(params)
+            if not run:
+                return 404, {'message': 'Run not found'}
+            return 200, portal.log_schemas_json(run, (query.get('log_name') or [None])[0])
+
+        def do_log_data(self, params, query, body):
+            run = self._run(params)
+            if not run or params['log_type'] not in LOGS:
+                return 404, {'message': 'Run or log not found'}
+            page = int((query.get('page') or [1])[0])
+            page_size = int((query.get('page_size') or [100])[0])
+            start = (page - 1) * page_size
+            end = min(portal.config.log_rows, start + page_size)
+            rows = [portal.log_row(params['log_type'], i, run['name']) for i in range(start, end)]
+            return (200, rows) if rows else (204, None)
+
+    return Handler
+
+
+@contextlib.contextmanager
+def serve_in_subprocess(**options):
+    """
+    Run the mock portal in a child process (so its CPU and allocations stay out of the
+    caller's measurements) and yield its base URL. options are the command-line flags,
+    e.g. serve_in_subprocess(rows=10000, latency_ms=5) for --rows 10000 --latency-ms 5.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    cmd = [sys.executable, os.path.abspath(__file__), "--port", str(port)]
+    for key, value in options.items():
+        if value is not None:
+            cmd += ["--" + key.replace("_", "-"), str(value)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"Mock portal did not start: {' '.join(cmd)}")
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock Simio Portal server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=1000, help="rows per table")
+    parser.add_argument("--log-rows", type=int, default=1000, help="rows per log")
+    parser.add_argument("--resources", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--per-row-us", type=float, default=0.0, help="extra latency per returned row")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--token-ttl", type=float, help="seconds before a token expires (default: never)")
+    parser.add_argument("--run-seconds", type=float, default=2.0, help="time for a started run to complete")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spfx", help="take table schemas and controls from this .spfx project file")
+    args = parser.parse_args()
+
+    config = MockPortalConfig(table_rows=args.rows, log_rows=args.log_rows, resources=args.resources,
+                              latency_ms=args.latency_ms, latency_jitter_ms=args.jitter_ms,
+                              latency_per_row_us=args.per_row_us, error_rate=args.error_rate,
+                              token_ttl=args.token_ttl, run_seconds=args.run_seconds, seed=args.seed,
+                              spfx_path=args.spfx)
+    portal = MockPortal(config, host=args.host, port=args.port)
+    print(f"  Mock Simio Portal at {portal.url}  (project '{config.project_name}', run 1 'Plan')")
+    print(f"  Tables: {', '.join(t['name'] for t in portal.tables)}  |  {config.table_rows} rows each")
+    try:
+        portal._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
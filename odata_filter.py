@@ -0,0 +1,391 @@
+# odata_filter.py
+"""
+Typed predicate builder for the OData-style `filter` parameter of getTableData.
+
+Builds filter strings from Python values with safe quoting instead of string
+formatting, so names and values can't break (or inject into) the expression:
+
+    from odata_filter import col
+
+    f = col("MaterialName").eq("Widget's") & (col("Quantity").gt(10) | col("Status").isin(["Open", "Late"]))
+    str(f)  # "MaterialName eq 'Widget''s' and (Quantity gt 10 or Status in ('Open','Late'))"
+
+Expressions can be passed directly as getTableData(filter=...) or rendered with str().
+The same expressions (or filter strings, via parse_filter) can be evaluated locally
+against flat row dicts with expr.evaluate(row) — see table_query.LocalTable.
+"""
+import datetime
+import math
+import re
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_./]*$")
+
+
+def quote(value):
+    """Render a Python value as an OData literal (strings single-quoted with '' escaping)."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            raise ValueError(f"Cannot use {value} in an OData filter.")
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value.isoformat(timespec='seconds') + "Z"
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    raise TypeError(f"Unsupported OData literal type: {type(value).__name__}")
+
+
+_FAIL = object()
+
+
+def parse_datetime(text):
+    """Parse an ISO 8601 date/time string to a naive UTC datetime, or None if it isn't one."""
+    if not isinstance(text, str) or len(text) < 10 or text[4:5] != '-':
+        return None
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'  # fromisoformat only accepts 'Z' from Python 3.11
+    try:
+        value = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def coerce(value, literal):
+    """Convert a row value to the type of a filter literal for comparison; _FAIL when it can't be."""
+    if value is None:
+        return _FAIL
+    if isinstance(literal, bool):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        return _FAIL
+    if isinstance(literal, (int, float)):
+        if isinstance(value, bool):
+            return _FAIL
+        if isinstance(value, (int, float)):
+            return value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return _FAIL
+    if isinstance(literal, datetime.datetime):
+        if isinstance(value, datetime.datetime):
+            return value if value.tzinfo is None else value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return parse_datetime(value) or _FAIL
+    if isinstance(literal, datetime.date):
+        if isinstance(value, datetime.datetime):
+            return value.date()
+        if isinstance(value, datetime.date):
+            return value
+        parsed = parse_datetime(value)
+        return parsed.date() if parsed else _FAIL
+    return str(value)
+
+
+def _normalize_literal(literal):
+    if isinstance(literal, datetime.datetime) and literal.tzinfo is not None:
+        return literal.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return literal
+
+
+def _compare(op, value, literal):
+    if literal is None:
+        is_null = value is None or value == ''
+        return is_null if op == 'eq' else (not is_null if op == 'ne' else False)
+    coerced = coerce(value, literal)
+    if coerced is _FAIL:
+        return op == 'ne'
+    literal = _normalize_literal(literal)
+    if op == 'eq':
+        return coerced == literal
+    if op == 'ne':
+        return coerced != literal
+    if op == 'lt':
+        return coerced < literal
+    if op == 'le':
+        return coerced <= literal
+    if op == 'gt':
+        return coerced > literal
+    return coerced >= literal
+
+
+class Expr:
+    """Base class for filter expressions. Combine with & (and), | (or) and ~ (not)."""
+
+    def render(self):
+        raise NotImplementedError
+
+    def evaluate(self, row):
+        """True when a flat row dict satisfies the expression."""
+        raise NotImplementedError
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.render()!r})"
+
+    def __and__(self, other):
+        return and_(self, other)
+
+    def __or__(self, other):
+        return or_(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def _render_operand(self):
+        return self.render()
+
+
+class Comparison(Expr):
+    """<column> <op> <literal>, op one of eq/ne/lt/le/gt/ge."""
+
+    OPERATORS = ('eq', 'ne', 'lt', 'le', 'gt', 'ge')
+
+    def __init__(self, column, op, value):
+        if op not in self.OPERATORS:
+            raise ValueError(f"Unknown comparison operator '{op}'.")
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def render(self):
+        return f"{self.column} {self.op} {quote(self.value)}"
+
+    def evaluate(self, row):
+        return _compare(self.op, row.get(self.column), self.value)
+
+
+class In(Expr):
+    """<column> in (<literal>, ...)."""
+
+    def __init__(self, column, values):
+        self.column = column
+        self.values = list(values)
+        if not self.values:
+            raise ValueError(f"'in' filter on {column} needs at least one value.")
+
+    def render(self):
+        return f"{self.column} in ({','.join(quote(v) for v in self.values)})"
+
+    def evaluate(self, row):
+        value = row.get(self.column)
+        return any(_compare('eq', value, v) for v in self.values)
+
+
+class BoolOp(Expr):
+    """Two or more expressions joined with 'and' or 'or'."""
+
+    def __init__(self, op, operands):
+        self.op = op
+        self.operands = list(operands)
+
+    def render(self):
+        return f" {self.op} ".join(o._render_operand() for o in self.operands)
+
+    def evaluate(self, row):
+        if self.op == 'and':
+            return all(o.evaluate(row) for o in self.operands)
+        return any(o.evaluate(row) for o in self.operands)
+
+    def _render_operand(self):
+        return f"({self.render()})"
+
+
+class Not(Expr):
+    """not (<expression>)."""
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def render(self):
+        return f"not ({self.operand.render()})"
+
+    def evaluate(self, row):
+        return not self.operand.evaluate(row)
+
+
+class Column:
+    """A column reference; its methods build comparisons against Python values."""
+
+    def __init__(self, name):
+        if not _IDENTIFIER.match(name or ''):
+            raise ValueError(f"Invalid column name for an OData filter: {name!r}")
+        self.name = name
+
+    def eq(self, value):
+        return Comparison(self.name, 'eq', value)
+
+    def ne(self, value):
+        return Comparison(self.name, 'ne', value)
+
+    def lt(self, value):
+        return Comparison(self.name, 'lt', value)
+
+    def le(self, value):
+        return Comparison(self.name, 'le', value)
+
+    def gt(self, value):
+        return Comparison(self.name, 'gt', value)
+
+    def ge(self, value):
+        return Comparison(self.name, 'ge', value)
+
+    def isin(self, values):
+        return In(self.name, values)
+
+    def __str__(self):
+        return self.name
+
+
+def col(name):
+    """Reference a column by name."""
+    return Column(name)
+
+
+def _flatten(op, exprs):
+    operands = []
+    for e in exprs:
+        if isinstance(e, BoolOp) and e.op == op:
+            operands.extend(e.operands)
+        else:
+            operands.append(e)
+    return operands
+
+
+def and_(*exprs):
+    """All of the expressions must hold."""
+    operands = _flatten('and', exprs)
+    return operands[0] if len(operands) == 1 else BoolOp('and', operands)
+
+
+def or_(*exprs):
+    """Any of the expressions must hold."""
+    operands = _flatten('or', exprs)
+    return operands[0] if len(operands) == 1 else BoolOp('or', operands)
+
+
+# ---------------------------------------------------------------------------
+# Parsing filter strings back into expressions
+# ---------------------------------------------------------------------------
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+  | (?P<datetime>\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})?)?)
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<punct>[(),])
+  | (?P<word>[A-Za-z_][A-Za-z0-9_./]*)
+)""", re.VERBOSE)
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Unexpected character in filter at position {pos}: {text[pos:pos + 20]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        tok_kind, tok_value = self.peek()
+        if tok_kind is None or (kind and tok_kind != kind) or (value and tok_value.lower() != value):
+            raise ValueError(f"Expected {value or kind} in filter {self.text!r}, got {tok_value!r}")
+        self.pos += 1
+        return tok_value
+
+    def at_word(self, *words):
+        kind, value = self.peek()
+        return kind == 'word' and value.lower() in words
+
+    def parse(self):
+        expr = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self.peek()[1]!r} in filter {self.text!r}")
+        return expr
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.at_word('or'):
+            self.pos += 1
+            operands.append(self.parse_and())
+        return or_(*operands)
+
+    def parse_and(self):
+        operands = [self.parse_unary()]
+        while self.at_word('and'):
+            self.pos += 1
+            operands.append(self.parse_unary())
+        return and_(*operands)
+
+    def parse_unary(self):
+        if self.at_word('not'):
+            self.pos += 1
+            return Not(self.parse_unary())
+        if self.peek() == ('punct', '('):
+            self.pos += 1
+            expr = self.parse_or()
+            self.take('punct', ')')
+            return expr
+        column = self.take('word')
+        if self.at_word('in'):
+            self.pos += 1
+            self.take('punct', '(')
+            values = [self.parse_literal()]
+            while self.peek() == ('punct', ','):
+                self.pos += 1
+                values.append(self.parse_literal())
+            self.take('punct', ')')
+            return In(column, values)
+        op = self.take('word').lower()
+        return Comparison(column, op, self.parse_literal())
+
+    def parse_literal(self):
+        kind, value = self.peek()
+        self.pos += 1
+        if kind == 'string':
+            return value[1:-1].replace("''", "'")
+        if kind == 'number':
+            return float(value) if any(c in value for c in '.eE') else int(value)
+        if kind == 'datetime':
+            if 'T' not in value:
+                return datetime.date.fromisoformat(value)
+            return parse_datetime(value)
+        if kind == 'word' and value.lower() in ('true', 'false', 'null'):
+            return {'true': True, 'false': False, 'null': None}[value.lower()]
+        raise ValueError(f"Expected a literal in filter {self.text!r}, got {value!r}")
+
+
+def parse_filter(text):
+    """Parse an OData filter string (eq/ne/lt/le/gt/ge/in/and/or/not, parentheses) into an expression."""
+    if isinstance(text, Expr):
+        return text
+    return _Parser(text).parse()
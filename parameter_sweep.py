@@ -0,0 +1,261 @@
+# parameter_sweep.py
+"""
+Parameter sweep launcher for the Simio Portal Web API.
+Creates one plan per control-value set, configures and starts the runs concurrently,
+then collects selected output tables into one combined result keyed by parameter set.
+Works with both pysimio (pySimio) and direct REST API (SimioAPI) objects.
+
+Run standalone with a JSON sweep spec:  python parameter_sweep.py sweep.json
+"""
+import itertools
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from run_queue import RunSubmissionQueue
+from shared_helper import TERMINAL_STATUSES, fetch_all_table_pages, flatten_table_rows, wait_for_run_completion
+from spill_buffer import SpillableRowBuffer
+
+
+def expand_grid(grid):
+    """Expand {control_name: [values, ...]} into a list of every control-value combination."""
+    names = list(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+
+
+def parameter_set_key(params):
+    """Return a hashable key for a parameter set: sorted (control_name, value) pairs."""
+    return tuple(sorted((name, str(value)) for name, value in params.items()))
+
+
+def _delete_existing_plans(api, model_id, plan_names):
+    """Delete any existing runs for this model whose scenarioNames match a sweep plan name."""
+    wanted = set(plan_names)
+    runs = api.getRuns(modelId=model_id) or []
+    for run in runs:
+        if wanted.intersection(run.get('scenarioNames') or []):
+            api.deleteRun(run.get('id'))
+            print(f"  Deleted existing run_id {run.get('id')} ({', '.join(run.get('scenarioNames') or [])})")
+
+
+def _start_and_wait(pool, api, configured, refresh_interval, run_replications, run_timeout=None, max_failed_polls=5):
+    """
+    Start every configured run, then wait for each one (on the pool) until it reaches a terminal status.
+    Runs whose progress can't be read max_failed_polls times in a row end as 'Unknown'; runs still going
+    after run_timeout seconds of waiting end as 'TimedOut'.
+    """
+    def start(entry):
+        try:
+            if not api.startRunFromExisting(existingExperimentRunId=entry['run_id'], runPlan=True,
+                                            runReplications=run_replications):
+                # SimioAPI returns None when the call still fails after re-authenticating
+                entry['errors'].append("startRunFromExisting returned no result")
+                entry['status'] = 'StartFailed'
+                return
+            entry['status'] = 'NotStarted'
+        except Exception as e:
+            entry['errors'].append(f"startRunFromExisting: {e}")
+            entry['status'] = 'StartFailed'
+    list(pool.map(start, configured))
+    pending = [e for e in configured if e['status'] == 'NotStarted']
+    print(f"  Started {len(pending)} run(s)")
+
+    def wait(entry):
+        status = wait_for_run_completion(api, entry['run_id'], refresh_interval, timeout=run_timeout,
+                                         max_failed_polls=max_failed_polls)
+        if status == '?':
+            entry['errors'].append(f"getRunProgress failed {max_failed_polls} time(s) in a row")
+            status = 'Unknown'
+        elif status not in TERMINAL_STATUSES:
+            entry['errors'].append(f"still '{status}' after {run_timeout} s")
+            status = 'TimedOut'
+        entry['status'] = status
+        print(f"  Plan '{entry['plan_name']}' (run_id {entry['run_id']}) ended with status: {status}")
+    list(pool.map(wait, pending))
+
+
+def run_parameter_sweep(api, model_id, base_plan_name, parameter_sets, output_tables=(),
+                        time_options=None, time_options_cls=None, max_workers=8,
+                        refresh_interval=2, page_size=100, replace_existing=True, run_replications=False,
+                        max_in_flight=None, run_timeout=None, max_failed_polls=5):
+    """
+    Runs one plan per parameter set and returns the combined results.
+
+    Parameters:
+        api (object): pySimio or SimioAPI object (already authenticated).
+        model_id (int): Model to create the runs under.
+        base_plan_name (str): Plan names are "<base_plan_name>_<n>" (1-based, zero padded).
+        parameter_sets (list | dict): List of {control_name: value} dicts, or a grid
+            {control_name: [values, ...]} that is expanded with expand_grid().
+        output_tables (iterable): Table names to download once each run completes.
+        time_options (dict): Optional TimeOptions fields (without runId) applied to every run.
+        time_options_cls (type): TimeOptions class matching the API backend.
+        max_workers (int): Maximum concurrent API calls.
+        refresh_interval (int): Seconds between progress polls.
+        page_size (int): Rows per page when downloading output tables.
+        replace_existing (bool): Delete existing runs with the same plan names first.
+        run_replications (bool): Passed through to startRunFromExisting.
+        max_in_flight (int): When set, runs are started through a RunSubmissionQueue so at most
+            this many occupy portal run slots at once.
+        run_timeout (float): Seconds to wait for each run before marking it 'TimedOut' (default: no limit).
+        max_failed_polls (int): Progress polls in a row that may fail (error or no data) before a run
+            is marked 'Unknown'.
+
+    Returns:
+        dict: parameter_set_key(params) -> {'params', 'plan_name', 'run_id', 'status', 'tables', 'errors'}.
+    """
+    if isinstance(parameter_sets, dict):
+        parameter_sets = expand_grid(parameter_sets)
+    if time_options and time_options_cls is None:
+        from shared_helper import load_backend
+        _, time_options_cls = load_backend()
+
+    width = len(str(len(parameter_sets)))
+    entries = []
+    for i, params in enumerate(parameter_sets, 1):
+        entries.append({
+            'params': dict(params),
+            'plan_name': f"{base_plan_name}_{i:0{width}d}",
+            'run_id': None,
+            'status': 'NotCreated',
+            'tables': {},
+            'errors': [],
+        })
+
+    print(f"\n  Parameter sweep '{base_plan_name}': {len(entries)} parameter set(s), {max_workers} worker(s)")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if replace_existing:
+            _delete_existing_plans(api, model_id, [e['plan_name'] for e in entries])
+
+        # 1. Create every run
+        def create(entry):
+            try:
+                run_id = api.createRun(model_id, entry['plan_name'])
+                if not run_id:
+                    entry['errors'].append("createRun returned no run_id")
+                    return
+                entry['run_id'] = run_id
+                entry['status'] = 'Created'
+            except Exception as e:
+                entry['errors'].append(f"createRun: {e}")
+        list(pool.map(create, entries))
+        created = [e for e in entries if e['run_id']]
+        print(f"  Created {len(created)}/{len(entries)} run(s)")
+
+        # 2. Apply control values and time options, all calls in parallel
+        calls = []
+        for entry in created:
+            for name, value in entry['params'].items():
+                calls.append((entry, f"setControlValues({name})",
+                              lambda e=entry, n=name, v=value: api.setControlValues(
+                                  runId=e['run_id'], scenarioName=e['plan_name'], controlName=n, controlValue=str(v))))
+            if time_options:
+                calls.append((entry, "setRunTimeOptions",
+                              lambda e=entry: api.setRunTimeOptions(time_options_cls(runId=e['run_id'], **time_options))))
+        futures = [(entry, label, pool.submit(fn)) for entry, label, fn in calls]
+        for entry, label, future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                entry['errors'].append(f"{label}: {e}")
+            else:
+                # SimioAPI returns None when the call still fails after re-authenticating; pySimio can return False
+                if result is None or result is False:
+                    entry['errors'].append(f"{label}: returned no result")
+        configured = [e for e in created if not e['errors']]
+        print(f"  Configured {len(configured)}/{len(created)} run(s) ({len(calls)} API calls)")
+
+        if max_in_flight:
+            # 3-4. Start through the capped queue; it polls and frees slots as runs finish
+            by_run_id = {e['run_id']: e for e in configured}
+            queue = RunSubmissionQueue(api, max_in_flight=max_in_flight, refresh_interval=refresh_interval,
+                                       on_finished=lambda job: by_run_id[job['run_id']].update(status=job['status']),
+                                       job_timeout=run_timeout, max_failed_polls=max_failed_polls)
+            for entry in configured:
+                queue.add_job(entry['run_id'], plan_name=entry['plan_name'], run_replications=run_replications)
+            queue.run()
+        else:
+            # 3-4. Start everything at once; each run is waited on by a pool worker (wait_for_run_completion)
+            _start_and_wait(pool, api, configured, refresh_interval, run_replications, run_timeout, max_failed_polls)
+
+        # 5. Download selected output tables for completed runs
+        def download(entry, table_name):
+            try:
+                rows = fetch_all_table_pages(api, entry['run_id'], entry['plan_name'], table_name, page_size)
+                try:
+                    entry['tables'][table_name] = flatten_table_rows(rows)
+                finally:
+                    if isinstance(rows, SpillableRowBuffer):
+                        rows.close()   # SIMIO_MEMORY_BUDGET is set: delete the spill file now
+            except Exception as e:
+                entry['errors'].append(f"getTableData({table_name}): {e}")
+        completed = [e for e in entries if e['status'] == 'Complete']
+        list(pool.map(lambda args: download(*args),
+                      [(entry, table) for entry in completed for table in output_tables]))
+
+    print(f"  Sweep finished: {len(completed)}/{len(entries)} run(s) completed")
+    return {parameter_set_key(e['params']): e for e in entries}
+
+
+def combined_table_rows(sweep_results, table_name):
+    """Concatenate one output table across all parameter sets, prefixing each row with its control values."""
+    combined = []
+    for entry in sweep_results.values():
+        for row in entry['tables'].get(table_name) or []:
+            combined.append({**entry['params'], **row})
+    return combined
+
+
+def print_sweep_summary(sweep_results):
+    """Print one line per parameter set with its plan name, run ID, status and errors."""
+    print(f"\n  {'─' * 60}")
+    print(f"  Sweep Summary")
+    print(f"  {'─' * 60}")
+    for entry in sweep_results.values():
+        params = ", ".join(f"{k}={v}" for k, v in entry['params'].items())
+        rows = ", ".join(f"{t}: {len(r)} rows" for t, r in entry['tables'].items())
+        print(f"  {entry['plan_name']:<30} run_id={entry['run_id']}  {entry['status']:<10} [{params}]")
+        if rows:
+            print(f"      {rows}")
+        for err in entry['errors']:
+            print(f"      ! {err}")
+    print(f"  {'─' * 60}")
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from shared_helper import find_modelid_by_projectname, load_backend
+
+    if len(sys.argv) != 2:
+        print("Usage: python parameter_sweep.py <sweep_spec.json>")
+        sys.exit(1)
+
+    # Spec keys: project_name, base_plan_name, grid or parameter_sets, output_tables,
+    # time_options, max_workers, run_timeout, output_file
+    with open(sys.argv[1]) as f:
+        spec = json.load(f)
+
+    load_dotenv(override=True)
+    personal_access_token = os.getenv("PERSONAL_ACCESS_TOKEN")
+    if not personal_access_token:
+        raise ValueError("Personal access token not found. Make sure it's set in the environment.")
+
+    # API backend selected by USE_PYSIMIO, as in main.py
+    api_class, time_options_class = load_backend()
+    api = api_class(os.getenv("SIMIO_PORTAL_URL"))
+    api.authenticate(personalAccessToken=personal_access_token)
+    model_id = find_modelid_by_projectname(api.getModels(), spec['project_name'])
+
+    results = run_parameter_sweep(
+        api, model_id, spec['base_plan_name'], spec.get('grid') or spec.get('parameter_sets') or [],
+        output_tables=spec.get('output_tables', []), time_options=spec.get('time_options'),
+        time_options_cls=time_options_class, max_workers=spec.get('max_workers', 8),
+        run_timeout=spec.get('run_timeout'))
+    print_sweep_summary(results)
+
+    if spec.get('output_file'):
+        with open(spec['output_file'], 'w') as f:
+            json.dump({table: combined_table_rows(results, table) for table in spec.get('output_tables', [])}, f, indent=2)
+        print(f"  Combined output tables written to {spec['output_file']}")
@@ -0,0 +1,173 @@
+# portal_catalog.py
+"""
+Indexed catalog of Simio Portal models and runs.
+Builds hash indexes once from getModels/getRuns so project, run, scenario and
+experiment lookups are O(1) instead of a linear scan of the JSON lists, and
+refreshes them incrementally. Works with both pysimio (pySimio) and direct
+REST API (SimioAPI) objects.
+"""
+
+
+class PortalCatalog:
+    """
+    Hash indexes over the getModels and getRuns JSON lists.
+
+    Indexes:
+        project name  -> models (ordered by projectId) and the best model ID (highest projectId)
+        run name      -> run (first seen, matching find_parent_run_id)
+        scenario name -> run IDs whose scenarioNames contain it
+        experiment ID -> runs
+        project name  -> experiment ID (first seen, matching get_parent_experiment_id; models are
+                         looked at before runs, so the result doesn't depend on load order)
+    """
+
+    def __init__(self, api=None):
+        self.api = api
+        self._models = []               # the last getModels response, in order
+        self._models_by_project = {}
+        self._best_model_by_project = {}
+        self._experiment_by_project = {}
+        self._runs_by_id = {}
+        self._run_model = {}            # run ID -> model ID it was loaded for (None if unscoped)
+        self._run_by_name = {}
+        self._run_ids_by_scenario = {}
+        self._runs_by_experiment = {}
+
+    # -- Loading ------------------------------------------------------------
+
+    def load_models(self, models_json=None):
+        """Index a getModels response (fetched from the API when not given). Replaces the model indexes."""
+        if models_json is None:
+            models_json = self.api.getModels()
+        self._models = list(models_json or [])
+        self._models_by_project = {}
+        self._best_model_by_project = {}
+        for model in self._models:
+            name = model.get('projectName')
+            self._models_by_project.setdefault(name, []).append(model)
+            best = self._best_model_by_project.get(name)
+            if best is None or model.get('projectId', 0) > best.get('projectId', 0):
+                self._best_model_by_project[name] = model
+        for models in self._models_by_project.values():
+            models.sort(key=lambda m: m.get('projectId', 0))
+        self._rebuild_experiments()
+        return self
+
+    def _rebuild_experiments(self, project_name=None):
+        """Recompute project -> experiment ID from the current models, then runs (one project, or all)."""
+        if project_name is None:
+            self._experiment_by_project = {}
+        else:
+            self._experiment_by_project.pop(project_name, None)
+        for item in self._models + list(self._runs_by_id.values()):
+            name = item.get('projectName')
+            if item.get('experimentId') is not None and name is not None \
+                    and project_name in (None, name):
+                self._experiment_by_project.setdefault(name, item.get('experimentId'))
+
+    def load_runs(self, runs_json=None, model_id=None):
+        """
+        Index a getRuns response (fetched for model_id when not given).
+
+        Incremental: only runs previously loaded for the same model_id are replaced;
+        unchanged runs are not re-indexed and runs no longer returned are dropped.
+        """
+        if runs_json is None:
+            runs_json = self.api.getRuns(modelId=model_id) if model_id is not None else self.api.getRuns()
+        runs_json = runs_json or []
+        seen = set()
+        for run in runs_json:
+            run_id = run.get('id')
+            seen.add(run_id)
+            if self._runs_by_id.get(run_id) != run:
+                self.add_run(run, model_id=model_id)
+        stale = [rid for rid, mid in self._run_model.items() if mid == model_id and rid not in seen]
+        for run_id in stale:
+            self.remove_run(run_id)
+        return self
+
+    def refresh(self, model_id=None, models=False):
+        """Re-fetch runs for model_id (and the model list when models=True) and update the indexes in place."""
+        if models:
+            self.load_models()
+        return self.load_runs(model_id=model_id)
+
+    def add_run(self, run, model_id=None):
+        """Add or replace a single run in the indexes, e.g. right after createRun."""
+        run_id = run.get('id')
+        if run_id in self._runs_by_id:
+            self.remove_run(run_id)
+        self._runs_by_id[run_id] = run
+        self._run_model[run_id] = model_id
+        if run.get('name') is not None:
+            self._run_by_name.setdefault(run.get('name'), run)
+        for scenario in (run.get('scenarioNames') or []):
+            self._run_ids_by_scenario.setdefault(scenario, []).append(run_id)
+        if run.get('experimentId') is not None:
+            self._runs_by_experiment.setdefault(run.get('experimentId'), []).append(run)
+            if run.get('projectName') is not None:
+                self._experiment_by_project.setdefault(run.get('projectName'), run.get('experimentId'))
+
+    def remove_run(self, run_id):
+        """Drop a run from the indexes, e.g. right after deleteRun."""
+        run = self._runs_by_id.pop(run_id, None)
+        self._run_model.pop(run_id, None)
+        if run is None:
+            return
+        name = run.get('name')
+        if self._run_by_name.get(name) is run:
+            del self._run_by_name[name]
+            replacement = next((r for r in self._runs_by_id.values() if r.get('name') == name), None)
+            if replacement is not None:
+                self._run_by_name[name] = replacement
+        for scenario in (run.get('scenarioNames') or []):
+            ids = self._run_ids_by_scenario.get(scenario, [])
+            if run_id in ids:
+                ids.remove(run_id)
+            if not ids:
+                self._run_ids_by_scenario.pop(scenario, None)
+        runs = self._runs_by_experiment.get(run.get('experimentId'))
+        if runs is not None:
+            runs[:] = [r for r in runs if r.get('id') != run_id]
+            if not runs:
+                del self._runs_by_experiment[run.get('experimentId')]
+        project = run.get('projectName')
+        if project is not None and self._experiment_by_project.get(project) == run.get('experimentId'):
+            self._rebuild_experiments(project)
+
+    # -- Lookups ------------------------------------------------------------
+
+    def models_for_project(self, project_name):
+        """All models for a project name, ordered by projectId."""
+        return list(self._models_by_project.get(project_name, []))
+
+    def model_id_for_project(self, project_name):
+        """Model ID with the highest projectId for a project name, or None."""
+        model = self._best_model_by_project.get(project_name)
+        return model.get('id') if model else None
+
+    def run_by_name(self, run_name):
+        """Run dict for a run name, or None."""
+        return self._run_by_name.get(run_name)
+
+    def run(self, run_id):
+        """Run dict for a run ID, or None."""
+        return self._runs_by_id.get(run_id)
+
+    def run_ids_for_scenario(self, scenario_name, model_id=None):
+        """Run IDs whose scenarioNames contain scenario_name, optionally limited to runs loaded for model_id."""
+        ids = self._run_ids_by_scenario.get(scenario_name, [])
+        if model_id is None:
+            return list(ids)
+        return [rid for rid in ids if model_id in (self._run_model.get(rid), self._runs_by_id[rid].get('modelId'))]
+
+    def runs_for_experiment(self, experiment_id):
+        """Runs belonging to an experiment ID."""
+        return list(self._runs_by_experiment.get(experiment_id, []))
+
+    def experiment_id_for_project(self, project_name):
+        """Experiment ID for a project name, or None."""
+        return self._experiment_by_project.get(project_name)
+
+    def __len__(self):
+        return len(self._runs_by_id)
@@ -0,0 +1,186 @@
+# profiling.py
+"""
+Opt-in per-phase profiling (cProfile + tracemalloc) for the workflow.
+
+main.py wraps each phase (auth, model lookup, run reset, control edit, run start,
+polling, schema display, sampling, table dump, ...) in profile_phase / profiled.
+Those are no-ops until profiling is enabled, by environment variable or flag:
+
+    SIMIO_PROFILE=profiles python main.py
+    python cli.py --profile profiles run
+
+Each phase then gets a cProfile file (<dir>/<NN>_<phase>.prof, readable with
+pstats or snakeviz), and at exit a summary of every phase's wall and CPU time,
+memory growth, hottest functions and largest allocation sites is printed and
+written to <dir>/summary.txt.
+
+Phases running at the same time (the workflow runs independent tasks
+concurrently) are profiled on their own threads; tracemalloc is process-wide, so
+their memory figures include each other's allocations. On Python 3.12+ only one
+cProfile profiler can be active, so a phase that overlaps another one is timed
+but not profiled.
+"""
+import atexit
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+_profiler = None
+
+
+class PhaseProfiler:
+    """Collects a cProfile profile, CPU time and tracemalloc growth for each named phase."""
+
+    def __init__(self, output_dir, cpu=True, memory=True, top=10):
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self.phases = []          # dicts in start order
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()  # one frame per allocation keeps snapshots cheap
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        with self._lock:
+            record = {'name': name, 'index': len(self.phases) + 1, 'thread': threading.current_thread().name}
+            self.phases.append(record)
+        before = tracemalloc.take_snapshot() if self.memory else None
+        mem_before = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        profile = None
+        if self.cpu:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                profile = None  # another phase holds the only profiler slot (Python 3.12+)
+                record['note'] = 'not profiled (overlapped another phase)'
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = time.thread_time() - cpu
+            if profile is not None:
+                profile.disable()
+            if self.memory:
+                # Before dumping the profile, whose own allocations would otherwise count
+                record['mem_growth'] = tracemalloc.get_traced_memory()[0] - mem_before
+                record['allocators'] = _top_allocators(before, tracemalloc.take_snapshot(), self.top)
+            if profile is not None:
+                record['profile_path'] = os.path.join(
+                    self.output_dir, f"{record['index']:02d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.prof")
+                profile.dump_stats(record['profile_path'])
+                record['hot'] = _hot_functions(profile, self.top)
+
+    def wrap(self, name, fn):
+        """fn, profiled as phase name whenever it is called."""
+        def run(*args, **kwargs):
+            with self.phase(name):
+                return fn(*args, **kwargs)
+        run.__name__ = getattr(fn, '__name__', name)
+        return run
+
+    # -- Summary ------------------------------------------------------------
+
+    def summary(self):
+        out = io.StringIO()
+        out.write("\n" + "=" * 80 + "\n")
+        out.write(f"  PROFILE SUMMARY  |  {self.output_dir}\n")
+        out.write("=" * 80 + "\n")
+        out.write(f"  {'Phase':<28} {'Wall s':>9} {'CPU s':>9} {'Mem +KB':>10}\n")
+        out.write(f"  {'─' * 60}\n")
+        for p in self.phases:
+            mem = f"{p['mem_growth'] / 1024:>10.1f}" if 'mem_growth' in p else f"{'-':>10}"
+            out.write(f"  {p['name']:<28} {p.get('wall_s', 0):>9.3f} {p.get('cpu_s', 0):>9.3f} {mem}"
+                      + (f"  ({p['note']})" if p.get('note') else "") + "\n")
+        for p in self.phases:
+            if not p.get('hot') and not p.get('allocators'):
+                continue
+            out.write(f"\n  {p['name']}" + (f"  ->  {p['profile_path']}" if p.get('profile_path') else "") + "\n")
+            if p.get('hot'):
+                out.write(f"    Hot functions (self time):\n")
+                for func, calls, self_s, cum_s in p['hot']:
+                    out.write(f"      {self_s:>8.3f}s self {cum_s:>8.3f}s cum {calls:>8} calls  {func}\n")
+            if p.get('allocators'):
+                out.write(f"    Top allocators (net growth):\n")
+                for where, size, count in p['allocators']:
+                    out.write(f"      {size / 1024:>10.1f} KB {count:>8} blocks  {where}\n")
+        return out.getvalue()
+
+    def write_summary(self):
+        if not self.phases:
+            return
+        text = self.summary()
+        print(text)
+        with open(os.path.join(self.output_dir, "summary.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def _hot_functions(profile, top):
+    """[(function, calls, self seconds, cumulative seconds)] with the most self time."""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (_, calls, self_s, cum_s, _) in stats.stats.items():
+        if filename == '~':
+            where = func   # built-in
+        else:
+            where = f"{os.path.basename(filename)}:{line}({func})"
+        rows.append((where, calls, self_s, cum_s))
+    rows.sort(key=lambda r: -r[2])
+    return rows[:top]
+
+
+def _top_allocators(before, after, top):
+    """[(file:line, net bytes, net blocks)] of the sites whose allocations grew most between snapshots."""
+    ignore = (tracemalloc.__file__, cProfile.__file__, __file__)
+    rows = []
+    for stat in after.compare_to(before, 'lineno'):
+        frame = stat.traceback[0]
+        if stat.size_diff <= 0 or frame.filename in ignore:
+            continue
+        rows.append((f"{os.path.basename(frame.filename)}:{frame.lineno}", stat.size_diff, stat.count_diff))
+        if len(rows) >= top:
+            break
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Module-level switch used by main.py / cli.py
+# ---------------------------------------------------------------------------
+
+def enable(output_dir=None, cpu=True, memory=True, top=10):
+    """Turn profiling on for this process; the summary is printed and saved at exit."""
+    global _profiler
+    if _profiler is None:
+        _profiler = PhaseProfiler(output_dir or time.strftime("profiles/%Y%m%d-%H%M%S"), cpu, memory, top)
+        atexit.register(_profiler.write_summary)
+    return _profiler
+
+
+def active():
+    return _profiler
+
+
+def profile_phase(name):
+    """Context manager profiling a phase when profiling is enabled, otherwise doing nothing."""
+    return _profiler.phase(name) if _profiler is not None else contextlib.nullcontext()
+
+
+def profiled(name, fn):
+    """fn wrapped as a profiled phase when profiling is enabled, otherwise fn itself."""
+    return _profiler.wrap(name, fn) if _profiler is not None else fn
+
+
+if os.getenv("SIMIO_PROFILE"):
+    _value = os.getenv("SIMIO_PROFILE").strip()
+    enable(None if _value.lower() in ('1', 'true', 'yes') else _value,
+           memory=os.getenv("SIMIO_PROFILE_MEMORY", "True").strip().lower() not in ("false", "0", "no"))
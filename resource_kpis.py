@@ -0,0 +1,413 @@
+# resource_kpis.py
+"""
+Resource utilization KPIs from the Simio Portal resource logs, computed with NumPy.
+
+Loads the resource-state, resource-usage and resource-capacity logs into columnar
+arrays (column roles and types taken from getScenariosLogSchemas) and computes:
+
+    state_durations        time per resource per state (busy/idle/...)
+    utilization            busy time / available time per resource
+    bucket_utilization     busy fraction per resource per time bucket
+    capacity_weighted_load usage-units time / capacity-units time, per resource and bucket
+
+Interval overlap with time buckets is done with the cumulative-sum trick: the total
+interval time before t is sum(clip(t - start, 0, end - start)), which is two
+searchsorted/cumsum lookups over the sorted starts and ends, so millions of log rows
+cost a few array passes rather than a Python loop per row.
+
+    state_log = fetch_log(api, run_id, 'resource-state', concurrency=4)
+    print_kpi_report(state_log, bucket_seconds=3600)
+
+Requires numpy (pip install numpy).
+"""
+import datetime
+import re
+
+try:
+    import numpy as np
+except ImportError:  # only needed when KPIs are computed
+    np = None
+
+from odata_filter import parse_datetime
+
+DEFAULT_BUSY_STATES = ('Busy', 'Processing')
+DEFAULT_UNAVAILABLE_STATES = ('OffShift', 'Off Shift')
+
+# Column roles, with the normalized (lower-case, alphanumeric) names tried first for each;
+# after these, any column whose name contains the role is used.
+_ROLE_NAMES = {
+    'resource': ('resourcename', 'resource', 'resourceid', 'objectname', 'object'),
+    'start': ('startdatetime', 'starttime', 'start', 'fromdatetime'),
+    'end': ('enddatetime', 'endtime', 'end', 'todatetime'),
+    'state': ('state', 'statename', 'resourcestate'),
+    'capacity': ('capacity', 'capacityvalue', 'value'),
+    'quantity': ('quantity', 'units', 'capacityunits', 'amount'),
+    'scenario': ('scenarioname', 'scenario'),
+    'task': ('taskname', 'task', 'name', 'tasktype'),
+}
+
+# Roles each log needs (beyond scenario, which is optional everywhere)
+LOG_ROLES = {
+    'resource-state': ('resource', 'start', 'end', 'state'),
+    'resource-usage': ('resource', 'start', 'end', 'quantity'),
+    'resource-capacity': ('resource', 'start', 'end', 'capacity'),
+    'task': ('resource', 'start', 'end', 'task'),       # used by task_timeline
+}
+_OPTIONAL_ROLES = ('quantity', 'scenario', 'task')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("resource_kpis needs numpy. Install it with: pip install numpy")
+
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+def log_properties(log_schema_json, log_name):
+    """
+    {column name: type} for a log, from a getScenariosLogSchemas response.
+    log_name is a LOG_ROLES key ('resource-state', ...) and is matched loosely
+    against the schema's logName ("ResourceStateLog" etc.).
+    """
+    entries = [log_schema_json] if isinstance(log_schema_json, dict) else (log_schema_json or [])
+    wanted = _normalize(log_name)
+    for entry in entries:
+        for log in (entry.get('logSchema') or []) if isinstance(entry, dict) else []:
+            if wanted in _normalize(log.get('logName') or ''):
+                props = {}
+                for p in log.get('logProperties') or []:
+                    if isinstance(p, dict) and p.get('name'):
+                        col_type = p.get('type')
+                        if isinstance(col_type, list):
+                            col_type = ' '.join(str(t) for t in col_type)
+                        props[p['name']] = str(col_type or '')
+                return props
+    return {}
+
+
+def detect_columns(column_names, log_name, overrides=None):
+    """Map each role the log needs to a column name. Raises ValueError if a required role can't be found."""
+    by_norm = {_normalize(c): c for c in column_names}
+    mapping = {}
+    for role in LOG_ROLES[log_name] + ('scenario',):
+        if overrides and role in overrides:
+            mapping[role] = overrides[role]
+            continue
+        found = next((by_norm[n] for n in _ROLE_NAMES[role] if n in by_norm), None)
+        if found is None:
+            found = next((c for n, c in by_norm.items() if role in n and c not in mapping.values()), None)
+        if found is not None:
+            mapping[role] = found
+        elif role not in _OPTIONAL_ROLES:
+            raise ValueError(f"Can't find the {role} column of the {log_name} log among: {', '.join(column_names)}. "
+                             f"Pass columns={{'{role}': '<column name>'}}.")
+    return mapping
+
+
+def _is_datetime_type(type_name):
+    return 'date' in type_name.lower() or 'time' in type_name.lower()
+
+
+def _to_seconds(values, type_name=''):
+    """Convert a list of ISO date-time strings (or numbers) to float seconds; missing values become NaN."""
+    if type_name and not _is_datetime_type(type_name):
+        return np.array([np.nan if v in (None, '') else float(v) for v in values], dtype=float)
+    cleaned = [v[:-1] if isinstance(v, str) and v.endswith('Z') else v for v in values]
+    try:
+        stamps = np.array([v if v not in (None, '') else 'NaT' for v in cleaned], dtype='datetime64[ms]')
+    except ValueError:
+        # Offsets (+02:00) or numeric simulation times; parse the slow way
+        parsed = []
+        for v in values:
+            if v in (None, ''):
+                parsed.append(np.nan)
+            elif isinstance(v, (int, float)):
+                parsed.append(float(v))
+            else:
+                dt = parse_datetime(v)
+                parsed.append(np.nan if dt is None else
+                              dt.replace(tzinfo=datetime.timezone.utc).timestamp())
+        return np.array(parsed, dtype=float)
+    seconds = stamps.astype('int64') / 1000.0
+    seconds[np.isnat(stamps)] = np.nan
+    return seconds
+
+
+class LogFrame:
+    """
+    One resource log as NumPy columns:
+        resources  names (index with resource_codes)
+        resource_codes, start, end (float seconds; epoch seconds for date-time columns)
+        labels / label_codes  state names (state log only)
+        values     capacity or usage quantity (1.0 when the log has no quantity column)
+    Missing end times are filled with the latest time in the log (interval still open);
+    close_open_intervals moves them to another horizon.
+    """
+
+    def __init__(self, log_name, resource, start, end, label=None, value=None, is_datetime=True):
+        _require_numpy()
+        self.log_name = log_name
+        self.is_datetime = is_datetime
+        self.resources, self.resource_codes = np.unique(np.asarray(resource, dtype=object).astype(str),
+                                                        return_inverse=True)
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        self.open = np.isnan(self.end)
+        keep = ~np.isnan(self.start)
+        if self.open.any() and keep.any():
+            self.end = np.where(self.open, np.nanmax(np.concatenate([self.start, self.end])), self.end)
+        self.labels, self.label_codes = (None, None)
+        if label is not None:
+            self.labels, self.label_codes = np.unique(np.asarray(label, dtype=object).astype(str),
+                                                      return_inverse=True)
+        self.values = np.ones(len(self.start)) if value is None else np.asarray(value, dtype=float)
+        if not keep.all():
+            self._apply_mask(keep)
+
+    def _apply_mask(self, mask):
+        self.resource_codes = self.resource_codes[mask]
+        self.open = self.open[mask]
+        self.start, self.end, self.values = self.start[mask], self.end[mask], self.values[mask]
+        if self.label_codes is not None:
+            self.label_codes = self.label_codes[mask]
+
+    def __len__(self):
+        return len(self.start)
+
+    def close_open_intervals(self, horizon):
+        """Extend intervals with no end time (still open when the log was written) to horizon."""
+        self.end = np.where(self.open, np.maximum(horizon, self.start), self.end)
+        return self
+
+    @property
+    def durations(self):
+        return np.clip(self.end - self.start, 0.0, None)
+
+    def span(self):
+        """(earliest start, latest end) in seconds."""
+        if not len(self):
+            return 0.0, 0.0
+        return float(self.start.min()), float(self.end.max())
+
+    def label_mask(self, labels):
+        """Boolean row mask for rows whose state is one of labels (case-insensitive)."""
+        wanted = {str(s).lower() for s in labels}
+        codes = [i for i, name in enumerate(self.labels) if name.lower() in wanted]
+        return np.isin(self.label_codes, codes)
+
+
+def load_log(rows, log_name, log_schema_json=None, columns=None, scenario_name=None):
+    """
+    Build a LogFrame from log rows (any iterable of dicts, e.g. pages from
+    shared_helper.iter_log_pages). Column roles come from the log schema when given,
+    else from the first row's keys; columns overrides individual roles.
+    """
+    _require_numpy()
+    props = log_properties(log_schema_json, log_name) if log_schema_json is not None else {}
+    mapping = detect_columns(list(props), log_name, columns) if props else None
+    buffers = None
+    for row in rows:
+        if mapping is None:
+            mapping = detect_columns(list(row), log_name, columns)
+        if buffers is None:
+            buffers = {role: [] for role in mapping if role != 'scenario'}
+        if scenario_name is not None and 'scenario' in mapping and row.get(mapping['scenario']) != scenario_name:
+            continue
+        for role, values in buffers.items():
+            values.append(row.get(mapping[role]))
+    if buffers is None:
+        buffers = {role: [] for role in LOG_ROLES[log_name] if role != 'scenario'}
+        mapping = mapping or {}
+
+    start_type = props.get(mapping.get('start'), '')
+    is_datetime = not start_type or _is_datetime_type(start_type)
+    value_role = 'capacity' if log_name == 'resource-capacity' else 'quantity'
+    values = buffers.get(value_role)
+    return LogFrame(
+        log_name,
+        resource=buffers['resource'],
+        start=_to_seconds(buffers['start'], start_type),
+        end=_to_seconds(buffers['end'], props.get(mapping.get('end'), '')),
+        label=buffers.get('state'),
+        value=None if values is None else [np.nan if v in (None, '') else v for v in values],
+        is_datetime=is_datetime,
+    )
+
+
+def fetch_log(api, run_id, log_name, page_size=1000, concurrency=1, log_schema_json=None,
+              columns=None, scenario_name=None, verbose=False):
+    """Page through a resource log (concurrency pages at a time) straight into a LogFrame."""
+    from shared_helper import iter_log_pages
+
+    if log_schema_json is None:
+        log_schema_json = api.getScenariosLogSchemas(runId=run_id)
+    rows = (row for _, page in iter_log_pages(api, run_id, log_name, page_size, verbose=verbose,
+                                               concurrency=concurrency)
+            for row in page)
+    return load_log(rows, log_name, log_schema_json, columns=columns, scenario_name=scenario_name)
+
+
+# ---------------------------------------------------------------------------
+# Interval arithmetic
+# ---------------------------------------------------------------------------
+
+def cumulative_overlap(start, end, weights, edges):
+    """
+    For each t in edges, sum(weights * clip(t - start, 0, end - start)): the weighted
+    interval time before t. np.diff of the result is the weighted time in each bucket.
+    """
+    starts_order = np.argsort(start, kind='stable')
+    ends_order = np.argsort(end, kind='stable')
+    s, ws = start[starts_order], weights[starts_order]
+    e, we = end[ends_order], weights[ends_order]
+    # prefix sums with a leading zero so index k means "the first k intervals"
+    cw_s = np.concatenate(([0.0], np.cumsum(ws)))
+    cws_s = np.concatenate(([0.0], np.cumsum(ws * s)))
+    cw_e = np.concatenate(([0.0], np.cumsum(we)))
+    cwe_e = np.concatenate(([0.0], np.cumsum(we * e)))
+    ks = np.searchsorted(s, edges, side='right')
+    ke = np.searchsorted(e, edges, side='right')
+    return (edges * cw_s[ks] - cws_s[ks]) - (edges * cw_e[ke] - cwe_e[ke])
+
+
+def _group_sum(codes, weights, size):
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def bucket_edges(frame, bucket_seconds, start=None, end=None):
+    """Bucket boundaries covering [start, end] (default: the log's span)."""
+    lo, hi = frame.span()
+    lo = lo if start is None else start
+    hi = hi if end is None else end
+    count = max(1, int(np.ceil((hi - lo) / bucket_seconds)))
+    return lo + bucket_seconds * np.arange(count + 1, dtype=float)
+
+
+def _per_resource_buckets(frame, mask, weights, edges):
+    """(resources x buckets) array of weighted interval time per bucket for the masked rows."""
+    out = np.zeros((len(frame.resources), len(edges) - 1))
+    codes = frame.resource_codes[mask]
+    start, end, w = frame.start[mask], frame.end[mask], weights[mask]
+    order = np.argsort(codes, kind='stable')
+    codes, start, end, w = codes[order], start[order], end[order], w[order]
+    bounds = np.searchsorted(codes, np.arange(len(frame.resources) + 1))
+    for r in range(len(frame.resources)):
+        lo, hi = bounds[r], bounds[r + 1]
+        if hi > lo:
+            out[r] = np.diff(cumulative_overlap(start[lo:hi], end[lo:hi], w[lo:hi], edges))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# KPIs
+# ---------------------------------------------------------------------------
+
+def state_durations(state_frame):
+    """{resource: {state: seconds}} from a resource-state LogFrame."""
+    n_states = len(state_frame.labels)
+    flat = state_frame.resource_codes * n_states + state_frame.label_codes
+    totals = _group_sum(flat, state_frame.durations, len(state_frame.resources) * n_states)
+    totals = totals.reshape(len(state_frame.resources), n_states)
+    return {res: {state: float(totals[r, s]) for s, state in enumerate(state_frame.labels) if totals[r, s] > 0}
+            for r, res in enumerate(state_frame.resources)}
+
+
+def utilization(state_frame, busy_states=DEFAULT_BUSY_STATES, unavailable_states=DEFAULT_UNAVAILABLE_STATES):
+    """
+    {resource: busy fraction}: time in busy_states over logged time outside
+    unavailable_states (off-shift time doesn't count against utilization).
+    """
+    size = len(state_frame.resources)
+    durations = state_frame.durations
+    busy = _group_sum(state_frame.resource_codes, durations * state_frame.label_mask(busy_states), size)
+    available = _group_sum(state_frame.resource_codes, durations * ~state_frame.label_mask(unavailable_states), size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(available > 0, busy / available, 0.0)
+    return dict(zip(state_frame.resources.tolist(), fraction.tolist()))
+
+
+def bucket_utilization(state_frame, bucket_seconds, busy_states=DEFAULT_BUSY_STATES,
+                       unavailable_states=DEFAULT_UNAVAILABLE_STATES, start=None, end=None):
+    """
+    Busy fraction per resource per time bucket.
+    Returns (edges, resources, fractions) with fractions shaped (resources, buckets);
+    buckets with no available time are NaN.
+    """
+    edges = bucket_edges(state_frame, bucket_seconds, start, end)
+    ones = np.ones(len(state_frame))
+    busy = _per_resource_buckets(state_frame, state_frame.label_mask(busy_states), ones, edges)
+    available = _per_resource_buckets(state_frame, ~state_frame.label_mask(unavailable_states), ones, edges)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fractions = np.where(available > 0, busy / available, np.nan)
+    return edges, state_frame.resources, fractions
+
+
+def capacity_weighted_load(usage_frame, capacity_frame, bucket_seconds=None, start=None, end=None):
+    """
+    Usage-units time divided by capacity-units time, per resource (and per bucket when
+    bucket_seconds is given). A resource using 2 of 4 capacity units all the time has a load of 0.5.
+    Returns {resource: load} or (edges, resources, loads) with loads shaped (resources, buckets).
+    """
+    horizon = max(usage_frame.span()[1], capacity_frame.span()[1]) if end is None else end
+    usage_frame.close_open_intervals(horizon)
+    capacity_frame.close_open_intervals(horizon)
+    resources = np.union1d(usage_frame.resources, capacity_frame.resources)
+    usage_map = np.searchsorted(resources, usage_frame.resources)
+    capacity_map = np.searchsorted(resources, capacity_frame.resources)
+    usage_values = np.nan_to_num(usage_frame.values, nan=1.0)
+    capacity_values = np.nan_to_num(capacity_frame.values, nan=0.0)
+
+    if bucket_seconds is None:
+        used = _group_sum(usage_map[usage_frame.resource_codes], usage_frame.durations * usage_values,
+                          len(resources))
+        capacity = _group_sum(capacity_map[capacity_frame.resource_codes],
+                              capacity_frame.durations * capacity_values, len(resources))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            load = np.where(capacity > 0, used / capacity, np.nan)
+        return dict(zip(resources.tolist(), load.tolist()))
+
+    lo = min(usage_frame.span()[0], capacity_frame.span()[0]) if start is None else start
+    hi = max(usage_frame.span()[1], capacity_frame.span()[1]) if end is None else end
+    edges = bucket_edges(capacity_frame, bucket_seconds, lo, hi)
+    used = np.zeros((len(resources), len(edges) - 1))
+    capacity = np.zeros_like(used)
+    used[usage_map] = _per_resource_buckets(usage_frame, np.ones(len(usage_frame), bool), usage_values, edges)
+    capacity[capacity_map] = _per_resource_buckets(capacity_frame, np.ones(len(capacity_frame), bool),
+                                                   capacity_values, edges)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        loads = np.where(capacity > 0, used / capacity, np.nan)
+    return edges, resources, loads
+
+
+def format_time(seconds, is_datetime=True):
+    """Bucket edge label: UTC ISO timestamp for date-time logs, else the raw number."""
+    if is_datetime:
+        return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M')
+    return f"{seconds:g}"
+
+
+def print_kpi_report(state_frame, bucket_seconds=None, busy_states=DEFAULT_BUSY_STATES,
+                     unavailable_states=DEFAULT_UNAVAILABLE_STATES, max_buckets=24):
+    """Print per-resource utilization and state hours, and optionally a per-bucket utilization grid."""
+    print("\n" + "=" * 80)
+    print(f"  RESOURCE UTILIZATION  |  {len(state_frame):,} state log rows")
+    print("=" * 80)
+    if not len(state_frame):
+        print("  No resource state log rows.")
+        return
+    util = utilization(state_frame, busy_states, unavailable_states)
+    states = state_durations(state_frame)
+    for res in state_frame.resources:
+        hours = ', '.join(f"{s} {t / 3600:.1f}h" for s, t in sorted(states[res].items(), key=lambda kv: -kv[1]))
+        print(f"  {res:<30} {util[res]:>6.1%}   {hours}")
+
+    if bucket_seconds:
+        edges, resources, fractions = bucket_utilization(state_frame, bucket_seconds, busy_states, unavailable_states)
+        shown = min(max_buckets, fractions.shape[1])
+        print(f"\n  Utilization by {bucket_seconds / 3600:g}h bucket (first {shown} of {fractions.shape[1]}):")
+        for b in range(shown):
+            cells = '  '.join('   -  ' if np.isnan(v) else f"{v:>6.1%}" for v in fractions[:, b])
+            print(f"  {format_time(edges[b], state_frame.is_datetime):<17} {cells}")
+        print(f"  {'':<17} " + '  '.join(f"{str(r)[:6]:>6}" for r in resources))
@@ -0,0 +1,365 @@
+# run_archive.py
+"""
+Raw pass-through archive of a completed run's tables and logs.
+
+Compliance archiving wants the Portal's responses verbatim, and parsing each page
+with resp.json(), flattening and re-encoding it only costs CPU and memory. The
+archiver instead asks SimioAPI for the response body bytes (getTableDataRaw /
+getScenariosLogDataRaw) and appends them, unparsed, to one compressed stream per
+table or log:
+
+    archive_run(api, run_id, "Plan", "archive/run42", model_id=model_id)
+    python cli.py --backend rest archive 42 Plan --model-id 7 --out archive/run42
+
+Layout of an archive directory:
+
+    manifest.json              codec, run, and for each stream its file and page index
+    tables/<table>.pages.gz    one gzip member per page (.pages.zst with codec='zstd')
+    logs/<log>.pages.gz
+
+Each page is compressed as its own gzip member / zstd frame, so a stream file is a
+valid .gz / .zst whose decompressed content is the page bodies back to back, and
+the index (page -> offset, compressed length, raw length, sha256) lets RawArchive
+decompress any single page without touching the others:
+
+    archive = RawArchive("archive/run42")
+    archive.read_page("table/Orders", 7)      # bytes exactly as the Portal sent them
+    for page, rows in archive.iter_pages("log/task", decode=True): ...
+
+Paging stops at the first empty page (204 or []), since a short page can't be
+detected without parsing it; that costs one extra request per stream. A page that
+comes back as None (re-authentication failed) raises instead of ending the stream,
+and the archive is left without a manifest. zstd needs
+the optional zstandard package (pip install zstandard). pysimio only returns
+parsed JSON, so archiving needs the REST backend.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from run_context import RunContext
+
+MANIFEST = "manifest.json"
+FORMAT = "simio-raw-archive"
+VERSION = 1
+CODECS = ('gzip', 'zstd')
+_EXTENSIONS = {'gzip': '.pages.gz', 'zstd': '.pages.zst'}
+# shared_helper.LOG_ENDPOINTS keys; the URL log type is '<name>-log'
+LOG_NAMES = ('resource-usage', 'resource-state', 'resource-capacity', 'task', 'constraint')
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("The zstd codec needs the zstandard package. Install it with: pip install zstandard")
+    return zstandard
+
+
+def _compressor(codec, level):
+    """Function compressing one page into a self-contained gzip member / zstd frame."""
+    if codec == 'gzip':
+        return lambda data: gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    if codec == 'zstd':
+        return _zstandard().ZstdCompressor(level=3 if level is None else level).compress
+    raise ValueError(f"Unknown codec '{codec}' (expected one of {', '.join(CODECS)}).")
+
+
+def _decompressor(codec):
+    if codec == 'gzip':
+        return gzip.decompress
+    if codec == 'zstd':
+        return _zstandard().ZstdDecompressor().decompress
+    raise ValueError(f"Unknown codec '{codec}' (expected one of {', '.join(CODECS)}).")
+
+
+def _is_last_page(method_name, page, body):
+    """
+    True for the end of a paged stream: a 204 (b'') or an empty JSON array. None means
+    the request failed (SimioAPI returns it when re-authentication fails) and raises,
+    so a lost token can't end an archive early and leave it silently truncated.
+    """
+    if body is None:
+        raise RuntimeError(f"{method_name} returned no response for page {page} "
+                           f"(re-authentication failed?); the stream is incomplete.")
+    body = body.strip()
+    return body == b'' or (body[:1] == b'[' and body[-1:] == b']' and not body[1:-1].strip())
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class _StreamWriter:
+    """Appends compressed pages to one stream file (written as .tmp, moved into place on close)."""
+
+    def __init__(self, archive, key, entry):
+        self.archive = archive
+        self.key = key
+        self.entry = entry
+        self.path = os.path.join(archive.path, entry['file'])
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path + ".tmp", 'wb')
+        self._offset = 0
+
+    def write_page(self, page, body):
+        """Store one page body (bytes) as received."""
+        member = self.archive._compress(body)
+        self._file.write(member)
+        self.entry['pages'].append({'page': page, 'offset': self._offset, 'length': len(member),
+                                    'raw_length': len(body), 'sha256': hashlib.sha256(body).hexdigest()})
+        self._offset += len(member)
+        self.entry['raw_bytes'] += len(body)
+        self.entry['stored_bytes'] += len(member)
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self.path + ".tmp", self.path)
+
+
+class RawArchiveWriter:
+    """Writes an archive directory; the manifest is written last, so an interrupted archive has none."""
+
+    def __init__(self, path, codec='gzip', level=None, **meta):
+        self.path = path
+        self.codec = codec
+        self._compress = _compressor(codec, level)
+        self.manifest = {'format': FORMAT, 'version': VERSION, 'codec': codec,
+                         'created': time.strftime("%Y-%m-%dT%H:%M:%S"), **meta, 'streams': {}}
+        self._streams = []
+        os.makedirs(path, exist_ok=True)
+
+    def stream(self, kind, name, **meta):
+        """Start the stream '<kind>/<name>' (kind 'table' or 'log'); returns a writer with write_page()."""
+        key = f"{kind}/{name}"
+        if key in self.manifest['streams']:
+            raise ValueError(f"Stream '{key}' is already in the archive.")
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+        entry = {'kind': kind, 'name': name, 'file': f"{kind}s/{safe}{_EXTENSIONS[self.codec]}", **meta,
+                 'raw_bytes': 0, 'stored_bytes': 0, 'pages': []}
+        self.manifest['streams'][key] = entry
+        writer = _StreamWriter(self, key, entry)
+        self._streams.append(writer)
+        return writer
+
+    def close(self):
+        for writer in self._streams:
+            writer.close()
+        manifest_path = os.path.join(self.path, MANIFEST)
+        with open(manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            for writer in self._streams:
+                if writer._file is not None:
+                    writer._file.close()
+
+
+def iter_raw_pages(api, method_name, page_size, concurrency=1, **kwargs):
+    """
+    Yield (page_number, body bytes) from a raw endpoint until the first empty page
+    (a 204 or []). Raises RuntimeError when a page comes back as None.
+
+    With concurrency > 1 up to that many pages are requested ahead at once (on the
+    ThreadedAPI pool when the api provides submit(), otherwise on a local pool); pages
+    are yielded in order, and look-ahead requests past the end are discarded.
+    """
+    if concurrency <= 1:
+        fetch = getattr(api, method_name)
+        page = 1
+        while True:
+            body = fetch(page=page, pageSize=page_size, **kwargs)
+            if _is_last_page(method_name, page, body):
+                return
+            yield page, body
+            page += 1
+
+    own_pool = None
+    if hasattr(api, 'submit'):
+        submit = lambda page: api.submit(method_name, page=page, pageSize=page_size, **kwargs)
+    else:
+        own_pool = ThreadPoolExecutor(max_workers=concurrency)
+        submit = lambda page: own_pool.submit(getattr(api, method_name), page=page, pageSize=page_size, **kwargs)
+    window = deque((page, submit(page)) for page in range(1, concurrency + 1))
+    next_page = concurrency + 1
+    try:
+        while window:
+            page, future = window.popleft()
+            body = future.result()
+            if _is_last_page(method_name, page, body):
+                break
+            yield page, body
+            window.append((next_page, submit(next_page)))
+            next_page += 1
+    finally:
+        for _, future in window:
+            future.cancel()
+        if own_pool is not None:
+            own_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def archive_run(api, run_id, scenario_name, path, tables=None, logs=None, model_id=None, page_size=500,
+                concurrency=1, codec='gzip', level=None, context=None, verbose=True):
+    """
+    Archive a run's tables (default: every table of the model) and logs (default: all; pass () for none)
+    into path without parsing any page. Returns the manifest.
+    """
+    if not hasattr(api, 'getTableDataRaw'):
+        raise RuntimeError("Raw archiving needs the REST backend (SimioAPI); pysimio only returns parsed JSON.")
+    if tables is None:
+        tables = (context or RunContext(api, run_id, model_id)).table_names()
+    logs = LOG_NAMES if logs is None else logs
+
+    jobs = [('table', name, 'getTableDataRaw', {'runId': run_id, 'scenarioName': scenario_name, 'tableName': name})
+            for name in tables]
+    jobs += [('log', name, 'getScenariosLogDataRaw', {'runId': run_id, 'logType': f"{name}-log"}) for name in logs]
+
+    with RawArchiveWriter(path, codec=codec, level=level, run_id=run_id, scenario=scenario_name,
+                          model_id=model_id, page_size=page_size) as archive:
+        for kind, name, method_name, kwargs in jobs:
+            start = time.perf_counter()
+            stream = archive.stream(kind, name, endpoint=method_name)
+            for page, body in iter_raw_pages(api, method_name, page_size, concurrency, **kwargs):
+                stream.write_page(page, body)
+            stream.close()
+            if verbose:
+                entry = stream.entry
+                print(f"  {kind + '/' + name:<40} {len(entry['pages']):>6} pages  {entry['raw_bytes'] / 1024:>10.1f} KB"
+                      f" -> {entry['stored_bytes'] / 1024:>9.1f} KB  {time.perf_counter() - start:>7.2f} s")
+    return archive.manifest
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class RawArchive:
+    """Lazy, random-access reader for an archive directory written by RawArchiveWriter / archive_run."""
+
+    def __init__(self, path):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No {MANIFEST} in '{path}' (not an archive, or the archive was interrupted).")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != FORMAT:
+            raise ValueError(f"'{path}' is not a {FORMAT} archive.")
+        self.codec = self.manifest['codec']
+        self._decompress = _decompressor(self.codec)
+        self._index = {}
+
+    def streams(self, kind=None):
+        """Stream keys ('table/<name>', 'log/<name>'), optionally only one kind."""
+        return [key for key, entry in self.manifest['streams'].items() if kind is None or entry['kind'] == kind]
+
+    def _entry(self, key):
+        try:
+            return self.manifest['streams'][key]
+        except KeyError:
+            raise KeyError(f"No stream '{key}' in the archive (have: {', '.join(self.streams())}).") from None
+
+    def pages(self, key):
+        """Page numbers stored for a stream, in order."""
+        return [p['page'] for p in self._entry(key)['pages']]
+
+    def _page(self, key, page):
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = {p['page']: p for p in self._entry(key)['pages']}
+        try:
+            return index[page]
+        except KeyError:
+            raise KeyError(f"Stream '{key}' has no page {page}.") from None
+
+    def _read(self, f, info, verify):
+        f.seek(info['offset'])
+        body = self._decompress(f.read(info['length']))
+        if verify and hashlib.sha256(body).hexdigest() != info['sha256']:
+            raise ValueError(f"Page {info['page']} failed its sha256 check.")
+        return body
+
+    def read_page(self, key, page, verify=False):
+        """The body bytes of one page, as the Portal sent them; only that page is read and decompressed."""
+        info = self._page(key, page)
+        with open(os.path.join(self.path, self._entry(key)['file']), 'rb') as f:
+            return self._read(f, info, verify)
+
+    def decode_page(self, key, page):
+        """One page parsed as JSON (a list of rows)."""
+        return json.loads(self.read_page(key, page))
+
+    def iter_pages(self, key, decode=False, verify=False):
+        """Yield (page_number, body bytes, or parsed rows with decode=True) one page at a time."""
+        entry = self._entry(key)
+        with open(os.path.join(self.path, entry['file']), 'rb') as f:
+            for info in entry['pages']:
+                body = self._read(f, info, verify)
+                yield info['page'], (json.loads(body) if decode else body)
+
+    def iter_rows(self, key):
+        """Every row of a stream, decoding one page at a time (table rows keep the nested properties/states format)."""
+        for _, rows in self.iter_pages(key, decode=True):
+            yield from rows
+
+    def verify(self):
+        """Check every page against its recorded sha256; returns [(stream, page)] that failed."""
+        failed = []
+        for key in self.streams():
+            entry = self._entry(key)
+            with open(os.path.join(self.path, entry['file']), 'rb') as f:
+                for info in entry['pages']:
+                    try:
+                        self._read(f, info, verify=True)
+                    except Exception:
+                        failed.append((key, info['page']))
+        return failed
+
+
+def print_archive_summary(path, verify=False):
+    """Print each stream's pages and raw/stored size, optionally verifying every page."""
+    archive = RawArchive(path)
+    m = archive.manifest
+    print("\n" + "=" * 80)
+    print(f"  RUN ARCHIVE: {path}  |  Run ID: {m.get('run_id', '?')}  |  Scenario: {m.get('scenario', '?')}"
+          f"  |  {m['codec']}")
+    print("=" * 80)
+    raw_total = stored_total = 0
+    for key in archive.streams():
+        entry = m['streams'][key]
+        raw_total += entry['raw_bytes']
+        stored_total += entry['stored_bytes']
+        ratio = entry['raw_bytes'] / entry['stored_bytes'] if entry['stored_bytes'] else 0
+        print(f"  {key:<40} {len(entry['pages']):>6} pages  {entry['raw_bytes'] / 1024:>10.1f} KB"
+              f" -> {entry['stored_bytes'] / 1024:>9.1f} KB  ({ratio:.1f}x)")
+    print(f"  {'─' * 60}")
+    print(f"  Total: {raw_total / 1024:,.1f} KB raw, {stored_total / 1024:,.1f} KB stored  |  Created: {m.get('created', '?')}")
+    if verify:
+        failed = archive.verify()
+        print(f"  Verify: {'all pages OK' if not failed else f'{len(failed)} page(s) FAILED: {failed[:10]}'}")
+        return not failed
+    return True
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = [a for a in sys.argv[1:] if a != "--verify"]
+    if len(args) != 1:
+        sys.exit("usage: python run_archive.py ARCHIVE_DIR [--verify]")
+    sys.exit(0 if print_archive_summary(args[0], verify="--verify" in sys.argv) else 1)
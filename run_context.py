@@ -0,0 +1,153 @@
+# run_context.py
+"""
+Run-scoped metadata cache shared by the display helpers.
+
+One main.py execution needs the same metadata several times: getScenarios for the
+control values and again for table discovery on the 204 path, getModelTable for
+the schema display and again for the table prompt, and the table names each time.
+A RunContext loads each piece lazily on first use and keeps it for the run:
+
+    context = RunContext(api, run_id=new_run_id, model_id=model_id)
+    display_and_update_control_values(api, new_run_id, plan_name, context=context)
+    table_names = display_table_schema(api, model_id, new_run_id, context=context)
+    prompt_table_selection(api, model_id, new_run_id, context=context)   # no refetch
+
+Loads are single-flight: when several threads ask for the same piece at once (a
+prefetch task and a display helper, say) one request is sent and the others wait
+for its result. A failed load is not cached; an empty one (None, or {} from a 204)
+is, like any other answer, until invalidate() asks for it again. Loads still running
+when bind() switches to another run or model are discarded, not stored. Works with both pysimio (pySimio) and
+direct REST API (SimioAPI) objects.
+"""
+import threading
+
+from api_metrics import registry as metrics
+
+
+class _Pending:
+    """A load in progress: waiters block on done until the loading thread stores result or error."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RunContext:
+    """Lazily loaded, memoized scenarios, table schemas, log schemas and table inventory for one run."""
+
+    def __init__(self, api, run_id=None, model_id=None):
+        self.api = api
+        self.run_id = run_id
+        self.model_id = model_id
+        self._lock = threading.Lock()
+        self._values = {}
+        self._pending = {}
+        self._generation = 0         # bumped by bind(); loads started before it are not stored
+
+    def bind(self, run_id=None, model_id=None):
+        """Set the run and/or model, dropping cached data that belonged to a different one."""
+        with self._lock:
+            stale = []
+            if run_id is not None and run_id != self.run_id:
+                self.run_id = run_id
+                stale += ['scenarios', 'log_schema', 'table_names']
+            if model_id is not None and model_id != self.model_id:
+                self.model_id = model_id
+                stale += ['table_schema', 'table_names']
+            if stale:
+                self._generation += 1
+                for key in stale:
+                    self._values.pop(key, None)
+                    self._pending.pop(key, None)
+        return self
+
+    # -- Single-flight loading ----------------------------------------------
+
+    def _get(self, key, load):
+        with self._lock:
+            if key in self._values:
+                metrics.record_cache('run_context', True)
+                return self._values[key]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+                generation = self._generation
+        if not owner:
+            metrics.record_cache('run_context', True)
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        metrics.record_cache('run_context', False)
+        try:
+            pending.result = load()
+        except BaseException as e:
+            pending.error = e
+            raise
+        else:
+            with self._lock:
+                if self._generation == generation:
+                    self._values[key] = pending.result
+            return pending.result
+        finally:
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+            pending.done.set()
+
+    def set(self, key, value):
+        """Store already-fetched data ('scenarios', 'table_schema' or 'log_schema'), e.g. from a prefetch."""
+        with self._lock:
+            self._values[key] = value
+            if key in ('scenarios', 'table_schema'):
+                self._values.pop('table_names', None)
+
+    def invalidate(self, key=None):
+        """Forget one cached piece (or everything) so the next use fetches it again."""
+        with self._lock:
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+
+    # -- Metadata -----------------------------------------------------------
+
+    def scenarios(self):
+        """getScenarios for the run."""
+        return self._get('scenarios', lambda: self.api.getScenarios(run_id=self.run_id))
+
+    def controls(self, scenario_name):
+        """The controlValues list of one scenario (the cached list itself, so updates stay visible)."""
+        for sc in (self.scenarios() or []):
+            if sc.get('scenarioName') == scenario_name:
+                return sc.get('controlValues') or []
+        return []
+
+    def table_schema(self):
+        """getModelTable for the model ({} or None when the portal returns no schemas)."""
+        return self._get('table_schema', lambda: self.api.getModelTable(self.model_id))
+
+    def log_schema(self):
+        """getScenariosLogSchemas for the run."""
+        return self._get('log_schema', lambda: self.api.getScenariosLogSchemas(runId=self.run_id))
+
+    def table_names(self):
+        """Table names from the table schema, or from the scenarios' activeTableBindings when there is none."""
+        return self._get('table_names', self._discover_table_names)
+
+    def _discover_table_names(self):
+        schema = self.table_schema() if self.model_id is not None else None
+        if schema and isinstance(schema, list):
+            return [t.get('name', '?') for t in schema]
+        names = []
+        scenario_data = self.scenarios()
+        if scenario_data and isinstance(scenario_data, list):
+            for sc in scenario_data:
+                for b in (sc.get('activeTableBindings') or []):
+                    tname = b.get('tableName', '?')
+                    if tname not in names:
+                        names.append(tname)
+        return names
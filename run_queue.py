@@ -0,0 +1,302 @@
+# run_queue.py
+"""
+Concurrency-capped run submission queue for the Simio Portal Web API.
+Accepts many plan jobs (existing run IDs) with priorities, keeps at most
+max_in_flight runs started at once, and starts the next job as soon as a run
+reaches a terminal status on the progress endpoint. Queue state can be
+persisted to a JSON file so an interrupted process resumes where it left off.
+Works with both pysimio (pySimio) and direct REST API (SimioAPI) objects.
+
+Standalone usage:
+    python run_queue.py queue.json add <run_id> [--priority N] [--plan NAME]
+    python run_queue.py queue.json run [--max-in-flight N] [--refresh S]
+    python run_queue.py queue.json status
+"""
+import heapq
+import json
+import os
+import time
+
+from shared_helper import TERMINAL_STATUSES
+
+
+class RunSubmissionQueue:
+    """
+    Priority queue of plan runs with a cap on how many are in flight at once.
+
+    Higher priority values start first; jobs with equal priority start in the order they were added.
+    """
+
+    def __init__(self, api, max_in_flight=2, state_path=None, refresh_interval=5, on_finished=None,
+                 job_timeout=None, max_failed_polls=10):
+        self.api = api
+        self.max_in_flight = max_in_flight
+        self.state_path = state_path
+        self.refresh_interval = refresh_interval
+        self.on_finished = on_finished
+        self.job_timeout = job_timeout              # seconds from start before a job ends as 'TimedOut'
+        self.max_failed_polls = max_failed_polls    # failed polls in a row before a job ends as 'Unknown'
+        self._pending = []      # heap of (-priority, seq, job)
+        self._in_flight = {}    # run_id -> job
+        self._finished = []
+        self._seq = 0
+        if state_path and os.path.exists(state_path):
+            self.load_state()
+
+    # -- Jobs ---------------------------------------------------------------
+
+    def add_job(self, run_id, plan_name=None, priority=0, run_replications=False):
+        """Queue an existing (created and configured) run to be started. Returns the job dict."""
+        self._seq += 1
+        job = {
+            'seq': self._seq,
+            'run_id': run_id,
+            'plan_name': plan_name or str(run_id),
+            'priority': priority,
+            'run_replications': run_replications,
+            'status': 'Queued',
+            'started_at': None,
+            'finished_at': None,
+        }
+        heapq.heappush(self._pending, (-priority, self._seq, job))
+        self.save_state()
+        return job
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    @property
+    def in_flight_count(self):
+        return len(self._in_flight)
+
+    @property
+    def finished_jobs(self):
+        return list(self._finished)
+
+    # -- Scheduling ---------------------------------------------------------
+
+    def _start_next(self):
+        """Pop the highest-priority job and start it."""
+        _, _, job = heapq.heappop(self._pending)
+        # Record the job as in flight before the call; a crash before the call completes leaves it
+        # 'Starting', and run() re-checks such jobs on resume (see _recover_starting)
+        job['status'] = 'Starting'
+        job['started_at'] = time.time()
+        self._in_flight[job['run_id']] = job
+        self.save_state()
+        self._submit(job)
+
+    def _submit(self, job):
+        try:
+            started = self.api.startRunFromExisting(existingExperimentRunId=job['run_id'], runPlan=True,
+                                                    runReplications=job['run_replications'])
+        except Exception as e:
+            job['error'] = str(e)
+            self._finish(job, 'StartFailed')
+        else:
+            if started:
+                job['status'] = 'NotStarted'
+                print(f"  Started plan '{job['plan_name']}' (run_id {job['run_id']}, priority {job['priority']}) "
+                      f"— {len(self._in_flight)}/{self.max_in_flight} slots in use")
+            else:
+                # SimioAPI returns None when the call still fails after re-authenticating
+                job['error'] = "startRunFromExisting returned no result"
+                self._finish(job, 'StartFailed')
+        self.save_state()
+
+    def _recover_starting(self):
+        """
+        Resolve jobs left 'Starting' by a crash. The portal reports a run as NotStarted both before
+        and just after a start is accepted, so such jobs are never started again: they stay in flight
+        (holding their slot) and are flagged start_unconfirmed for the operator to check.
+        """
+        for job in [j for j in self._in_flight.values() if j['status'] == 'Starting']:
+            try:
+                progress = self.api.getRunProgress(job['run_id'])
+            except Exception as e:
+                print(f"  Error checking run_id {job['run_id']} on resume: {e}")
+                continue
+            status = progress.get('status') if progress and isinstance(progress, dict) else None
+            if status == 'NotStarted':
+                job['status'] = status
+                job['start_unconfirmed'] = True
+                print(f"  Plan '{job['plan_name']}' (run_id {job['run_id']}) was being started when the queue "
+                      f"stopped and is still NotStarted; not re-submitting it. Check the run and re-add it "
+                      f"if it never started.")
+            elif status in TERMINAL_STATUSES:
+                self._finish(job, status)
+            elif status:
+                job['status'] = status
+        self.save_state()
+
+    def _fill_slots(self):
+        while self._pending and len(self._in_flight) < self.max_in_flight:
+            self._start_next()
+
+    def _finish(self, job, status):
+        job['status'] = status
+        job['finished_at'] = time.time()
+        self._in_flight.pop(job['run_id'], None)
+        self._finished.append(job)
+        print(f"  Plan '{job['plan_name']}' (run_id {job['run_id']}) ended with status: {status}")
+        if self.on_finished:
+            self.on_finished(job)
+
+    def _abandon(self, job, status):
+        """
+        Stop waiting for a run ('TimedOut' or 'Unknown'): cancel it on the portal and release its slot.
+        While the cancel fails and other jobs are waiting, the slot stays taken (the run may still be
+        using a portal slot) and the cancel is retried on the next poll.
+        """
+        try:
+            canceled = self.api.cancelRun(job['run_id'])
+        except Exception as e:
+            canceled = False
+            job['cancel_error'] = str(e)
+        if canceled or not self._pending:
+            job.pop('cancel_pending', None)
+            self._finish(job, status)
+        else:
+            job['cancel_pending'] = status
+            print(f"  Could not cancel run_id {job['run_id']} ({status}); keeping its slot and retrying")
+
+    def _poll_in_flight(self):
+        """Check getRunProgress for every in-flight run and release slots for finished ones."""
+        for job in list(self._in_flight.values()):
+            if job.get('cancel_pending'):
+                try:
+                    progress = self.api.getRunProgress(job['run_id'])
+                except Exception:
+                    progress = None
+                status = progress.get('status') if progress and isinstance(progress, dict) else None
+                if status in TERMINAL_STATUSES:
+                    job.pop('cancel_pending')
+                    self._finish(job, status)
+                else:
+                    self._abandon(job, job['cancel_pending'])
+                continue
+            try:
+                progress = self.api.getRunProgress(job['run_id'])
+            except Exception as e:
+                print(f"  Error polling run_id {job['run_id']}: {e}")
+                progress = None
+            if not progress or not isinstance(progress, dict):
+                job['failed_polls'] = job.get('failed_polls', 0) + 1
+                if job['failed_polls'] >= self.max_failed_polls:
+                    job['error'] = f"getRunProgress failed {job['failed_polls']} time(s) in a row"
+                    self._abandon(job, 'Unknown')
+                    continue
+            else:
+                job['failed_polls'] = 0
+                status = progress.get('status', job['status'])
+                if status in TERMINAL_STATUSES:
+                    self._finish(job, status)
+                    continue
+                job['status'] = status
+            if self.job_timeout and time.time() - (job['started_at'] or time.time()) > self.job_timeout:
+                job['error'] = f"still '{job['status']}' after {self.job_timeout} s"
+                self._abandon(job, 'TimedOut')
+        self.save_state()
+
+    def run(self):
+        """Start and monitor jobs until the queue is drained. Returns the list of finished jobs."""
+        print(f"\n  Run queue: {len(self._pending)} pending, {len(self._in_flight)} in flight, "
+              f"max {self.max_in_flight} in flight")
+        self._recover_starting()
+        self._fill_slots()
+        while self._in_flight:
+            time.sleep(self.refresh_interval)
+            self._poll_in_flight()
+            self._fill_slots()
+        print(f"  Run queue drained: {len(self._finished)} job(s) finished")
+        return self.finished_jobs
+
+    # -- Persistence --------------------------------------------------------
+
+    def save_state(self):
+        """Write pending, in-flight and finished jobs to state_path (atomically). No-op without a state_path."""
+        if not self.state_path:
+            return
+        state = {
+            'seq': self._seq,
+            'pending': [job for _, _, job in sorted(self._pending)],
+            'in_flight': list(self._in_flight.values()),
+            'finished': self._finished,
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def load_state(self):
+        """
+        Restore queue state from state_path. In-flight jobs are resumed by polling; jobs a crash left
+        'Starting' are checked by run() (see _recover_starting).
+        """
+        with open(self.state_path) as f:
+            state = json.load(f)
+        self._seq = state.get('seq', 0)
+        self._pending = [(-job['priority'], job['seq'], job) for job in state.get('pending', [])]
+        heapq.heapify(self._pending)
+        self._in_flight = {job['run_id']: job for job in state.get('in_flight', [])}
+        self._finished = state.get('finished', [])
+
+    def print_status(self):
+        """Print pending, in-flight and finished jobs."""
+        print(f"\n  {'─' * 60}")
+        print(f"  Run Queue Status ({self.state_path or 'in memory'})")
+        print(f"  {'─' * 60}")
+        for label, jobs in (("Pending", [job for _, _, job in sorted(self._pending)]),
+                            ("In flight", list(self._in_flight.values())),
+                            ("Finished", self._finished)):
+            print(f"  {label}: {len(jobs)}")
+            for job in jobs:
+                flag = "  (start unconfirmed)" if job.get('start_unconfirmed') else ""
+                print(f"    - {job['plan_name']:<30} run_id={job['run_id']}  priority={job['priority']}  {job['status']}{flag}")
+        print(f"  {'─' * 60}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Concurrency-capped Simio Portal run submission queue")
+    parser.add_argument("state_path", help="JSON file holding the queue state")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="queue an existing run")
+    add.add_argument("run_id", type=int)
+    add.add_argument("--priority", type=int, default=0)
+    add.add_argument("--plan", dest="plan_name")
+    add.add_argument("--replications", action="store_true", help="start with runReplications=True")
+    run = sub.add_parser("run", help="start queued runs and wait for the queue to drain")
+    run.add_argument("--max-in-flight", type=int, default=2)
+    run.add_argument("--refresh", type=float, default=5, help="seconds between progress polls")
+    run.add_argument("--job-timeout", type=float, help="seconds after its start before a job ends as TimedOut")
+    sub.add_parser("status", help="show the queue")
+    args = parser.parse_args()
+
+    api = None
+    if args.command == "run":
+        from dotenv import load_dotenv
+        from shared_helper import load_backend
+
+        load_dotenv(override=True)
+        personal_access_token = os.getenv("PERSONAL_ACCESS_TOKEN")
+        if not personal_access_token:
+            raise ValueError("Personal access token not found. Make sure it's set in the environment.")
+        API, _ = load_backend()
+        api = API(os.getenv("SIMIO_PORTAL_URL"))
+        api.authenticate(personalAccessToken=personal_access_token)
+
+    queue = RunSubmissionQueue(api, state_path=args.state_path)
+    if args.command == "add":
+        job = queue.add_job(args.run_id, plan_name=args.plan_name, priority=args.priority,
+                            run_replications=args.replications)
+        print(f"  Queued run_id {job['run_id']} as job {job['seq']} (priority {job['priority']})")
+    elif args.command == "run":
+        queue.max_in_flight = args.max_in_flight
+        queue.refresh_interval = args.refresh
+        queue.job_timeout = args.job_timeout
+        queue.run()
+    else:
+        queue.print_status()
@@ -7,6 +7,16 @@ import sys
 import time
 import os
 import json
+import inspect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from portal_catalog import PortalCatalog
+from api_metrics import registry as metrics
+from run_context import RunContext
+from spill_buffer import SpillableRowBuffer, default_memory_budget
+
+# getRunProgress statuses after which a run makes no further progress
+TERMINAL_STATUSES = ("Complete", "Failed", "Canceled")
 
 def refresh_auth_token(api, refresh_interval):
     """
@@ -23,18 +33,46 @@ def refresh_auth_token(api, refresh_interval):
         except Exception as e:
             print(f"Error refreshing token: {e}")
         time.sleep(refresh_interval)
+def load_backend(use_pysimio=None):
+    """
+    Imports the API backend selected by USE_PYSIMIO, only when it is needed.
+
+    Parameters:
+        use_pysimio (bool): Overrides the USE_PYSIMIO environment variable (default True, or False
+            when SIMIO_CASSETTE_RECORD / SIMIO_CASSETTE_REPLAY is set).
+
+    Returns:
+        tuple: (API class, TimeOptions class) — (pySimio, pysimio.classes.TimeOptions) or (SimioAPI, TimeOptions).
+    """
+    if use_pysimio is None:
+        # Cassette record/replay (cassette.py) hooks into SimioAPI's transport, so it implies the REST backend
+        cassette = os.getenv("SIMIO_CASSETTE_RECORD") or os.getenv("SIMIO_CASSETTE_REPLAY")
+        use_pysimio = not cassette and os.getenv("USE_PYSIMIO", "True").strip().lower() not in ("false", "0", "no")
+    if use_pysimio:
+        from pysimio import pySimio
+        from pysimio.classes import TimeOptions
+        return pySimio, TimeOptions
+    from simio_api_helper import SimioAPI, TimeOptions
+    return SimioAPI, TimeOptions
+
 def find_modelid_by_projectname(modellist_json, targetproject):
     """
     Finds the model ID by project name. When multiple projects share the same
     name, returns the model ID for the one with the highest projectId.
 
     Parameters:
-        modellist (list): List of models.
+        modellist (list | PortalCatalog): List of models, or a catalog for an O(1) lookup.
         targetproject (str): Target project name.
 
     Returns:
         int: The model ID if found, otherwise exits.
     """
+    if isinstance(modellist_json, PortalCatalog):
+        model_id = modellist_json.model_id_for_project(targetproject)
+        if model_id is None:
+            print(f"Model '{targetproject}' not found.")
+            sys.exit()
+        return model_id
     matches = [item for item in modellist_json if item.get('projectName') == targetproject]
     if not matches:
         print(f"Model '{targetproject}' not found.")
@@ -53,6 +91,9 @@ def find_parent_run_id(json_data, run_name):
     Returns:
         int: The parent run ID if found, otherwise 0.
     """
+    if isinstance(json_data, PortalCatalog):
+        run = json_data.run_by_name(run_name)
+        return run.get('id', 0) if run else 0
     for item in json_data:
         if item.get('name') == run_name:
             return item.get('id', 0)
@@ -126,40 +167,148 @@ def get_parent_experiment_id(data, project_name):
     # Retrieves the experiment ID for a given project name from the JSON dataset.
     #
     # Parameters:
-    #     data (list): A list of dictionaries representing JSON data.
+    #     data (list | PortalCatalog): A list of dictionaries representing JSON data, or a catalog.
     #     project_name (str): The name of the project to find the experiment ID for.
     #
     # Returns:
     #     int or None: The experiment ID if found, otherwise None.
+    if isinstance(data, PortalCatalog):
+        return data.experiment_id_for_project(project_name)
     for entry in data:
         if entry.get("projectName") == project_name:
             return entry.get("experimentId")
     return None  # Return None if no match is found
 
 
-def display_and_update_control_values(api, run_id, scenario_name):
-    """Fetch control values via getScenarios, display them, and prompt the user to adjust any before running."""
-    scenario_data = api.getScenarios(run_id=run_id)
-    controls = []
+def get_scenario_controls(scenario_data, scenario_name):
+    """Return the controlValues list for scenario_name from a getScenarios response (empty if not found)."""
     if scenario_data and isinstance(scenario_data, list):
         for sc in scenario_data:
             if sc.get('scenarioName') == scenario_name:
-                controls = sc.get('controlValues') or []
-                break
+                return sc.get('controlValues') or []
+    return []
+
+
+def load_control_values_file(path):
+    """Load a {control_name: value} mapping from a .json, .yaml or .yml file."""
+    with open(path) as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required to read YAML control value files (pip install pyyaml).")
+            values = yaml.safe_load(f)
+        else:
+            values = json.load(f)
+    if not isinstance(values, dict):
+        raise ValueError(f"Control value file '{path}' must contain a mapping of control name to value.")
+    return values
+
 
+def apply_control_values(api, run_id, scenario_name, desired, current_controls=None, max_workers=8):
+    """
+    Applies a set of control values in bulk, sending only the ones that differ from the current values.
+
+    Parameters:
+        api (object): pySimio or SimioAPI object.
+        run_id (int): Run whose scenario is updated.
+        scenario_name (str): Scenario (plan) name.
+        desired (dict): {control_name: value} to apply.
+        current_controls (list): controlValues list already in hand; fetched via getScenarios when None.
+        max_workers (int): Maximum concurrent setControlValues calls.
+
+    Returns:
+        dict: control_name -> {'old', 'new', 'status', 'error'} where status is one of
+              'updated', 'unchanged', 'unknown' (no such control) or 'failed'.
+    """
+    if current_controls is None:
+        current_controls = get_scenario_controls(api.getScenarios(run_id=run_id), scenario_name)
+    current = {c.get('name'): c for c in current_controls}
+
+    report = {}
+    changed = {}
+    for name, value in desired.items():
+        value = str(value)
+        if name not in current:
+            report[name] = {'old': None, 'new': value, 'status': 'unknown', 'error': None}
+        elif str(current[name].get('value', '')) == value:
+            report[name] = {'old': value, 'new': value, 'status': 'unchanged', 'error': None}
+        else:
+            report[name] = {'old': current[name].get('value', ''), 'new': value, 'status': 'failed', 'error': None}
+            changed[name] = value
+
+    def send(name):
+        result = api.setControlValues(runId=run_id, scenarioName=scenario_name, controlName=name,
+                                      controlValue=changed[name])
+        # SimioAPI returns None when the call still fails after re-authenticating; pySimio can return False
+        if result is None or result is False:
+            raise RuntimeError("setControlValues returned no result")
+
+    if changed:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(changed))) as pool:
+            futures = {name: pool.submit(send, name) for name in changed}
+        for name, future in futures.items():
+            try:
+                future.result()
+                report[name]['status'] = 'updated'
+                current[name]['value'] = changed[name]
+            except Exception as e:
+                report[name]['error'] = str(e)
+    return report
+
+
+def print_control_update_report(report):
+    """Print the per-control result of apply_control_values."""
+    counts = {}
+    for name, r in report.items():
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+        if r['status'] == 'updated':
+            print(f"  Updated '{name}': {r['old']} -> {r['new']}")
+        elif r['status'] == 'unknown':
+            print(f"  Skipped '{name}': no such control in this scenario")
+        elif r['status'] == 'failed':
+            print(f"  Failed  '{name}': {r['error']}")
+    print(f"  Control update: {', '.join(f'{n} {status}' for status, n in sorted(counts.items())) or 'nothing to do'}")
+
+
+def _print_control_values(controls, scenario_name, run_id):
+    name_width = max(len(c.get('name', '')) for c in controls)
     print(f"\n  {'─' * 60}")
     print(f"  Control Values for '{scenario_name}' (Run ID: {run_id})")
     print(f"  {'─' * 60}")
+    for i, ctrl in enumerate(controls, 1):
+        print(f"  {i:>3}. {ctrl.get('name', '?'):<{name_width}}  =  {ctrl.get('value', '')}")
+    print(f"  {'─' * 60}")
+
+
+def display_and_update_control_values(api, run_id, scenario_name, controls=None, values_file=None, context=None):
+    """
+    Display control values and let the user adjust any before running.
+
+    Pass controls (a controlValues list) or a RunContext to skip the getScenarios fetch. With
+    values_file the values are applied from a JSON/YAML file without prompting. Returns the
+    current controls.
+    """
+    if controls is None:
+        controls = (context or RunContext(api, run_id)).controls(scenario_name)
 
     if not controls:
+        print(f"\n  {'─' * 60}")
+        print(f"  Control Values for '{scenario_name}' (Run ID: {run_id})")
+        print(f"  {'─' * 60}")
         print("  (no control values found)")
-        return
+        return controls
 
-    # Display numbered list
-    name_width = max(len(c.get('name', '')) for c in controls)
-    for i, ctrl in enumerate(controls, 1):
-        print(f"  {i:>3}. {ctrl.get('name', '?'):<{name_width}}  =  {ctrl.get('value', '')}")
-    print(f"  {'─' * 60}")
+    _print_control_values(controls, scenario_name, run_id)
+
+    if values_file:
+        print(f"  Applying control values from '{values_file}'...")
+        report = apply_control_values(api, run_id, scenario_name, load_control_values_file(values_file),
+                                      current_controls=controls)
+        print_control_update_report(report)
+        if any(r['status'] == 'updated' for r in report.values()):
+            _print_control_values(controls, scenario_name, run_id)
+        return controls
 
     # Prompt loop
     while True:
@@ -183,34 +332,20 @@ def display_and_update_control_values(api, run_id, scenario_name):
             print("  No change made.")
             continue
 
-        api.setControlValues(runId=run_id, scenarioName=scenario_name, controlName=ctrl_name, controlValue=new_value)
-        controls[idx]['value'] = new_value
-        print(f"  Updated '{ctrl_name}' = '{new_value}'")
+        report = apply_control_values(api, run_id, scenario_name, {ctrl_name: new_value}, current_controls=controls)
+        print_control_update_report(report)
 
         # Redisplay
-        print(f"\n  {'─' * 60}")
-        print(f"  Control Values for '{scenario_name}' (Run ID: {run_id})")
-        print(f"  {'─' * 60}")
-        for i, ctrl in enumerate(controls, 1):
-            print(f"  {i:>3}. {ctrl.get('name', '?'):<{name_width}}  =  {ctrl.get('value', '')}")
-        print(f"  {'─' * 60}")
+        _print_control_values(controls, scenario_name, run_id)
+    return controls
 
 
-def prompt_table_selection(api, model_id, run_id):
+def prompt_table_selection(api, model_id, run_id, table_schema_json=None, context=None):
     """Fetch table names from schema (or scenario bindings) and let the user pick one. Returns name or None."""
-    table_schema_json = api.getModelTable(model_id)
-    table_names = []
-
-    if table_schema_json and isinstance(table_schema_json, list):
-        table_names = [t.get('name', '?') for t in table_schema_json]
-    else:
-        scenario_data = api.getScenarios(run_id=run_id)
-        if scenario_data and isinstance(scenario_data, list):
-            for sc in scenario_data:
-                for b in (sc.get('activeTableBindings') or []):
-                    tname = b.get('tableName', '?')
-                    if tname not in table_names:
-                        table_names.append(tname)
+    context = context or RunContext(api, run_id, model_id)
+    if table_schema_json is not None:
+        context.set('table_schema', table_schema_json)
+    table_names = context.table_names()
 
     if not table_names:
         print("  No tables found for this model.")
@@ -236,42 +371,180 @@ def prompt_table_selection(api, model_id, run_id):
     return None
 
 
-def display_full_table(api, run_id, scenario_name, table_name, page_size=100):
-    """Fetch all rows of a table via paging and display the full result."""
-    print("\n" + "=" * 80)
-    print(f"  FULL TABLE: {table_name}")
-    print("=" * 80)
-
-    all_rows = []
-    page = 1
-    while True:
-        result = api.getTableData(runId=run_id, scenarioName=scenario_name, tableName=table_name, page=page, pageSize=page_size)
-        if not result or not isinstance(result, list) or len(result) == 0:
-            break
-        all_rows.extend(result)
-        print(f"  Fetched page {page} ({len(result)} rows)...")
-        if len(result) < page_size:
-            break
-        page += 1
-
-    if not all_rows:
-        print(f"  Table '{table_name}' returned no data (empty or 204).")
-        return
-
-    # Flatten properties + states into flat dicts
+def flatten_table_rows(rows):
+    """Convert rows in the nested properties/states format into flat dicts."""
     flat_rows = []
-    for row in all_rows:
+    for row in (rows or []):
         flat = {}
         for p in (row.get('properties') or []):
             flat[p['name']] = p.get('value', '')
         for s in (row.get('states') or []):
             flat[s['name']] = s.get('value', '')
         flat_rows.append(flat)
+    return flat_rows
+
+
+def _iter_pages(api, method_name, page_size, concurrency, verbose, **kwargs):
+    """
+    Yield (page_number, rows) from a paged endpoint until a short or empty page (see _fetch_pages),
+    recording the pages, rows and wall time in api_metrics when the iteration ends or is abandoned.
+    """
+    start = time.perf_counter()
+    pages = rows = 0
+    try:
+        for page, result in _fetch_pages(api, method_name, page_size, concurrency, verbose, **kwargs):
+            pages += 1
+            rows += len(result)
+            yield page, result
+    finally:
+        metrics.record_paged_fetch(method_name, pages, rows, time.perf_counter() - start)
+
+
+def _fetch_pages(api, method_name, page_size, concurrency, verbose, **kwargs):
+    """
+    Yield (page_number, rows) from a paged endpoint until a short or empty page.
+
+    With concurrency > 1 up to that many pages are requested ahead at once (on the
+    ThreadedAPI pool when the api provides submit(), otherwise on a local pool);
+    pages are still yielded in order, and look-ahead requests past the end are discarded.
+    """
+    if concurrency <= 1:
+        fetch = getattr(api, method_name)
+        page = 1
+        while True:
+            result = fetch(page=page, pageSize=page_size, **kwargs)
+            if not result or not isinstance(result, list) or len(result) == 0:
+                break
+            if verbose:
+                print(f"  Fetched page {page} ({len(result)} rows)...")
+            yield page, result
+            if len(result) < page_size:
+                break
+            page += 1
+        return
+
+    own_pool = None
+    if hasattr(api, 'submit'):
+        submit = lambda page: api.submit(method_name, page=page, pageSize=page_size, **kwargs)
+    else:
+        own_pool = ThreadPoolExecutor(max_workers=concurrency)
+        submit = lambda page: own_pool.submit(getattr(api, method_name), page=page, pageSize=page_size, **kwargs)
+    window = deque((page, submit(page)) for page in range(1, concurrency + 1))
+    next_page = concurrency + 1
+    try:
+        while window:
+            page, future = window.popleft()
+            result = future.result()
+            if not result or not isinstance(result, list) or len(result) == 0:
+                break
+            if verbose:
+                print(f"  Fetched page {page} ({len(result)} rows)...")
+            yield page, result
+            if len(result) < page_size:
+                break
+            window.append((next_page, submit(next_page)))
+            next_page += 1
+    finally:
+        for _, future in window:
+            future.cancel()
+        if own_pool is not None:
+            own_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def supports_column_projection(api):
+    """True when the backend's getTableData accepts a columns argument (SimioAPI does, pySimio does not)."""
+    try:
+        return 'columns' in inspect.signature(api.getTableData).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _project_row(row, columns):
+    """Keep only the named properties/states of a nested row."""
+    return {
+        **row,
+        'properties': [p for p in (row.get('properties') or []) if p.get('name') in columns],
+        'states': [s for s in (row.get('states') or []) if s.get('name') in columns],
+    }
+
+
+def iter_table_pages(api, run_id, scenario_name, table_name, page_size=100, verbose=False, concurrency=1,
+                     columns=None, filter=None, **kwargs):
+    """
+    Yield (page_number, rows) for each non-empty page of getTableData until a short or empty page.
+
+    columns and filter (an OData string or odata_filter expression) are applied server-side.
+    Backends without column projection (pySimio) get the columns removed client-side instead.
+    """
+    if filter is not None:
+        kwargs['filter'] = str(filter)
+    project_locally = False
+    if columns:
+        if supports_column_projection(api):
+            kwargs['columns'] = list(columns)
+        else:
+            project_locally = True
+    pages = _iter_pages(api, 'getTableData', page_size, concurrency, verbose,
+                        runId=run_id, scenarioName=scenario_name, tableName=table_name, **kwargs)
+    if not project_locally:
+        return pages
+    wanted = set(columns)
+    return ((page, [_project_row(row, wanted) for row in rows]) for page, rows in pages)
+
 
+def fetch_all_table_pages(api, run_id, scenario_name, table_name, page_size=100, verbose=False, concurrency=1,
+                          memory_budget=None, spill_dir=None, **kwargs):
+    """
+    Page through getTableData (optionally several pages at a time) and return all raw rows. See iter_table_pages for columns/filter.
+
+    With memory_budget (bytes or e.g. '256MB'; default SIMIO_MEMORY_BUDGET, so every caller gets one
+    when that variable is set) the rows are returned in a SpillableRowBuffer instead of a list. It
+    moves them to a temporary file in spill_dir once they outgrow the budget (0 spills at once); call
+    its close() when done with the rows to delete that file, otherwise it goes when the buffer is
+    garbage collected.
+    """
+    if memory_budget is None:
+        memory_budget = default_memory_budget()
+    all_rows = [] if memory_budget is None else SpillableRowBuffer(memory_budget, spill_dir, name=f"getTableData[{table_name}]")
+    for _, rows in iter_table_pages(api, run_id, scenario_name, table_name, page_size, verbose=verbose,
+                                    concurrency=concurrency, **kwargs):
+        all_rows.extend(rows)
+    if memory_budget is not None:
+        all_rows.report()
+    return all_rows
+
+
+def display_full_table(api, run_id, scenario_name, table_name, page_size=100, concurrency=1, columns=None, filter=None,
+                       browse=False, memory_budget=None, spill_dir=None):
+    """
+    Page through a table (concurrency pages at a time) and display every row, printing
+    rows as pages arrive instead of after the whole table is downloaded. With browse=True
+    the rows are shown in an interactive window (see browse_table) instead; the rows it has
+    loaded are kept within memory_budget (default SIMIO_MEMORY_BUDGET), spilling to spill_dir.
+    """
+    print("\n" + "=" * 80)
+    print(f"  FULL TABLE: {table_name}")
+    print("=" * 80)
     print(f"\n  Table: {table_name}  |  Scenario: {scenario_name}  |  Run ID: {run_id}")
-    print(f"  Total rows: {len(flat_rows)}")
     print(f"  {'─' * 60}")
-    print_table(flat_rows, max_rows=len(flat_rows))
+
+    pages = iter_table_pages(api, run_id, scenario_name, table_name, page_size, concurrency=concurrency,
+                             columns=columns, filter=filter)
+    # Flatten properties + states into flat dicts, one page at a time
+    flat_rows = (row for _, rows in pages for row in flatten_table_rows(rows))
+    if browse:
+        if memory_budget is None:
+            memory_budget = default_memory_budget()
+        if memory_budget is None:
+            shown = browse_table(flat_rows)
+        else:
+            with SpillableRowBuffer(memory_budget, spill_dir, name=f"browse[{table_name}]") as store:
+                shown = browse_table(flat_rows, store=store)
+                store.report()
+    else:
+        shown = stream_table(flat_rows)
+    if not shown:
+        print(f"  Table '{table_name}' returned no data (empty or 204).")
 
 
 def print_table(data, max_rows=10, indent=2):
@@ -293,13 +566,134 @@ def print_table(data, max_rows=10, indent=2):
     print(f"{prefix}({min(len(data), max_rows)} of {len(data)} rows shown)")
 
 
-def display_table_schema(api, model_id, run_id):
-    """Fetch and display table schema, returning list of table names discovered."""
+def _column_widths(headers, sample, width_hints=None, max_width=28):
+    """Column widths from the header, a sample of rows and optional {column: width} hints."""
+    widths = []
+    for h in headers:
+        if width_hints and h in width_hints:
+            widths.append(width_hints[h])
+        else:
+            widths.append(min(max_width, max([len(h)] + [len(str(row.get(h, ''))) for row in sample])))
+    return widths
+
+
+def _format_row(values, widths):
+    return " | ".join(str(v).ljust(w)[:w] for v, w in zip(values, widths))
+
+
+def stream_table(rows, indent=2, sample_size=50, columns=None, width_hints=None, max_width=28, max_rows=None):
+    """
+    Print flat dicts as an aligned table while they stream in (e.g. from a pager), returning
+    the number of rows printed. Column widths come from width_hints and the first sample_size
+    rows, so the first row prints after sample_size rows arrive, however long the table is.
+    Columns default to the first row's keys; longer values are truncated.
+    """
+    prefix = " " * indent
+    rows = iter(rows)
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= sample_size:
+            break
+    if not sample:
+        return 0
+    headers = list(columns or sample[0].keys())
+    widths = _column_widths(headers, sample, width_hints, max_width)
+    print(prefix + _format_row(headers, widths))
+    print(prefix + "-+-".join("-" * w for w in widths))
+
+    count = 0
+    for row in (sample if max_rows is None else sample[:max_rows]):
+        print(prefix + _format_row((row.get(h, '') for h in headers), widths))
+        count += 1
+    for row in rows:
+        if max_rows is not None and count >= max_rows:
+            break
+        print(prefix + _format_row((row.get(h, '') for h in headers), widths))
+        count += 1
+    print(f"{prefix}({count} rows shown)")
+    return count
+
+
+class _LazyRows:
+    """List-like view of a row iterator that only pulls rows as they are indexed (into store, default a list)."""
+
+    def __init__(self, rows, store=None):
+        self._source = iter(rows)
+        self._rows = rows if isinstance(rows, list) else (store if store is not None else [])
+        self.exhausted = isinstance(rows, list)
+
+    def fill(self, n):
+        """Make sure the first n rows are loaded (or the source is exhausted); return how many are."""
+        while not self.exhausted and len(self._rows) < n:
+            row = next(self._source, None)
+            if row is None:
+                self.exhausted = True
+            else:
+                self._rows.append(row)
+        return len(self._rows)
+
+    def window(self, start, size):
+        self.fill(start + size)
+        return self._rows[start:start + size]
+
+
+def browse_table(rows, window_rows=None, indent=2, columns=None, width_hints=None, max_width=28,
+                 input_fn=input, store=None):
+    """
+    Interactive windowed view of flat dicts. Only the visible slice is formatted, and rows
+    are pulled from rows (a list or a streaming iterator) only as the window reaches them.
+    Pulled rows are kept in store (default a list; e.g. a SpillableRowBuffer) for paging back.
+    Commands: Enter/n next, p previous, g <row> go to row, q quit.
+    Returns the number of rows loaded.
+    """
+    import shutil
+
+    window_rows = window_rows or max(5, shutil.get_terminal_size((100, 30)).lines - 6)
+    prefix = " " * indent
+    lazy = _LazyRows(rows, store)
+    first = lazy.window(0, window_rows)
+    if not first:
+        return 0
+    headers = list(columns or first[0].keys())
+    start = 0
+    while True:
+        visible = lazy.window(start, window_rows)
+        widths = _column_widths(headers, visible, width_hints, max_width)
+        print(prefix + _format_row(headers, widths))
+        print(prefix + "-+-".join("-" * w for w in widths))
+        for row in visible:
+            print(prefix + _format_row((row.get(h, '') for h in headers), widths))
+        total = f"{lazy.fill(0)}" + ("" if lazy.exhausted else "+")
+        print(f"{prefix}(rows {start + 1}-{start + len(visible)} of {total})  [Enter/n] next  [p] prev  [g N] go to  [q] quit")
+        try:
+            command = input_fn("  > ").strip().lower()
+        except EOFError:
+            command = 'q'
+        if command == 'q':
+            return lazy.fill(0)
+        if command == 'p':
+            start = max(0, start - window_rows)
+        elif command.startswith('g'):
+            try:
+                target = max(0, int(command[1:].strip()) - 1)
+            except ValueError:
+                continue
+            loaded = lazy.fill(target + 1)
+            start = min(target, max(0, loaded - 1))
+        elif lazy.fill(start + 2 * window_rows) > start + window_rows:
+            start += window_rows
+
+
+def display_table_schema(api, model_id, run_id, table_schema_json=None, context=None):
+    """Fetch (unless already prefetched or in context) and display table schema, returning list of table names discovered."""
     print("\n" + "=" * 80)
     print("  TABLE SCHEMA")
     print("=" * 80)
 
-    table_schema_json = api.getModelTable(model_id)
+    context = context or RunContext(api, run_id, model_id)
+    if table_schema_json is None:
+        table_schema_json = context.table_schema()
     table_names = []
 
     if table_schema_json and isinstance(table_schema_json, list):
@@ -325,7 +719,7 @@ def display_table_schema(api, model_id, run_id):
                     print(f"    - {s.get('displayName') or s.get('name')}")
     else:
         print("  Table schema returned 204 (no schemas). Discovering tables from scenario data...")
-        scenario_data = api.getScenarios(run_id=run_id)
+        scenario_data = context.scenarios()
         if scenario_data and isinstance(scenario_data, list):
             for sc in scenario_data:
                 bindings = sc.get('activeTableBindings') or []
@@ -365,26 +759,19 @@ def display_sample_table_data(api, run_id, plan_name, table_names):
     if sample_table_data:
         print(f"\n  Table: {sampled_table}  |  Scenario: {plan_name}  |  Run ID: {run_id}")
         print(f"  {'─' * 60}")
-        flat_rows = []
-        for row in sample_table_data:
-            flat = {}
-            for p in (row.get('properties') or []):
-                flat[p['name']] = p.get('value', '')
-            for s in (row.get('states') or []):
-                flat[s['name']] = s.get('value', '')
-            flat_rows.append(flat)
-        print_table(flat_rows, max_rows=10)
+        print_table(flatten_table_rows(sample_table_data), max_rows=10)
     else:
         print(f"  Tried tables {table_names} — all returned empty (204).")
 
 
-def display_log_schema(api, run_id):
-    """Fetch and display log schema."""
+def display_log_schema(api, run_id, log_schema_json=None, context=None):
+    """Fetch (unless already prefetched or in context) and display log schema."""
     print("\n" + "=" * 80)
     print("  LOG SCHEMA")
     print("=" * 80)
 
-    log_schema_json = api.getScenariosLogSchemas(runId=run_id)
+    if log_schema_json is None:
+        log_schema_json = (context or RunContext(api, run_id)).log_schema()
 
     # Normalize response: API may return a single dict or a list of dicts
     if isinstance(log_schema_json, dict):
@@ -429,60 +816,68 @@ def display_log_schema(api, run_id):
         print("  No log schemas returned (model may not produce log data).")
 
 
+def print_run_progress(progress):
+    """Print a detailed getRunProgress snapshot (status, stage, import/run/export progress, usage)."""
+    if not progress or not isinstance(progress, dict):
+        print("  Unable to retrieve run progress.")
+        return
+    status = progress.get('status', '?')
+    run_type = progress.get('runType', '?')
+    stage = progress.get('activeStage', '?')
+    submitted = progress.get('submissionTime', '?')
+    creator = progress.get('creatorName', '?')
+    load_ok = progress.get('loadModelSucceeded')
+
+    print(f"\n  {'─' * 60}")
+    print(f"  Run Progress for '{progress.get('name', '?')}' (ID: {progress.get('id', '?')})")
+    print(f"  {'─' * 60}")
+    print(f"  Status:       {status}")
+    print(f"  Run Type:     {run_type}")
+    print(f"  Active Stage: {stage}")
+    print(f"  Submitted:    {submitted}")
+    print(f"  Creator:      {creator}")
+    print(f"  Model Loaded: {'Yes' if load_ok else 'No' if load_ok is False else 'Pending'}")
+
+    imp = progress.get('importProgress')
+    if imp:
+        imp_done = imp.get('completed') or 0
+        imp_total = imp.get('total') or 0
+        imp_ok = imp.get('isSucceeded')
+        print(f"  Import:       {imp_done}/{imp_total} {'(done)' if imp_ok else '(in progress)' if imp_ok is None else '(failed)'}")
+
+    run_prog = progress.get('runProgress')
+    if run_prog:
+        rp_done = run_prog.get('completed') or 0
+        rp_total = run_prog.get('total') or 0
+        rp_ok = run_prog.get('isSucceeded')
+        print(f"  Run:          {rp_done}/{rp_total} {'(done)' if rp_ok else '(in progress)' if rp_ok is None else '(failed)'}")
+
+    exp = progress.get('exportProgress')
+    if exp:
+        exp_done = exp.get('completed') or 0
+        exp_total = exp.get('total') or 0
+        exp_ok = exp.get('isSucceeded')
+        print(f"  Export:       {exp_done}/{exp_total} {'(done)' if exp_ok else '(in progress)' if exp_ok is None else '(failed)'}")
+
+    pub = progress.get('publishSucceeded')
+    if pub is not None:
+        print(f"  Publish:      {'Yes' if pub else 'No'}")
+
+    usage = progress.get('usageSnapshot')
+    if usage:
+        mem_mb = (usage.get('privateMemorySize') or 0) / (1024 * 1024)
+        cpu_used = usage.get('cpuTimeUsed') or 0
+        cpu_avail = usage.get('cpuTimeAvailable') or 1
+        print(f"  Memory:       {mem_mb:.1f} MB")
+        print(f"  CPU:          {cpu_used:.1f}s / {cpu_avail:.1f}s ({(cpu_used/cpu_avail*100):.0f}%)")
+    print(f"  {'─' * 60}")
+
+
 def display_and_poll_run_progress(api, run_id, plan_name, refresh_interval):
     """Display initial run progress then poll until complete/failed/canceled. Returns final status."""
     progress = api.getRunProgress(run_id)
     if progress and isinstance(progress, dict):
-        status = progress.get('status', '?')
-        run_type = progress.get('runType', '?')
-        stage = progress.get('activeStage', '?')
-        submitted = progress.get('submissionTime', '?')
-        creator = progress.get('creatorName', '?')
-        load_ok = progress.get('loadModelSucceeded')
-
-        print(f"\n  {'─' * 60}")
-        print(f"  Run Progress for '{progress.get('name', '?')}' (ID: {progress.get('id', '?')})")
-        print(f"  {'─' * 60}")
-        print(f"  Status:       {status}")
-        print(f"  Run Type:     {run_type}")
-        print(f"  Active Stage: {stage}")
-        print(f"  Submitted:    {submitted}")
-        print(f"  Creator:      {creator}")
-        print(f"  Model Loaded: {'Yes' if load_ok else 'No' if load_ok is False else 'Pending'}")
-
-        imp = progress.get('importProgress')
-        if imp:
-            imp_done = imp.get('completed') or 0
-            imp_total = imp.get('total') or 0
-            imp_ok = imp.get('isSucceeded')
-            print(f"  Import:       {imp_done}/{imp_total} {'(done)' if imp_ok else '(in progress)' if imp_ok is None else '(failed)'}")
-
-        run_prog = progress.get('runProgress')
-        if run_prog:
-            rp_done = run_prog.get('completed') or 0
-            rp_total = run_prog.get('total') or 0
-            rp_ok = run_prog.get('isSucceeded')
-            print(f"  Run:          {rp_done}/{rp_total} {'(done)' if rp_ok else '(in progress)' if rp_ok is None else '(failed)'}")
-
-        exp = progress.get('exportProgress')
-        if exp:
-            exp_done = exp.get('completed') or 0
-            exp_total = exp.get('total') or 0
-            exp_ok = exp.get('isSucceeded')
-            print(f"  Export:       {exp_done}/{exp_total} {'(done)' if exp_ok else '(in progress)' if exp_ok is None else '(failed)'}")
-
-        pub = progress.get('publishSucceeded')
-        if pub is not None:
-            print(f"  Publish:      {'Yes' if pub else 'No'}")
-
-        usage = progress.get('usageSnapshot')
-        if usage:
-            mem_mb = (usage.get('privateMemorySize') or 0) / (1024 * 1024)
-            cpu_used = usage.get('cpuTimeUsed') or 0
-            cpu_avail = usage.get('cpuTimeAvailable') or 1
-            print(f"  Memory:       {mem_mb:.1f} MB")
-            print(f"  CPU:          {cpu_used:.1f}s / {cpu_avail:.1f}s ({(cpu_used/cpu_avail*100):.0f}%)")
-        print(f"  {'─' * 60}")
+        print_run_progress(progress)
 
     # Poll until complete/failed/canceled
     status = '?'
@@ -530,6 +925,21 @@ def display_and_poll_run_progress(api, run_id, plan_name, refresh_interval):
     return status
 
 
+# Log name (as used on the command line and in the REST path) -> (display label, API method name)
+LOG_ENDPOINTS = {
+    'resource-usage':    ("Resource Usage Log",    'getScenariosResourceUsageLogData'),
+    'resource-state':    ("Resource State Log",    'getScenariosResourceStateLogData'),
+    'resource-capacity': ("Resource Capacity Log", 'getScenariosResourceCapacityLogData'),
+    'task':              ("Task Log",              'getScenariosTaskLogData'),
+    'constraint':        ("Constraint Log",        'getScenariosConstraintLogData'),
+}
+
+
+def iter_log_pages(api, run_id, log_name, page_size=100, verbose=False, concurrency=1):
+    """Yield (page_number, rows) for each non-empty page of a log data endpoint (see LOG_ENDPOINTS)."""
+    return _iter_pages(api, LOG_ENDPOINTS[log_name][1], page_size, concurrency, verbose, runId=run_id)
+
+
 def display_sample_log_data(api, run_id):
     """Fetch and display sample log data from the first non-empty log endpoint."""
     print("\n" + "=" * 80)
@@ -539,11 +949,8 @@ def display_sample_log_data(api, run_id):
     print(f"  {'─' * 60}")
 
     log_attempts = [
-        ("Resource Usage Log",    lambda: api.getScenariosResourceUsageLogData(runId=run_id, page=1, pageSize=10)),
-        ("Resource State Log",    lambda: api.getScenariosResourceStateLogData(runId=run_id, page=1, pageSize=10)),
-        ("Resource Capacity Log", lambda: api.getScenariosResourceCapacityLogData(runId=run_id, page=1, pageSize=10)),
-        ("Task Log",              lambda: api.getScenariosTaskLogData(runId=run_id, page=1, pageSize=10)),
-        ("Constraint Log",        lambda: api.getScenariosConstraintLogData(runId=run_id, page=1, pageSize=10)),
+        (log_label, lambda method=method: getattr(api, method)(runId=run_id, page=1, pageSize=10))
+        for log_label, method in LOG_ENDPOINTS.values()
     ]
 
     found_log = False
@@ -558,3 +965,32 @@ def display_sample_log_data(api, run_id):
     if not found_log:
         print("  No log data found (all log endpoints returned 204/empty).")
         print("  This can happen when input tables are empty or the model doesn't produce log events.")
+
+
+def wait_for_run_completion(api, run_id, refresh_interval=2, timeout=None, max_failed_polls=1):
+    """
+    Poll getRunProgress without printing until the run reaches a terminal status. Returns the final status.
+
+    A poll that raises or returns no progress counts as failed; after max_failed_polls failures in a
+    row '?' is returned. Once timeout seconds have passed the last status seen is returned.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    status = '?'
+    failed = 0
+    while True:
+        try:
+            progress = api.getRunProgress(run_id)
+        except Exception:
+            progress = None
+        if not progress or not isinstance(progress, dict):
+            failed += 1
+            if failed >= max_failed_polls:
+                return '?'
+        else:
+            failed = 0
+            status = progress.get('status', '?')
+            if status in TERMINAL_STATUSES:
+                return status
+        if deadline is not None and time.monotonic() >= deadline:
+            return status
+        time.sleep(refresh_interval)
@@ -4,11 +4,16 @@ Direct REST API wrapper for the Simio Portal Web API.
 Provides SimioAPI class with identical method signatures to pysimio's pySimio,
 so shared_helper.py functions work interchangeably with either.
 """
+import functools
 import requests
 import logging
+import threading
+import time
 from dataclasses import dataclass, asdict
 from typing import Optional
 
+from api_metrics import registry as metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,20 +49,31 @@ class TimeOptions:
 
 def _retry_on_unauthorized(method):
     """Decorator that retries once after re-authenticating on 401."""
+    @functools.wraps(method)
     def wrapper(self, *args, **kwargs):
+        # Requests made inside are recorded in api_metrics under the method name
+        outer = getattr(_current, 'endpoint', None)
+        _current.endpoint = method.__name__
         try:
-            return method(self, *args, **kwargs)
-        except _UnauthorizedError:
-            # Re-authenticate and retry once
             try:
-                self._reauthenticate()
                 return method(self, *args, **kwargs)
-            except Exception:
-                logger.exception("Re-authentication retry failed")
-                return None
+            except _UnauthorizedError:
+                # Re-authenticate and retry once
+                metrics.record_retry(method.__name__)
+                try:
+                    self._reauthenticate()
+                    return method(self, *args, **kwargs)
+                except Exception:
+                    logger.exception("Re-authentication retry failed")
+                    return None
+        finally:
+            _current.endpoint = outer
     return wrapper
 
 
+_current = threading.local()
+
+
 class _UnauthorizedError(Exception):
     """Internal sentinel for 401 responses."""
     pass
@@ -73,7 +89,16 @@ class SimioAPI:
     Method signatures match pysimio.pySimio exactly.
     """
 
-    def __init__(self, baseURL: str):
+    def __init__(self, baseURL: str, transport=None):
+        """
+        transport is called as transport(method, url, params=, json=, headers=) and must return a
+        requests-style response (status_code, text, json()). It defaults to requests.request, or to
+        a cassette recorder/player when SIMIO_CASSETTE_RECORD / SIMIO_CASSETTE_REPLAY is set (see cassette.py).
+        """
+        if transport is None:
+            from cassette import transport_from_env
+            transport = transport_from_env() or requests.request
+        self.transport = transport
         self.apiURL = f"{baseURL}/api"
         self.authToken = None
         self.headers = {
@@ -88,7 +113,7 @@ class SimioAPI:
         try:
             self.personalAccessToken = personalAccessToken
             authBody = {"personalAccessToken": personalAccessToken}
-            resp = requests.post(f"{self.apiURL}/auth", json=authBody)
+            resp = self._request("POST", "/auth", json=authBody, headers={}, endpoint="authenticate")
             if resp.status_code == 200:
                 data = resp.json()
                 if data.get("token"):
@@ -103,13 +128,32 @@ class SimioAPI:
 
     def _reauthenticate(self):
         if self.personalAccessToken:
+            metrics.record_reauth()
             self.authenticate(personalAccessToken=self.personalAccessToken)
 
     # -- Helpers ------------------------------------------------------------
 
+    def _request(self, method, path, params=None, json=None, headers=None, endpoint=None):
+        """
+        Send one request through the transport, with the auth headers unless headers is given,
+        and record it in api_metrics under endpoint (default: the calling API method).
+        """
+        endpoint = endpoint or getattr(_current, 'endpoint', None) or f"{method} {path}"
+        start = time.perf_counter()
+        try:
+            resp = self.transport(method, f"{self.apiURL}{path}", params=params, json=json,
+                                  headers=self.headers if headers is None else headers)
+        except Exception:
+            metrics.record_request(endpoint, None, time.perf_counter() - start)
+            raise
+        sent = getattr(getattr(resp, 'request', None), 'body', None)
+        metrics.record_request(endpoint, resp.status_code, time.perf_counter() - start,
+                               len(sent) if sent else 0, len(resp.content or b''))
+        return resp
+
     def _get(self, path, params=None):
         """GET request, returns parsed JSON or None. Raises _UnauthorizedError on 401."""
-        resp = requests.get(f"{self.apiURL}{path}", params=params, headers=self.headers)
+        resp = self._request("GET", path, params=params)
         if resp.status_code == 200:
             return resp.json()
         elif resp.status_code == 204:
@@ -119,9 +163,21 @@ class SimioAPI:
         else:
             raise RuntimeError(f"GET {path} failed: {resp.status_code} {resp.text}")
 
+    def _get_raw(self, path, params=None):
+        """GET request, returns the response body bytes unparsed (b'' for 204). Raises _UnauthorizedError on 401."""
+        resp = self._request("GET", path, params=params)
+        if resp.status_code == 200:
+            return resp.content
+        elif resp.status_code == 204:
+            return b''
+        elif resp.status_code == 401:
+            raise _UnauthorizedError()
+        else:
+            raise RuntimeError(f"GET {path} failed: {resp.status_code} {resp.text}")
+
     def _post(self, path, body):
         """POST request, returns parsed JSON or True. Raises _UnauthorizedError on 401."""
-        resp = requests.post(f"{self.apiURL}{path}", json=body, headers=self.headers)
+        resp = self._request("POST", path, json=body)
         if resp.status_code in (200, 201):
             try:
                 return resp.json()
@@ -136,7 +192,7 @@ class SimioAPI:
 
     def _put(self, path, body):
         """PUT request, returns True on success. Raises _UnauthorizedError on 401."""
-        resp = requests.put(f"{self.apiURL}{path}", json=body, headers=self.headers)
+        resp = self._request("PUT", path, json=body)
         if resp.status_code in (200, 204):
             return True
         elif resp.status_code == 401:
@@ -146,7 +202,7 @@ class SimioAPI:
 
     def _delete(self, path):
         """DELETE request, returns True on success. Raises _UnauthorizedError on 401."""
-        resp = requests.delete(f"{self.apiURL}{path}", headers=self.headers)
+        resp = self._request("DELETE", path)
         if resp.status_code in (200, 204):
             return True
         elif resp.status_code == 401:
@@ -210,7 +266,7 @@ class SimioAPI:
     @_retry_on_unauthorized
     def cancelRun(self, runId: int):
         body = {"status": "cancelled"}
-        resp = requests.patch(f"{self.apiURL}/v1/runs/{runId}", headers=self.headers, json=body)
+        resp = self._request("PATCH", f"/v1/runs/{runId}", json=body)
         if resp.status_code == 204:
             return True
         elif resp.status_code == 401:
@@ -253,7 +309,18 @@ class SimioAPI:
 
     @_retry_on_unauthorized
     def getTableData(self, runId: int, scenarioName: str, tableName: str,
-                     page: int = None, pageSize: int = None, filter: str = None):
+                     page: int = None, pageSize: int = None, filter: str = None, columns: list = None):
+        """filter is an OData string or odata_filter expression; columns limits the returned columns server-side."""
+        return self._get(*self._table_data_request(runId, scenarioName, tableName, page, pageSize, filter, columns))
+
+    @_retry_on_unauthorized
+    def getTableDataRaw(self, runId: int, scenarioName: str, tableName: str,
+                        page: int = None, pageSize: int = None, filter: str = None, columns: list = None):
+        """getTableData returning the response body bytes as received (b'' for 204), without JSON parsing."""
+        return self._get_raw(*self._table_data_request(runId, scenarioName, tableName, page, pageSize, filter, columns))
+
+    @staticmethod
+    def _table_data_request(runId, scenarioName, tableName, page, pageSize, filter, columns):
         params = []
         if runId is not None:
             params.append(('run_id', runId))
@@ -266,8 +333,10 @@ class SimioAPI:
         if pageSize is not None:
             params.append(('page_size', pageSize))
         if filter is not None:
-            params.append(('filter', filter))
-        return self._get(f"/v1/runs/{runId}/scenarios/{scenarioName}/table-data/{tableName}", params=params or None)
+            params.append(('filter', str(filter)))
+        for column in (columns or []):
+            params.append(('columns', column))
+        return f"/v1/runs/{runId}/scenarios/{scenarioName}/table-data/{tableName}", params or None
 
     # -- Log Schemas --------------------------------------------------------
 
@@ -280,14 +349,19 @@ class SimioAPI:
 
     # -- Log Data -----------------------------------------------------------
 
-    def _get_log_data(self, runId: int, log_type: str, page: int = None, pageSize: int = None):
-        """Shared helper for all log data endpoints."""
+    def _get_log_data(self, runId: int, log_type: str, page: int = None, pageSize: int = None, raw=False):
+        """Shared helper for all log data endpoints (raw=True returns the body bytes unparsed)."""
         params = [('run_id', runId)]
         if page is not None:
             params.append(('page', page))
         if pageSize is not None:
             params.append(('page_size', pageSize))
-        return self._get(f"/v1/runs/{runId}/scenarios/log-data/{log_type}", params=params)
+        return (self._get_raw if raw else self._get)(f"/v1/runs/{runId}/scenarios/log-data/{log_type}", params=params)
+
+    @_retry_on_unauthorized
+    def getScenariosLogDataRaw(self, runId: int, logType: str, page: int = None, pageSize: int = None):
+        """Any log data endpoint by URL log type ('task-log', 'resource-usage-log', ...) as raw body bytes (b'' for 204)."""
+        return self._get_log_data(runId, logType, page, pageSize, raw=True)
 
     @_retry_on_unauthorized
     def getScenariosResourceUsageLogData(self, runId: int, page: int = None, pageSize: int = None):
@@ -0,0 +1,252 @@
+# spfx_schema.py
+"""
+Offline schema extraction from Simio project (.spfx) files.
+
+An .spfx file is a zip archive: Project.xml lists the models and points at one
+XML fragment per model definition (Models/<Name>/<id>.xml), which holds the model's
+properties (the experiment controls) and its data tables. This reader streams
+just those members out of the archive with iterparse, so geometry, textures and
+results are never read, and returns:
+
+    tables    in the getModelTable shape (name, columnSchemas with isKey and
+              foreignKeyInfo, stateSchemas), usable anywhere a prefetched
+              table_schema_json is accepted (display_table_schema, LocalTable,
+              TableJoiner, diff_tables, ...)
+    controls  model properties with their type and default value
+    run_setup the model's start/end dates
+
+Results are cached in .spfx_cache/<sha256 of the file>.json, so a second read
+of the same file (by this or another process) skips parsing entirely:
+
+    schema = read_spfx_schema("PortalDemoModel.spfx")
+    display_table_schema(None, None, None, table_schema_json=schema['tables'])
+
+Keys come from a column's IsKey attribute or the table's Key attribute (the column(s)
+set with "Set Column As Key"), and foreign keys from a ForeignKeyProperty's TableKey
+("Table.Column"). Nothing is guessed from other attribute names: isKey is None for
+every column of a table that records neither, and such columns get no foreignKeyInfo.
+
+Log schemas come from the portal's log configuration, not the project file, and
+still need getScenariosLogSchemas.
+"""
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+
+from api_metrics import registry as metrics
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = '.spfx_cache'
+
+_TRUE = ('true', '1', 'yes')
+_COLUMN_KEY_ATTRIBUTE = 'IsKey'          # on a column: IsKey="True"
+_TABLE_KEY_ATTRIBUTE = 'Key'             # on a table: Key="Column" (or "ColumnA,ColumnB")
+_FOREIGN_KEY_ATTRIBUTE = 'TableKey'      # on a ForeignKeyProperty: TableKey="Table.Column"
+_memo = {}
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _member_path(name):
+    """FileRef names use Windows separators; zip members use '/'."""
+    return name.replace('\\', '/')
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Project.xml
+# ---------------------------------------------------------------------------
+
+def _read_project(archive):
+    """Runnable model definitions, their fragment files and run setup, from Project.xml."""
+    models = []           # [(definition name, runnable, run_setup)]
+    fragments = {}        # definition name -> zip member
+    stack = []
+    run_setup = {}
+    with archive.open('Project.xml') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            tag = _local(elem.tag)
+            if event == 'start':
+                stack.append(tag)
+                if tag == 'Model' and 'Models' in stack[:-1]:
+                    run_setup = {}
+                continue
+            stack.pop()
+            if tag in ('StartDate', 'EndDate') and 'RunSetup' in stack:
+                run_setup['startDate' if tag == 'StartDate' else 'endDate'] = (elem.text or '').strip()
+            elif tag == 'Model' and stack and stack[-1] == 'Models':
+                runnable = (elem.get('Runnable') or 'True').lower() in _TRUE
+                models.append((elem.get('Definition'), runnable, run_setup))
+                elem.clear()
+            elif tag == 'FileRef' and len(stack) >= 2 and stack[-1].endswith('Definition') \
+                    and stack[-2] == 'Definitions':
+                fragments.setdefault(stack[-1], []).append(elem.get('Name'))
+            elif tag.endswith('Definition') and stack and stack[-1] == 'Definitions':
+                refs = fragments.pop(tag, [])
+                if refs and elem.get('Name'):
+                    fragments[elem.get('Name')] = _member_path(refs[-1])
+                elem.clear()
+    return models, {k: v for k, v in fragments.items() if isinstance(v, str)}
+
+
+# ---------------------------------------------------------------------------
+# Model fragments
+# ---------------------------------------------------------------------------
+
+def _property_type(tag):
+    return tag[:-len('Property')] if tag.endswith('Property') and tag != 'Property' else tag
+
+
+def _is_key(elem, table_keys):
+    return elem.get('Name') in table_keys or (elem.get(_COLUMN_KEY_ATTRIBUTE) or '').lower() in _TRUE
+
+
+def _foreign_key(tag, elem):
+    """foreignKeyInfo from a ForeignKeyProperty's TableKey ('Table.Column'), else None."""
+    if tag != 'ForeignKeyProperty':
+        return None
+    table, _, column = (elem.get(_FOREIGN_KEY_ATTRIBUTE) or '').partition('.')
+    if table and column:
+        return {'toTableName': table, 'toColumnName': column}
+    return None
+
+
+def _parse_table(elem):
+    """getModelTable-shaped schema for one <Table> element."""
+    table_keys = {part.strip() for part in (elem.get(_TABLE_KEY_ATTRIBUTE) or '').split(',') if part.strip()}
+    has_keys = bool(table_keys) or any(child.get(_COLUMN_KEY_ATTRIBUTE) is not None for child in elem.iter())
+    columns, states = [], []
+    for child in elem.iter():
+        tag = _local(child.tag)
+        if child is elem or not child.get('Name'):
+            continue
+        if tag.endswith('Property') and tag != 'Property':
+            column = {
+                'name': child.get('Name'),
+                'displayName': child.get('DisplayName') or child.get('Name'),
+                'type': _property_type(tag),
+                'isKey': _is_key(child, table_keys) if has_keys else None,
+            }
+            fk = _foreign_key(tag, child)
+            if fk:
+                column['foreignKeyInfo'] = fk
+            if child.get('DefaultValue') is not None:
+                column['defaultValue'] = child.get('DefaultValue')
+            columns.append(column)
+        elif tag.endswith('State') and tag != 'State':
+            states.append({'name': child.get('Name'), 'displayName': child.get('DisplayName') or child.get('Name'),
+                           'type': tag[:-len('State')]})
+    return {'name': elem.get('Name'), 'columnSchemas': columns, 'stateSchemas': states}
+
+
+def _read_fragment(archive, member):
+    """(controls, tables) from one model definition fragment, streamed."""
+    controls, tables = [], []
+    stack = []
+    with archive.open(member) as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            tag = _local(elem.tag)
+            if event == 'start':
+                stack.append(tag)
+                continue
+            stack.pop()
+            if tag == 'Table' and 'Tables' in stack and elem.get('Name'):
+                tables.append(_parse_table(elem))
+                elem.clear()
+            elif len(stack) == 2 and stack[-1] == 'PropertyDefinitions' and tag.endswith('Property') \
+                    and elem.get('Name'):
+                controls.append({'name': elem.get('Name'), 'type': _property_type(tag),
+                                 'defaultValue': elem.get('DefaultValue'),
+                                 'displayName': elem.get('DisplayName') or elem.get('Name')})
+            elif len(stack) <= 2 and tag in ('Objects', 'Processes', 'Elements', 'Graphics', 'SymbolInstances'):
+                elem.clear()  # large subtrees that hold neither controls nor tables
+    return controls, tables
+
+
+def parse_spfx(path):
+    """Parse an .spfx file (no caching). See the module docstring for the result shape."""
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        models, fragments = _read_project(archive)
+        result = {'models': []}
+        for definition, runnable, run_setup in models:
+            member = fragments.get(definition)
+            if not runnable or member not in names:
+                continue
+            controls, tables = _read_fragment(archive, member)
+            result['models'].append({'name': definition, 'controls': controls, 'tables': tables,
+                                     'runSetup': run_setup})
+    first = result['models'][0] if result['models'] else {'controls': [], 'tables': [], 'runSetup': {}}
+    result.update(controls=first['controls'], tables=first['tables'], run_setup=first['runSetup'])
+    return result
+
+
+def read_spfx_schema(path, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    """
+    Schema of an .spfx file, from the cache when this exact file (by SHA-256) was read
+    before. 'tables', 'controls' and 'run_setup' describe the first runnable model;
+    'models' lists every runnable model. cache_dir=None disables the on-disk cache.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if not refresh and memo_key in _memo:
+        metrics.record_cache('spfx_schema', True)
+        return _memo[memo_key]
+
+    digest = file_sha256(path)
+    cache_path = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+    if not refresh and cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('version') == CACHE_VERSION:
+            metrics.record_cache('spfx_schema', True)
+            _memo[memo_key] = cached['schema']
+            return cached['schema']
+
+    metrics.record_cache('spfx_schema', False)
+    schema = parse_spfx(path)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'source': os.path.basename(path), 'schema': schema}, f, indent=2)
+        os.replace(tmp_path, cache_path)
+    _memo[memo_key] = schema
+    return schema
+
+
+def print_spfx_schema(schema):
+    """Print the runnable models, controls and tables found in an .spfx schema."""
+    print("\n" + "=" * 80)
+    print("  PROJECT FILE SCHEMA")
+    print("=" * 80)
+    for model in schema['models']:
+        setup = model.get('runSetup') or {}
+        print(f"\n  Model: {model['name']}  |  Start: {setup.get('startDate', '?')}  |  End: {setup.get('endDate', '?')}")
+        print(f"  {'─' * 60}")
+        if model['controls']:
+            print(f"  Controls:")
+            for c in model['controls']:
+                print(f"    - {c['displayName']} ({c['type']}, default {c.get('defaultValue')})")
+        for table in model['tables']:
+            keys = [c['name'] for c in table['columnSchemas'] if c.get('isKey')]
+            print(f"\n  Table: {table['name']}" + (f"  |  Key Column(s): {', '.join(keys)}" if keys else ""))
+            for c in table['columnSchemas']:
+                fk = c.get('foreignKeyInfo')
+                fk_str = f"  -> {fk['toTableName']}.{fk['toColumnName']}" if fk else ""
+                print(f"    - {c['displayName']} ({c['type']}){fk_str}")
+            for s in table['stateSchemas']:
+                print(f"    - {s['displayName']} ({s['type']} state)")
+        if not model['tables']:
+            print("  No data tables defined.")
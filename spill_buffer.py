@@ -0,0 +1,215 @@
+# spill_buffer.py
+"""
+Memory-budgeted row storage for the paged fetch helpers.
+
+fetch_all_table_pages (and display_full_table's browse view, which keeps every row
+it has pulled so it can page backwards) accumulate rows in a Python list, so one
+big table can exhaust a small worker's memory. With a memory budget they use a
+SpillableRowBuffer instead: rows stay in memory until their estimated size passes
+the budget, then everything moves to a temporary JSON-lines file and later rows
+are appended there. The buffer keeps working like a list either way:
+
+    rows = fetch_all_table_pages(api, run_id, "Plan", "Orders", memory_budget="256MB")
+    len(rows); rows[123_456]; rows[-10:]; for row in rows: ...
+
+Spilled rows are read back through a memory map plus an in-memory offset index
+(8 bytes per row), so indexing stays O(1) and only touched pages of the file are
+resident. The default budget for both helpers can be set with SIMIO_MEMORY_BUDGET
+(e.g. 512MB). Each buffer's budget, peak estimated size and spilled rows/bytes are
+recorded in api_metrics.
+
+Sizes are estimates (sys.getsizeof over a sample of rows), not exact accounting.
+"""
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+import weakref
+from array import array
+
+from api_metrics import registry as metrics
+
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+# Rows measured exactly before switching to sampling one row in SAMPLE_EVERY
+EXACT_ROWS = 32
+SAMPLE_EVERY = 256
+
+
+def parse_size(value):
+    """Bytes from an int or a string like '512MB', '2G', '100k' (binary units); None stays None."""
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*', str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid size '{value}' (expected e.g. 500000, 256MB or 2G).")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def default_memory_budget():
+    """The SIMIO_MEMORY_BUDGET environment variable as bytes, or None."""
+    return parse_size(os.getenv("SIMIO_MEMORY_BUDGET") or None)
+
+
+def deep_size(obj):
+    """Approximate memory held by a JSON-like value (dicts, lists, strings, numbers)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k) + deep_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v) for v in obj)
+    return size
+
+
+def _remove(path, resources):
+    for resource in resources:
+        if resource[0] is not None:
+            resource[0].close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpillableRowBuffer:
+    """List-like row store that moves to a memory-mapped temporary file once it outgrows memory_budget."""
+
+    def __init__(self, memory_budget, spill_dir=None, name='rows'):
+        self.memory_budget = parse_size(memory_budget)
+        self.spill_dir = spill_dir
+        self.name = name
+        self.peak_memory_bytes = 0
+        self.spill_path = None
+        self._rows = []
+        self._row_cost = 0.0        # average estimated bytes per in-memory row
+        self._measured = 0
+        self._file = None
+        self._offsets = None        # array('q') of row start offsets, plus the end offset
+        self._map = [None]          # [mmap]; a list so the cleanup finalizer sees replacements
+        self._mapped_size = 0
+        self._finalizer = None
+        self._reported = False
+
+    # -- Writing ------------------------------------------------------------
+
+    @property
+    def spilled(self):
+        return self._file is not None
+
+    @property
+    def memory_bytes(self):
+        """Estimated bytes held in memory by the rows (the offset index once spilled)."""
+        if self.spilled:
+            return self._offsets.itemsize * len(self._offsets)
+        return int(self._row_cost * len(self._rows))
+
+    def append(self, row):
+        if self.spilled:
+            self._write(row)
+            return
+        rows = self._rows
+        if self._measured < EXACT_ROWS or len(rows) % SAMPLE_EVERY == 0:
+            self._measured += 1
+            self._row_cost += (deep_size(row) - self._row_cost) / self._measured
+        rows.append(row)
+        used = self._row_cost * len(rows)
+        if used > self.peak_memory_bytes:
+            self.peak_memory_bytes = int(used)
+        if self.memory_budget is not None and used > self.memory_budget:
+            self._spill()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _write(self, row):
+        data = json.dumps(row, separators=(',', ':')).encode('utf-8') + b'\n'
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def _spill(self):
+        fd, self.spill_path = tempfile.mkstemp(prefix="simio_spill_", suffix=".jsonl", dir=self.spill_dir)
+        self._file = os.fdopen(fd, 'w+b')
+        self._finalizer = weakref.finalize(self, _remove, self.spill_path, [self._map, [self._file]])
+        self._offsets = array('q', [0])
+        rows, self._rows = self._rows, []
+        for row in rows:
+            self._write(row)
+
+    # -- Reading ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._offsets) - 1 if self.spilled else len(self._rows)
+
+    def _mapped(self):
+        """The spill file as an mmap covering every row written so far."""
+        end = self._offsets[-1]
+        if end > self._mapped_size:
+            self._file.flush()
+            if self._map[0] is not None:
+                self._map[0].close()
+            self._map[0] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = end
+        return self._map[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if not self.spilled:
+                return self._rows[index]
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not self.spilled:
+            return self._rows[index]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("row index out of range")
+        return json.loads(self._mapped()[self._offsets[index]:self._offsets[index + 1]])
+
+    def __iter__(self):
+        if not self.spilled:
+            yield from self._rows
+            return
+        n = len(self)
+        data = self._mapped()
+        for i in range(n):
+            yield json.loads(data[self._offsets[i]:self._offsets[i + 1]])
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        where = f"spilled to {self.spill_path}" if self.spilled else "in memory"
+        return f"<SpillableRowBuffer {self.name}: {len(self)} rows, {where}>"
+
+    # -- Reporting / cleanup ------------------------------------------------
+
+    def stats(self):
+        return {'budget_bytes': self.memory_budget, 'peak_memory_bytes': self.peak_memory_bytes,
+                'rows': len(self), 'spilled': self.spilled,
+                'spilled_bytes': self._offsets[-1] if self.spilled else 0}
+
+    def report(self):
+        """Record this buffer's budget, peak and spill in api_metrics (once)."""
+        if self._reported:
+            return
+        self._reported = True
+        s = self.stats()
+        metrics.record_memory_budget(self.name, s['budget_bytes'], s['peak_memory_bytes'], s['rows'],
+                                     s['rows'] if s['spilled'] else 0, s['spilled_bytes'])
+
+    def close(self):
+        """Delete the spill file; the buffer is empty afterwards."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._rows = []
+        self._file = None
+        self._offsets = None
+        self._mapped_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,196 @@
+# table_diff.py
+"""
+Run-to-run table diff keyed on the isKey columns from getModelTable.
+
+Compares a table between two runs (or two scenarios of one run) and reports rows
+added, removed and changed, with the column-level old/new values of each change:
+
+    report = diff_tables(api, model_id, "Orders", (old_run_id, "Plan"), (new_run_id, "Plan"))
+    print_diff_report(report)
+
+Both sides are streamed page by page. The first side is held in a hash table keyed
+on the key columns while the second streams past it; rows are compared by a content
+hash and only changed rows are compared column by column. When the first side has
+more than max_memory_rows rows, both sides are spilled to partition files by key
+hash instead and the partitions are diffed one at a time, so memory use is bounded
+by one partition rather than the table.
+"""
+import hashlib
+import json
+import tempfile
+from collections import namedtuple
+
+from table_query import exact_key
+
+RowChange = namedtuple('RowChange', 'kind key before after columns')
+"""kind is 'added', 'removed' or 'changed'; columns maps column -> (old, new) for changed rows."""
+
+
+def key_columns_for(table_schema_json, table_name):
+    """The isKey columns of a table in a getModelTable response."""
+    for table in table_schema_json or []:
+        if table.get('name') == table_name:
+            return [c['name'] for c in (table.get('columnSchemas') or []) if c.get('isKey')]
+    raise ValueError(f"Table '{table_name}' not found in the table schema.")
+
+
+def content_hash(row, ignore_columns=()):
+    """Stable digest of a row's values (column order doesn't matter)."""
+    if ignore_columns:
+        row = {k: v for k, v in row.items() if k not in ignore_columns}
+    return hashlib.blake2b(json.dumps(row, sort_keys=True, default=str).encode('utf-8'), digest_size=16).digest()
+
+
+def column_deltas(before, after, ignore_columns=()):
+    """{column: (old, new)} for every column whose value differs (missing columns count as None)."""
+    columns = dict.fromkeys(list(before) + list(after))
+    return {c: (before.get(c), after.get(c)) for c in columns
+            if c not in ignore_columns and before.get(c) != after.get(c)}
+
+
+class _Partitions:
+    """Rows spilled to temporary JSON-lines files, one file per key-hash partition."""
+
+    def __init__(self, count, temp_dir=None):
+        self.files = [tempfile.TemporaryFile('w+', encoding='utf-8', dir=temp_dir) for _ in range(count)]
+
+    def add(self, key, row):
+        self.files[hash(key) % len(self.files)].write(json.dumps([key, row], default=str) + '\n')
+
+    def read(self, index):
+        f = self.files[index]
+        f.seek(0)
+        for line in f:
+            key, row = json.loads(line)
+            yield tuple(key), row
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+
+def _diff_partition(left, right_rows, ignore_columns):
+    """Diff a {key: row} dict against streamed (key, row) pairs; left is consumed."""
+    left_hashes = {k: content_hash(r, ignore_columns) for k, r in left.items()}
+    for key, row in right_rows:
+        before = left.pop(key, None)
+        if before is None:
+            yield RowChange('added', key, None, row, {})
+        elif left_hashes[key] != content_hash(row, ignore_columns):
+            yield RowChange('changed', key, before, row, column_deltas(before, row, ignore_columns))
+    for key, row in left.items():
+        yield RowChange('removed', key, row, None, {})
+
+
+def iter_row_diff(rows_a, rows_b, key_columns, ignore_columns=(), max_memory_rows=500_000,
+                  partitions=64, temp_dir=None):
+    """
+    Yield a RowChange for every row that differs between two row streams.
+    Keys are expected to be unique per side; with duplicates the last row wins. Key
+    values match exactly (table_query.exact_key), so '007' and '7' are different rows.
+    Without key columns the whole row is the key, so only additions and removals show up.
+    """
+    ignore_columns = set(ignore_columns)
+
+    def key_of(row):
+        if key_columns:
+            return tuple(exact_key(row.get(c)) for c in key_columns)
+        return (content_hash(row, ignore_columns).hex(),)
+
+    left = {}
+    spilled = None
+    try:
+        for row in rows_a:
+            if spilled is not None:
+                spilled.add(key_of(row), row)
+                continue
+            left[key_of(row)] = row
+            if len(left) > max_memory_rows:
+                spilled = _Partitions(partitions, temp_dir)
+                for key, buffered in left.items():
+                    spilled.add(key, buffered)
+                left = {}
+
+        if spilled is None:
+            yield from _diff_partition(left, ((key_of(r), r) for r in rows_b), ignore_columns)
+            return
+
+        right = _Partitions(partitions, temp_dir)
+        try:
+            for row in rows_b:
+                right.add(key_of(row), row)
+            for i in range(partitions):
+                yield from _diff_partition(dict(spilled.read(i)), right.read(i), ignore_columns)
+        finally:
+            right.close()
+    finally:
+        if spilled is not None:
+            spilled.close()
+
+
+def _table_rows(api, run_id, scenario_name, table_name, page_size, concurrency, verbose):
+    from shared_helper import flatten_table_rows, iter_table_pages
+
+    for _, page in iter_table_pages(api, run_id, scenario_name, table_name, page_size, verbose=verbose,
+                                    concurrency=concurrency):
+        yield from flatten_table_rows(page)
+
+
+def diff_tables(api, model_id, table_name, side_a, side_b, table_schema_json=None, page_size=500,
+                concurrency=1, ignore_columns=(), max_memory_rows=500_000, partitions=64,
+                max_examples=20, verbose=False):
+    """
+    Diff a table between two (run_id, scenario_name) sides and return a report dict:
+    counts of added/removed/changed rows, how often each column changed, and up to
+    max_examples RowChanges of each kind.
+    """
+    if table_schema_json is None:
+        table_schema_json = api.getModelTable(model_id)
+    key_columns = key_columns_for(table_schema_json, table_name)
+    rows_a = _table_rows(api, side_a[0], side_a[1], table_name, page_size, concurrency, verbose)
+    rows_b = _table_rows(api, side_b[0], side_b[1], table_name, page_size, concurrency, verbose)
+    changes = iter_row_diff(rows_a, rows_b, key_columns, ignore_columns, max_memory_rows, partitions)
+    report = summarize_diff(changes, max_examples)
+    report.update(table=table_name, key_columns=key_columns, side_a=tuple(side_a), side_b=tuple(side_b))
+    return report
+
+
+def summarize_diff(changes, max_examples=20):
+    """Count RowChanges by kind and by changed column, keeping the first max_examples of each kind."""
+    report = {'counts': {'added': 0, 'removed': 0, 'changed': 0}, 'column_changes': {},
+              'examples': {'added': [], 'removed': [], 'changed': []}}
+    for change in changes:
+        report['counts'][change.kind] += 1
+        for column in change.columns:
+            report['column_changes'][column] = report['column_changes'].get(column, 0) + 1
+        if len(report['examples'][change.kind]) < max_examples:
+            report['examples'][change.kind].append(change)
+    return report
+
+
+def print_diff_report(report):
+    """Print a diff report from diff_tables."""
+    counts = report['counts']
+    print("\n" + "=" * 80)
+    print(f"  TABLE DIFF  |  {report.get('table', '?')}  |  "
+          f"{report.get('side_a', '?')} -> {report.get('side_b', '?')}")
+    print("=" * 80)
+    if report.get('key_columns'):
+        print(f"  Key Column(s): {', '.join(report['key_columns'])}")
+    print(f"  Added: {counts['added']}   Removed: {counts['removed']}   Changed: {counts['changed']}")
+    if report['column_changes']:
+        print(f"\n  Changed columns:")
+        for column, n in sorted(report['column_changes'].items(), key=lambda kv: -kv[1]):
+            print(f"    - {column}: {n} row(s)")
+    for kind in ('added', 'removed', 'changed'):
+        examples = report['examples'][kind]
+        if not examples:
+            continue
+        print(f"\n  {kind.capitalize()} (first {len(examples)}):")
+        for change in examples:
+            key = ', '.join(str(k) for k in change.key)
+            if kind == 'changed':
+                deltas = '; '.join(f"{c}: {old!r} -> {new!r}" for c, (old, new) in change.columns.items())
+                print(f"    [{key}]  {deltas}")
+            else:
+                print(f"    [{key}]")
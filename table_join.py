@@ -0,0 +1,170 @@
+# table_join.py
+"""
+Hash joins between downloaded Simio Portal tables, driven by the foreign keys
+that getModelTable reports for each column (foreignKeyInfo: toTableName, toColumnName).
+
+    schema = api.getModelTable(model_id)
+    order_rows = (row for _, page in iter_table_pages(api, run_id, scenario_name, "Orders", 500)
+                  for row in flatten_table_rows(page))
+    joiner = TableJoiner(schema, {
+        "Orders": order_rows,                                               # streamed
+        "Materials": materials_rows,                                        # built once
+        "Resources": LocalTable.from_schema(resource_rows, schema, "Resources"),
+    })
+    write_csv(joiner.join("Orders", "Materials", "Resources"), "orders_joined.csv")
+
+The first table drives the join and is consumed as a stream; every other table is
+hashed once on its join column and probed per row, so the joined rows are produced
+one at a time and can be written out without being held in memory. Columns from
+joined-in tables are prefixed with their table name ("Materials.Cost").
+"""
+import csv
+
+from table_query import LocalTable, exact_key
+
+
+def foreign_keys(table_schema_json, table_name=None):
+    """
+    (from_table, from_column, to_table, to_column) for every column with foreignKeyInfo
+    in a getModelTable response, optionally limited to one table.
+    """
+    links = []
+    for table in table_schema_json or []:
+        if table_name is not None and table.get('name') != table_name:
+            continue
+        for c in table.get('columnSchemas') or []:
+            fk = c.get('foreignKeyInfo')
+            if fk:
+                links.append((table.get('name'), c['name'], fk['toTableName'], fk['toColumnName']))
+    return links
+
+
+class _HashSide:
+    """A materialized join side: rows hashed on one column, plus the union of their column names."""
+
+    def __init__(self, rows, column):
+        if isinstance(rows, LocalTable):
+            self.rows = rows.rows
+        else:
+            self.rows = rows if isinstance(rows, list) else list(rows)
+        self.index = {}
+        for pos, row in enumerate(self.rows):
+            self.index.setdefault(exact_key(row.get(column)), []).append(pos)
+        self.columns = list(dict.fromkeys(k for row in self.rows for k in row))
+
+    def matches(self, value):
+        key = exact_key(value)
+        if key is None or key == '':
+            return []
+        return [self.rows[pos] for pos in self.index.get(key, ())]
+
+
+def _sized(rows):
+    return isinstance(rows, (list, tuple, LocalTable))
+
+
+def hash_join(left, right, left_on, right_on, how='inner', right_prefix=''):
+    """
+    Yield merged rows where left[left_on] equals right[right_on] (compared as in
+    LocalTable key lookups, so '10' matches 10 but '010' does not).
+
+    The smaller side is hashed and the other streamed; a side that is a generator
+    (no length) is always the streamed one. how='left' keeps unmatched left rows,
+    with the right columns set to None, and always hashes the right side.
+    Right-side columns are renamed with right_prefix; merged rows otherwise keep
+    the left row's values on a name clash.
+    """
+    if how not in ('inner', 'left'):
+        raise ValueError(f"Unsupported join type '{how}' (use 'inner' or 'left').")
+    build_left = (how == 'inner' and _sized(left) and
+                  (not _sized(right) or len(left) < len(right)))
+
+    def merge(left_row, right_row):
+        merged = dict(left_row)
+        for k, v in right_row.items():
+            merged.setdefault(right_prefix + k, v)
+        return merged
+
+    if build_left:
+        side = _HashSide(left, left_on)
+        for right_row in right:
+            for left_row in side.matches(right_row.get(right_on)):
+                yield merge(left_row, right_row)
+        return
+
+    side = _HashSide(right, right_on)
+    empty = dict.fromkeys(side.columns)
+    for left_row in left:
+        found = side.matches(left_row.get(left_on))
+        for right_row in found:
+            yield merge(left_row, right_row)
+        if not found and how == 'left':
+            yield merge(left_row, empty)
+
+
+class TableJoiner:
+    """
+    Joins downloaded tables along the foreign keys in a getModelTable response.
+
+    tables maps table name -> rows (a list, a LocalTable, or any iterable of flat
+    row dicts). Only the first table of a join may be a one-shot iterator.
+    """
+
+    def __init__(self, table_schema_json, tables):
+        self.links = foreign_keys(table_schema_json)
+        self.tables = dict(tables)
+
+    def find_link(self, joined, table_name):
+        """
+        The foreign key connecting an already-joined table to table_name, in either
+        direction, as (joined_table, joined_column, table_column).
+        """
+        for from_table, from_col, to_table, to_col in self.links:
+            if from_table in joined and to_table == table_name:
+                return from_table, from_col, to_col
+            if to_table in joined and from_table == table_name:
+                return to_table, to_col, from_col
+        raise ValueError(f"No foreign key links {table_name} to {', '.join(joined)} in the table schema.")
+
+    def join(self, *table_names, how='inner'):
+        """
+        Yield rows of the first table joined to each following table in turn, each
+        via a foreign key to a table already in the join.
+        """
+        if not table_names:
+            raise ValueError("join() needs at least one table name.")
+        first = table_names[0]
+        rows = iter(self.tables[first])
+        joined = [first]
+        for name in table_names[1:]:
+            joined_table, joined_col, table_col = self.find_link(joined, name)
+            left_on = joined_col if joined_table == first else f"{joined_table}.{joined_col}"
+            right = self.tables[name]
+            if not _sized(right):
+                right = self.tables[name] = list(right)
+            rows = hash_join(rows, right, left_on, table_col, how=how, right_prefix=f"{name}.")
+            joined.append(name)
+        return rows
+
+
+def write_csv(rows, path, columns=None):
+    """
+    Stream rows to a CSV file, returning the number written. Columns default to the
+    first row's keys; values for other keys in later rows are dropped.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if first is None:
+            if columns:
+                csv.writer(f).writerow(columns)
+            return 0
+        writer = csv.DictWriter(f, fieldnames=columns or list(first), extrasaction='ignore')
+        writer.writeheader()
+        writer.writerow(first)
+        count = 1
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
@@ -0,0 +1,277 @@
+# table_query.py
+"""
+In-process query layer over downloaded Simio Portal table data.
+A LocalTable holds the flattened rows of one table (see shared_helper.flatten_table_rows)
+and answers point lookups and filters without going back to the portal:
+
+    schema = api.getModelTable(model_id)
+    rows = flatten_table_rows(fetch_all_table_pages(api, run_id, scenario_name, "Materials"))
+    materials = LocalTable.from_schema(rows, schema, "Materials")
+
+(LocalTable copies the rows into a list, so with SIMIO_MEMORY_BUDGET set, close the
+SpillableRowBuffer that fetch_all_table_pages returns once the rows are flattened.)
+
+    materials.get("Widget")                                  # hash index on the isKey column(s)
+    materials.create_sorted_index("Quantity")
+    materials.range("Quantity", 10, 50)                      # bisect over the sorted index
+    materials.where("Quantity gt 10 and Status in ('Open','Late')")   # same syntax as getTableData
+
+Filters use odata_filter: strings are parsed with parse_filter, expressions built with
+col() are evaluated directly. Top-level 'and' terms on indexed columns narrow the
+candidate rows before the full expression is checked, so an indexed filter costs
+roughly the size of its result rather than a scan of the table.
+"""
+import bisect
+import datetime
+
+from odata_filter import BoolOp, Comparison, In, coerce, parse_datetime, parse_filter, _FAIL
+
+
+def index_key(value):
+    """
+    Normalize a value for hash-index lookups. Values that compare equal under
+    odata_filter evaluation ('10.0' and 10, 'True' and true, ISO strings and
+    datetimes) map to the same key, so an index hit is never missed.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime.date):
+        if not isinstance(value, datetime.datetime):
+            value = datetime.datetime.combine(value, datetime.time())
+        return parse_datetime(value.isoformat()).isoformat()
+    if not isinstance(value, (int, float)):
+        text = str(value)
+        low = text.lower()
+        if low in ('true', 'false'):
+            return low
+        parsed = parse_datetime(text)
+        if parsed is not None:
+            return parsed.isoformat()
+        try:
+            value = float(text)
+        except ValueError:
+            return text
+    number = float(value)
+    return repr(int(number)) if number.is_integer() else repr(number)
+
+
+def exact_key(value):
+    """
+    Normalize a key-column value for exact matching. Values are kept as they are,
+    except that numbers match their plain decimal text (7, 7.0 and '7' are one key;
+    '007' and '7.0' are not), so a key typed as a number still finds the string the
+    portal returned. Nothing goes through float, so large integer IDs stay distinct.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    if isinstance(value, float):
+        if not value.is_integer():
+            return repr(value)
+        value = int(value)
+    return str(value)
+
+
+def _indexable(literal):
+    """
+    Whether an eq literal can be answered from a hash index. Date literals match any
+    time on that day, which a hash lookup can't express, so they fall back to a scan.
+    """
+    if literal is None:
+        return False
+    return isinstance(literal, datetime.datetime) or not isinstance(literal, datetime.date)
+
+
+def _sort_kind(values):
+    """Pick the comparison type for a sorted index: 'number', 'datetime' or 'text'."""
+    for kind, probe in (('number', 0), ('datetime', datetime.datetime.min)):
+        if all(coerce(v, probe) is not _FAIL for v in values):
+            return kind
+    return 'text'
+
+
+_KIND_PROBE = {'number': 0, 'datetime': datetime.datetime.min, 'text': ''}
+
+
+def _literal_kind(literal):
+    if isinstance(literal, bool) or literal is None:
+        return None
+    if isinstance(literal, (int, float)):
+        return 'number'
+    if isinstance(literal, datetime.datetime):
+        return 'datetime'
+    if isinstance(literal, str):
+        return 'text'
+    return None
+
+
+class LocalTable:
+    """
+    Flat table rows with a hash index on the key column(s) and optional
+    secondary hash and sorted indexes.
+
+    Indexes:
+        key columns  -> row positions (built on construction when key_columns is given;
+                        exact values, see exact_key)
+        column value -> row positions (create_hash_index; odata_filter-equal values
+                        share a key, and where() re-checks every candidate row)
+        sorted (value, position) pairs per column (create_sorted_index), for ranges
+    """
+
+    def __init__(self, rows, key_columns=None, name=None):
+        self.name = name
+        self.rows = list(rows)
+        self.key_columns = tuple(key_columns or ())
+        self._key_index = {}
+        self._hash_indexes = {}
+        self._sorted_indexes = {}        # column -> (kind, sorted values, row positions)
+        if self.key_columns:
+            for pos, row in enumerate(self.rows):
+                key = tuple(exact_key(row.get(c)) for c in self.key_columns)
+                self._key_index.setdefault(key, []).append(pos)
+            if len(self.key_columns) == 1:
+                self.create_hash_index(self.key_columns[0])
+
+    @classmethod
+    def from_schema(cls, rows, table_schema_json, table_name=None):
+        """
+        Build a LocalTable keyed on the isKey columns of a getModelTable entry.
+        table_schema_json is either one table's schema dict or the whole getModelTable
+        list, in which case table_name selects the table.
+        """
+        schema = table_schema_json
+        if isinstance(table_schema_json, list):
+            schema = next((t for t in table_schema_json if t.get('name') == table_name), None)
+            if schema is None:
+                raise ValueError(f"Table '{table_name}' not found in the table schema.")
+        keys = [c['name'] for c in (schema.get('columnSchemas') or []) if c.get('isKey')]
+        return cls(rows, key_columns=keys, name=schema.get('name', table_name))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    # -- Indexes ------------------------------------------------------------
+
+    def create_hash_index(self, column):
+        """Index a column for equality and 'in' lookups."""
+        index = {}
+        for pos, row in enumerate(self.rows):
+            index.setdefault(index_key(row.get(column)), []).append(pos)
+        self._hash_indexes[column] = index
+        return self
+
+    def hash_index(self, column):
+        """
+        The {index_key(value): [row positions]} index for a column, built on first use.
+        Its buckets can hold values that only compare equal after coercion; check the
+        rows against the real predicate.
+        """
+        if column not in self._hash_indexes:
+            self.create_hash_index(column)
+        return self._hash_indexes[column]
+
+    def create_sorted_index(self, column):
+        """Index a column for range lookups. Empty values are left out (they never satisfy lt/le/gt/ge)."""
+        present = [(pos, row.get(column)) for pos, row in enumerate(self.rows)
+                   if row.get(column) not in (None, '')]
+        kind = _sort_kind([v for _, v in present])
+        probe = _KIND_PROBE[kind]
+        pairs = sorted(((coerce(v, probe), pos) for pos, v in present), key=lambda p: p[0])
+        self._sorted_indexes[column] = (kind, [v for v, _ in pairs], [pos for _, pos in pairs])
+        return self
+
+    # -- Lookups ------------------------------------------------------------
+
+    def get(self, *key_values):
+        """Row with the given key column value(s), or None."""
+        matches = self.get_all(*key_values)
+        return matches[0] if matches else None
+
+    def get_all(self, *key_values):
+        """All rows with the given key column value(s) (more than one only if the data has duplicate keys)."""
+        if not self.key_columns:
+            raise ValueError(f"Table '{self.name}' has no key columns; use lookup() or where().")
+        if len(key_values) != len(self.key_columns):
+            raise ValueError(f"Expected {len(self.key_columns)} key value(s) for {', '.join(self.key_columns)}.")
+        key = tuple(exact_key(v) for v in key_values)
+        return [self.rows[pos] for pos in self._key_index.get(key, ())]
+
+    def lookup(self, column, value):
+        """Rows whose column equals value, using (and building on first use) a hash index."""
+        self.hash_index(column)
+        return self.where(Comparison(column, 'eq', value))
+
+    def range(self, column, low=None, high=None, include_low=True, include_high=True):
+        """Rows with low <= column <= high (either bound optional), in column order."""
+        if column not in self._sorted_indexes:
+            self.create_sorted_index(column)
+        return [self.rows[pos] for pos in self._candidates_range(column, low, high, include_low, include_high)]
+
+    def where(self, filter):
+        """Rows matching an OData filter string or odata_filter expression, in table order."""
+        expr = parse_filter(filter)
+        candidates = self._plan(expr)
+        if candidates is None:
+            return [row for row in self.rows if expr.evaluate(row)]
+        return [self.rows[pos] for pos in sorted(candidates) if expr.evaluate(self.rows[pos])]
+
+    def count(self, filter):
+        return len(self.where(filter))
+
+    # -- Planning -----------------------------------------------------------
+
+    def _candidates_eq(self, column, value):
+        return self._hash_indexes[column].get(index_key(value), [])
+
+    def _candidates_range(self, column, low, high, include_low, include_high):
+        kind, values, positions = self._sorted_indexes[column]
+        probe = _KIND_PROBE[kind]
+        start, end = 0, len(values)
+        for bound in (low, high):
+            if bound is not None and coerce(bound, probe) is _FAIL:
+                raise ValueError(f"Cannot compare {bound!r} with the {kind} values of column '{column}'.")
+        if low is not None:
+            low = coerce(low, probe)
+            start = (bisect.bisect_left if include_low else bisect.bisect_right)(values, low)
+        if high is not None:
+            high = coerce(high, probe)
+            end = (bisect.bisect_right if include_high else bisect.bisect_left)(values, high)
+        return positions[start:end]
+
+    def _term_candidates(self, term):
+        """Row positions that may satisfy one 'and' term, or None when no index applies."""
+        if isinstance(term, Comparison):
+            if term.op == 'eq' and _indexable(term.value) and term.column in self._hash_indexes:
+                return self._candidates_eq(term.column, term.value)
+            if term.op in ('lt', 'le', 'gt', 'ge') and term.column in self._sorted_indexes:
+                kind = self._sorted_indexes[term.column][0]
+                if _literal_kind(term.value) == kind:
+                    if term.op in ('gt', 'ge'):
+                        return self._candidates_range(term.column, term.value, None, term.op == 'ge', True)
+                    return self._candidates_range(term.column, None, term.value, True, term.op == 'le')
+        if isinstance(term, In) and term.column in self._hash_indexes and all(map(_indexable, term.values)):
+            positions = []
+            for value in term.values:
+                positions.extend(self._candidates_eq(term.column, value))
+            return positions
+        return None
+
+    def _plan(self, expr):
+        """
+        Row positions that may satisfy expr, or None for a full scan. 'and' takes the
+        smallest indexed operand; 'or' unions its operands when every one is indexed.
+        """
+        if isinstance(expr, BoolOp):
+            plans = [self._plan(o) for o in expr.operands]
+            if expr.op == 'and':
+                plans = [p for p in plans if p is not None]
+                return min(plans, key=len) if plans else None
+            if any(p is None for p in plans):
+                return None
+            return set().union(*plans)
+        candidates = self._term_candidates(expr)
+        return None if candidates is None else set(candidates)
@@ -0,0 +1,106 @@
+# task_graph.py
+"""
+Minimal dependency-graph task runner.
+Each task starts on a thread pool as soon as all of its dependencies have
+finished, so independent API calls run concurrently. Start/end times are
+recorded for every task and the critical path can be printed as a timeline.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class TaskGraph:
+    """
+    Runs named tasks in dependency order with maximum concurrency.
+
+    A task function receives its dependencies' results as positional arguments,
+    in the order the dependencies were listed.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._tasks = {}        # name -> (fn, deps, optional)
+        self.results = {}
+        self.errors = {}
+        self.timings = {}       # name -> (start, end, thread name), seconds relative to run() start
+        self._t0 = None
+
+    def add(self, name, fn, deps=(), optional=False):
+        """Add a task. Failures of optional tasks are recorded in errors and give a None result instead of aborting."""
+        missing = [d for d in deps if d not in self._tasks]
+        if missing:
+            raise ValueError(f"Task '{name}' depends on unknown task(s): {', '.join(missing)}")
+        self._tasks[name] = (fn, tuple(deps), optional)
+        return self
+
+    def _execute(self, name):
+        fn, deps, optional = self._tasks[name]
+        start = time.perf_counter() - self._t0
+        try:
+            return fn(*(self.results[d] for d in deps))
+        except Exception as e:
+            if not optional:
+                raise
+            self.errors[name] = e
+            print(f"  Task '{name}' failed (optional, continuing): {e}")
+            return None
+        finally:
+            self.timings[name] = (start, time.perf_counter() - self._t0, threading.current_thread().name)
+
+    def run(self):
+        """Run every task. Returns the results dict; re-raises the first failure of a required task."""
+        self._t0 = time.perf_counter()
+        remaining = dict(self._tasks)
+        running = {}
+        failure = None
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="task") as pool:
+            while remaining or running:
+                if failure is None:
+                    ready = [n for n, (_, deps, _) in remaining.items() if all(d in self.results for d in deps)]
+                    for name in ready:
+                        del remaining[name]
+                        running[pool.submit(self._execute, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except BaseException as e:
+                        failure = failure or e
+        if failure is not None:
+            raise failure
+        return self.results
+
+    def critical_path(self):
+        """Names of the tasks on the longest dependency chain (by finish time), in execution order."""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [name]
+        while True:
+            deps = [d for d in self._tasks[name][1] if d in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: self.timings[d][1])
+            path.append(name)
+        return list(reversed(path))
+
+    def print_timeline(self, title="Task Timeline", width=40):
+        """Print each task's start/end as a bar chart, marking the critical path with '*'."""
+        if not self.timings:
+            return
+        total = max(end for _, end, _ in self.timings.values()) or 1e-9
+        critical = set(self.critical_path())
+        name_width = max(len(n) for n in self.timings)
+        print(f"\n  {'─' * 60}")
+        print(f"  {title} (total {total:.2f}s, * = critical path)")
+        print(f"  {'─' * 60}")
+        for name, (start, end, _) in sorted(self.timings.items(), key=lambda kv: kv[1][0]):
+            lead = min(int(start / total * width), width - 1)
+            bar = max(1, min(width - lead, int(end / total * width) - lead))
+            mark = '*' if name in critical else ' '
+            print(f"  {mark} {name:<{name_width}}  {start:7.2f}s {end:7.2f}s  |{' ' * lead}{'█' * bar}{' ' * (width - lead - bar)}|")
+        print(f"  {'─' * 60}")
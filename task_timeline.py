@@ -0,0 +1,332 @@
+# task_timeline.py
+"""
+Interval index over a run's task log, for Gantt views and "what was running at
+time T / on resource R" questions without re-paging getScenariosTaskLogData.
+
+    timeline = TaskTimeline.load_or_build(api, run_id)        # cached in .task_index_cache/
+    timeline.at("2025-01-06T10:00:00")                        # tasks running at T
+    timeline.overlapping(t0, t1, resource="Cutter1")          # tasks on a resource in a window
+    timeline.buckets(3600)                                    # busy time / tasks started per hour
+    timeline.gantt_bars(resolution=900, resource="Cutter1")   # merged bars for rendering
+
+Tasks are held in arrays sorted by start time with an implicit augmented interval
+tree on top (each node records the latest end time in its subtree), so overlap and
+point queries cost O(log n + matches). A tree is also kept per resource. Column
+roles (resource, start, end, task name) are found from getScenariosLogSchemas the
+same way as in resource_kpis; numpy is not needed.
+"""
+import bisect
+import datetime
+import gzip
+import hashlib
+import json
+import math
+import os
+from collections import namedtuple
+
+from api_metrics import registry as metrics
+from odata_filter import parse_datetime
+from resource_kpis import detect_columns, log_properties
+
+Task = namedtuple('Task', 'resource name start end')
+
+INDEX_VERSION = 1
+DEFAULT_CACHE_DIR = '.task_index_cache'
+
+
+def default_index_path(run_id, directory=DEFAULT_CACHE_DIR, scenario_name=None, columns=None):
+    """
+    Where the task index for a run is cached. An index limited to one scenario or
+    built with explicit column roles gets its own file, keyed on both.
+    """
+    name = f"task_index_run{run_id}"
+    if scenario_name is not None or columns:
+        digest = hashlib.sha256(json.dumps([scenario_name, columns], sort_keys=True, default=str)
+                                .encode('utf-8')).hexdigest()[:16]
+        name += f"_{digest}"
+    return os.path.join(directory, name + ".json.gz")
+
+
+def _to_seconds(value):
+    """Seconds from a number, datetime or ISO string (naive values are taken as UTC); None if empty."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    else:
+        parsed = parse_datetime(str(value))
+        if parsed is None:
+            return float(value)
+        value = parsed
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class _IntervalTree:
+    """
+    Static interval tree over a subset of tasks (positions into the shared arrays),
+    sorted by start. The tree is implicit: node (lo, hi) is the midpoint of that
+    position range, and max_end[mid] is the latest end time anywhere in the range.
+    """
+
+    def __init__(self, starts, ends, positions):
+        self.positions = positions
+        self.starts = [starts[p] for p in positions]
+        self.ends = [ends[p] for p in positions]
+        self.max_end = [0.0] * len(positions)
+        if positions:
+            self._build(0, len(positions))
+
+    def _build(self, lo, hi):
+        mid = (lo + hi) // 2
+        latest = self.ends[mid]
+        if lo < mid:
+            latest = max(latest, self._build(lo, mid))
+        if mid + 1 < hi:
+            latest = max(latest, self._build(mid + 1, hi))
+        self.max_end[mid] = latest
+        return latest
+
+    def query(self, lo, hi, closed=False):
+        """
+        Positions of intervals with start < hi and end > lo (start <= hi and end > lo
+        when closed, i.e. a point query at lo == hi), in start order.
+        """
+        limit = (bisect.bisect_right if closed else bisect.bisect_left)(self.starts, hi)
+        found = []
+        stack = [(0, len(self.starts))]
+        while stack:
+            a, b = stack.pop()
+            if a >= b or a >= limit:
+                continue  # empty, or every interval here starts after the window closes
+            mid = (a + b) // 2
+            if self.max_end[mid] <= lo:
+                continue  # nothing in this subtree ends after the window opens
+            if mid < limit and self.ends[mid] > lo:
+                found.append(mid)
+            stack.append((a, mid))
+            stack.append((mid + 1, b))
+        found.sort()
+        return [self.positions[i] for i in found]
+
+
+class TaskTimeline:
+    """Task log intervals with overlap, point-in-time and per-resource queries."""
+
+    def __init__(self, resources, names, starts, ends, is_datetime=True, run_id=None):
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        self.run_id = run_id
+        self.is_datetime = is_datetime
+        self.resources = [resources[i] for i in order]
+        self.names = [names[i] for i in order]
+        self.starts = [starts[i] for i in order]
+        self.ends = [ends[i] for i in order]
+        self._tree = _IntervalTree(self.starts, self.ends, list(range(len(self.starts))))
+        self._resource_trees = {}
+        self._positions_by_resource = {}
+        for pos, res in enumerate(self.resources):
+            self._positions_by_resource.setdefault(res, []).append(pos)
+
+    # -- Building -----------------------------------------------------------
+
+    @classmethod
+    def from_rows(cls, rows, log_schema_json=None, columns=None, scenario_name=None, run_id=None):
+        """Build from task log rows (any iterable of dicts). Rows without a start time are skipped."""
+        props = log_properties(log_schema_json, 'task') if log_schema_json is not None else {}
+        mapping = detect_columns(list(props), 'task', columns) if props else None
+        resources, names, starts, ends = [], [], [], []
+        open_rows = []
+        is_datetime = None
+        for row in rows:
+            if mapping is None:
+                mapping = detect_columns(list(row), 'task', columns)
+            if scenario_name is not None and 'scenario' in mapping and row.get(mapping['scenario']) != scenario_name:
+                continue
+            raw_start = row.get(mapping['start'])
+            start = _to_seconds(raw_start)
+            if start is None:
+                continue
+            if is_datetime is None:
+                is_datetime = not isinstance(raw_start, (int, float))
+            end = _to_seconds(row.get(mapping['end']))
+            if end is None:
+                open_rows.append(len(ends))
+            resources.append(str(row.get(mapping['resource'])))
+            names.append(str(row.get(mapping['task'], '')) if 'task' in mapping else '')
+            starts.append(start)
+            ends.append(start if end is None else end)
+        if open_rows:
+            # Tasks still running when the log was written end at the last logged time
+            horizon = max(max(starts), max(ends))
+            for i in open_rows:
+                ends[i] = horizon
+        return cls(resources, names, starts, ends, is_datetime=is_datetime is not False, run_id=run_id)
+
+    @classmethod
+    def fetch(cls, api, run_id, page_size=1000, concurrency=1, log_schema_json=None, columns=None,
+              scenario_name=None, verbose=False):
+        """Page through the task log and build the index."""
+        from shared_helper import iter_log_pages
+
+        if log_schema_json is None:
+            log_schema_json = api.getScenariosLogSchemas(runId=run_id)
+        rows = (row for _, page in iter_log_pages(api, run_id, 'task', page_size, verbose=verbose,
+                                                   concurrency=concurrency)
+                for row in page)
+        return cls.from_rows(rows, log_schema_json, columns=columns, scenario_name=scenario_name, run_id=run_id)
+
+    @classmethod
+    def load_or_build(cls, api, run_id, path=None, refresh=False, **fetch_kwargs):
+        """
+        Load the cached index for a run, or fetch the task log, build the index and save it.
+        The default path depends on scenario_name and columns, so differently filtered
+        indexes of one run don't overwrite each other.
+        """
+        path = path or default_index_path(run_id, scenario_name=fetch_kwargs.get('scenario_name'),
+                                          columns=fetch_kwargs.get('columns'))
+        if not refresh and os.path.exists(path):
+            metrics.record_cache('task_index', True)
+            return cls.load(path)
+        metrics.record_cache('task_index', False)
+        timeline = cls.fetch(api, run_id, **fetch_kwargs)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        timeline.save(path)
+        return timeline
+
+    # -- Persistence --------------------------------------------------------
+
+    def save(self, path):
+        """Write the index as gzipped JSON (written to a temp file, then renamed)."""
+        resource_names = sorted(self._positions_by_resource)
+        codes = {r: i for i, r in enumerate(resource_names)}
+        data = {
+            'version': INDEX_VERSION,
+            'run_id': self.run_id,
+            'is_datetime': self.is_datetime,
+            'resource_names': resource_names,
+            'resources': [codes[r] for r in self.resources],
+            'names': self.names,
+            'starts': self.starts,
+            'ends': self.ends,
+        }
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path} was written by a different task index version; rebuild it with refresh=True.")
+        names = data['resource_names']
+        return cls([names[c] for c in data['resources']], data['names'], data['starts'], data['ends'],
+                   is_datetime=data['is_datetime'], run_id=data.get('run_id'))
+
+    # -- Queries ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.starts)
+
+    def resource_names(self):
+        return sorted(self._positions_by_resource)
+
+    def span(self):
+        """(earliest start, latest end) in seconds."""
+        if not self.starts:
+            return 0.0, 0.0
+        return self.starts[0], max(self.ends)
+
+    def _tree_for(self, resource):
+        if resource is None:
+            return self._tree
+        if resource not in self._resource_trees:
+            self._resource_trees[resource] = _IntervalTree(self.starts, self.ends,
+                                                           self._positions_by_resource.get(resource, []))
+        return self._resource_trees[resource]
+
+    def _task(self, pos):
+        return Task(self.resources[pos], self.names[pos], self.starts[pos], self.ends[pos])
+
+    def overlapping(self, start, end, resource=None):
+        """Tasks running at any time in [start, end), optionally only on one resource."""
+        lo, hi = _to_seconds(start), _to_seconds(end)
+        return [self._task(p) for p in self._tree_for(resource).query(lo, hi)]
+
+    def at(self, when, resource=None):
+        """Tasks running at an instant (start <= when < end)."""
+        t = _to_seconds(when)
+        return [self._task(p) for p in self._tree_for(resource).query(t, t, closed=True)]
+
+    def for_resource(self, resource):
+        """Every task on a resource, in start order."""
+        return [self._task(p) for p in self._positions_by_resource.get(resource, [])]
+
+    # -- Aggregates for rendering ------------------------------------------
+
+    def buckets(self, bucket_seconds, start=None, end=None, resource=None):
+        """
+        Down-sampled timeline: one dict per bucket with its start time, the task time
+        inside it (busy_seconds), the average number of tasks running and the number
+        of tasks that started in it. The last bucket may extend past the end.
+        """
+        if not bucket_seconds > 0:
+            raise ValueError(f"bucket_seconds must be positive (got {bucket_seconds!r}).")
+        positions = self._positions_by_resource.get(resource, []) if resource is not None else range(len(self))
+        starts = sorted(self.starts[p] for p in positions)
+        ends = sorted(self.ends[p] for p in positions)
+        lo, hi = self.span()
+        lo = lo if start is None else _to_seconds(start)
+        hi = hi if end is None else _to_seconds(end)
+        count = max(1, math.ceil((hi - lo) / bucket_seconds))
+        edges = [lo + i * bucket_seconds for i in range(count + 1)]
+
+        # Task time before t = sum(t - s for s < t) - sum(t - e for e < t), via prefix sums
+        prefix_s, prefix_e = [0.0], [0.0]
+        for s in starts:
+            prefix_s.append(prefix_s[-1] + s)
+        for e in ends:
+            prefix_e.append(prefix_e[-1] + e)
+
+        def before(t):
+            ks = bisect.bisect_right(starts, t)
+            ke = bisect.bisect_right(ends, t)
+            return (t * ks - prefix_s[ks]) - (t * ke - prefix_e[ke])
+
+        totals = [before(t) for t in edges]
+        started = [bisect.bisect_left(starts, t) for t in edges]
+        return [{
+            'start': edges[i],
+            'busy_seconds': totals[i + 1] - totals[i],
+            'average_running': (totals[i + 1] - totals[i]) / bucket_seconds,
+            'tasks_started': started[i + 1] - started[i],
+        } for i in range(count)]
+
+    def gantt_bars(self, resolution, resource=None):
+        """
+        {resource: [(start, end, task_count), ...]}: each resource's tasks merged into
+        bars wherever the gap between them is shorter than resolution seconds, so
+        the bar count stays proportional to the rendered width, not the task count.
+        """
+        bars = {}
+        names = [resource] if resource is not None else self.resource_names()
+        for res in names:
+            merged = []
+            for pos in self._positions_by_resource.get(res, []):
+                s, e = self.starts[pos], self.ends[pos]
+                if merged and s - merged[-1][1] < resolution:
+                    last = merged[-1]
+                    merged[-1] = (last[0], max(last[1], e), last[2] + 1)
+                else:
+                    merged.append((s, e, 1))
+            bars[res] = merged
+        return bars
+
+    def format_time(self, seconds):
+        """ISO timestamp (UTC) for date-time logs, else the raw number."""
+        if self.is_datetime:
+            return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+        return f"{seconds:g}"
@@ -0,0 +1,98 @@
+# threaded_api.py
+"""
+Thread-pool adapter for the Simio Portal API backends.
+Wraps a pySimio (or SimioAPI) object so its synchronous calls can be run on a
+bounded thread pool and returned as futures. Authentication is serialized and
+shared: one token serves every worker thread, and concurrent 401 re-auths
+collapse into a single authenticate call.
+
+    api = ThreadedAPI(pySimio(url), max_workers=8)
+    api.authenticate(personalAccessToken=token)
+    futures = [api.getTableDataAsync(runId=..., scenarioName=..., tableName=..., page=p, pageSize=500)
+               for p in range(1, 5)]
+
+Any other attribute is passed through to the wrapped object, so a ThreadedAPI
+can be handed to every shared_helper function unchanged.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ThreadedAPI:
+    """Runs API calls on a bounded thread pool with thread-safe, shared authentication."""
+
+    def __init__(self, api, max_workers=8):
+        self._api = api
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="simio-api")
+        self._auth_lock = threading.Lock()
+        self._auth_generation = 0
+        # SimioAPI re-authenticates on 401 from whichever thread saw it; route that through the shared lock
+        if hasattr(api, '_reauthenticate'):
+            self._inner_reauthenticate = api._reauthenticate
+            api._reauthenticate = self._shared_reauthenticate
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+    # -- Auth ---------------------------------------------------------------
+
+    def authenticate(self, *args, **kwargs):
+        """Authenticate the wrapped client; calls from several threads are serialized."""
+        with self._auth_lock:
+            result = self._api.authenticate(*args, **kwargs)
+            self._auth_generation += 1
+            return result
+
+    def _shared_reauthenticate(self):
+        generation = self._auth_generation
+        with self._auth_lock:
+            if self._auth_generation != generation:
+                return  # another thread refreshed the token while this one waited
+            self._inner_reauthenticate()
+            self._auth_generation += 1
+
+    # -- Futures ------------------------------------------------------------
+
+    def submit(self, method_name, *args, **kwargs):
+        """Run api.<method_name>(*args, **kwargs) on the pool and return a Future."""
+        return self._pool.submit(getattr(self._api, method_name), *args, **kwargs)
+
+    def map(self, method_name, kwargs_list):
+        """Submit one call per kwargs dict and return the results in order."""
+        futures = [self.submit(method_name, **kwargs) for kwargs in kwargs_list]
+        return [f.result() for f in futures]
+
+    def getTableDataAsync(self, *args, **kwargs):
+        return self.submit('getTableData', *args, **kwargs)
+
+    def getRunProgressAsync(self, *args, **kwargs):
+        return self.submit('getRunProgress', *args, **kwargs)
+
+    def getScenariosLogSchemasAsync(self, *args, **kwargs):
+        return self.submit('getScenariosLogSchemas', *args, **kwargs)
+
+    def getScenariosResourceUsageLogDataAsync(self, *args, **kwargs):
+        return self.submit('getScenariosResourceUsageLogData', *args, **kwargs)
+
+    def getScenariosResourceStateLogDataAsync(self, *args, **kwargs):
+        return self.submit('getScenariosResourceStateLogData', *args, **kwargs)
+
+    def getScenariosResourceCapacityLogDataAsync(self, *args, **kwargs):
+        return self.submit('getScenariosResourceCapacityLogData', *args, **kwargs)
+
+    def getScenariosTaskLogDataAsync(self, *args, **kwargs):
+        return self.submit('getScenariosTaskLogData', *args, **kwargs)
+
+    def getScenariosConstraintLogDataAsync(self, *args, **kwargs):
+        return self.submit('getScenariosConstraintLogData', *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads."""
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()